@@ -0,0 +1,612 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from db.db_manager import DataManager
+from utils.deal_scoring import plan_channel_budgets
+from utils.eligibility import decode_reasons, describe_reason, evaluate_products, filter_flags, republish_window
+from utils.run_logger import get_run_logger
+
+
+class AutoPublishResult:
+    """
+    Outcome of one automatic publishing run.
+
+    to_run_log() gives the bounded summary stored as auto_publish_config.last_run_log,
+    which the Automatic Publish tab reads. The full log of the run is in the
+    JSON-lines run log, under this result's run_id.
+    """
+
+    # Caps on what is copied into the config document
+    LOG_TAIL = 20
+    MAX_SKIP_REASONS = 20
+    MAX_PUBLISHED_PRODUCTS = 50
+
+    def __init__(self, started_at=None):
+        self.started_at = started_at or datetime.now()
+        self.run_id = uuid.uuid4().hex[:12]
+        self.finished_at = None
+        self.status = "running"  # "completed", "skipped" (already running) or "error"
+        self.error = None
+        self.buybox_updated = 0
+        self.products_checked = 0
+        self.price_changes = 0
+        self.eligible = 0
+        self.deferred = 0
+        self.published = 0
+        self.skipped = 0
+        self.failed = 0
+        self.skipped_reasons = {}
+        self.published_products = []
+        self.publish_results = {}
+        self.channels = []
+        self.next_run = None
+        self.log_file = None
+        self.summary_file = None
+        self.logs = deque(maxlen=self.LOG_TAIL)
+
+    @property
+    def duration_seconds(self):
+        end = self.finished_at or datetime.now()
+        return (end - self.started_at).total_seconds()
+
+    @property
+    def ok(self):
+        return self.status == "completed"
+
+    def add_skip_reason(self, reason, count=1):
+        self.skipped_reasons[reason] = self.skipped_reasons.get(reason, 0) + count
+
+    def to_run_log(self):
+        top_reasons = sorted(self.skipped_reasons.items(), key=lambda item: item[1], reverse=True)
+        run_log = {
+            "run_id": self.run_id,
+            "time": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "status": self.status,
+            "products_checked": self.products_checked,
+            "eligible": self.eligible,
+            "deferred": self.deferred,
+            "published": self.published,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "buybox_updated": self.buybox_updated,
+            "skipped_reasons": dict(top_reasons[:self.MAX_SKIP_REASONS]),
+            "skipped_reason_count": len(self.skipped_reasons),
+            "published_products": self.published_products[:self.MAX_PUBLISHED_PRODUCTS],
+            "log_tail": list(self.logs),
+            "duration_seconds": self.duration_seconds,
+            "log_file": self.log_file,
+        }
+        if self.summary_file:
+            run_log["summary_file"] = self.summary_file
+        if self.error:
+            run_log["error"] = self.error
+        return run_log
+
+
+class AutoPublishEngine:
+    """
+    Automatic publishing without any UI: buy box repair, price refresh,
+    eligibility filtering, publishing and run logging.
+
+    Used by the Automatic Publish tab and by run_auto_publish.py, so a run can
+    be supervised as a plain worker process without a browser tab open.
+
+        engine = AutoPublishEngine(ConfigManager())
+        result = engine.run()
+        print(result.published, result.failed)
+    """
+
+    RUN_LOG_NAME = "auto_publish_runs.jsonl"
+    PRICE_BATCH_SIZE = 10
+    PRICE_BATCH_DELAY = 2
+    BASE_QUERY = {"$expr": {"$lt": ["$Product_current_price", "$Product_Buy_box_price"]}}
+
+    # One run at a time per process, whichever caller triggers it
+    _run_lock = threading.Lock()
+
+    def __init__(self, config_manager, db=None, notification_publisher=None, log_dir="logs", evaluator="aggregation"):
+        """
+        Args:
+            evaluator (str): "aggregation" evaluates eligibility inside MongoDB,
+                             "vectorized" loads candidates and history and evaluates them with NumPy
+        """
+        self.config_manager = config_manager
+        self.db = db or DataManager()
+        self._notification_publisher = notification_publisher
+        self._publish_service = None
+        self.log_dir = log_dir
+        self.evaluator = evaluator
+        self.run_logger = get_run_logger(os.path.join(log_dir, self.RUN_LOG_NAME))
+        self._indexes_checked = False
+
+    @property
+    def publish_service(self):
+        """The given publisher's PublishService, or the process-wide one."""
+        if self._publish_service is None:
+            from publish_service import PublishService, get_publish_service
+            if self._notification_publisher is None:
+                self._publish_service = get_publish_service(self.config_manager)
+                self._notification_publisher = self._publish_service.notification_publisher
+            elif self._notification_publisher._publish_service is not None:
+                self._publish_service = self._notification_publisher._publish_service
+            else:
+                self._publish_service = PublishService(self.config_manager, db=self.db,
+                                                       notification_publisher=self._notification_publisher)
+        return self._publish_service
+
+    @property
+    def notification_publisher(self):
+        return self.publish_service.notification_publisher
+
+    def is_running(self):
+        return self._run_lock.locked()
+
+    def run(self, filters=None, channels=None):
+        """
+        Run one automatic publishing job.
+
+        Args:
+            filters (dict): Eligibility filters; defaults to the saved auto-publish config
+            channels (list): Channels to publish to; defaults to the saved auto-publish config
+
+        Returns:
+            AutoPublishResult: Also saved as last_run_log in the auto-publish config
+        """
+        result = AutoPublishResult()
+        if not self._run_lock.acquire(blocking=False):
+            print("[AutoPublish] Previous job still running, skipping this execution")
+            result.status = "skipped"
+            result.finished_at = datetime.now()
+            return result
+
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            result.log_file = self.run_logger.path
+            self._log(result, "Starting automatic publishing job...")
+
+            auto_config = self.db.get_auto_publish_config()
+            filters = filters if filters is not None else auto_config.get("filters", {})
+            result.channels = channels or auto_config.get("channels", ["Telegram"])
+
+            self._log(result, "Checking and fixing buy box prices before monitoring...")
+            result.buybox_updated = self.repair_buybox_prices()
+            if result.buybox_updated:
+                self._log(result, "✅ Buy box prices were adjusted for some products to ensure proper filtering")
+
+            if filters.get("price_change", True):
+                self._log(result, "'Price change should be there' filter is enabled - checking for real-time price changes...")
+                candidates = list(self.db.get_products(self.BASE_QUERY))
+                result.products_checked = len(candidates)
+                if not candidates:
+                    self._log(result, "⚠️ No products found where current price < buy box price. Checking will stop here.")
+                    return self._finish(result)
+                self._log(result, f"Found {len(candidates)} products with current price < buy box price")
+                products = self.refresh_prices(candidates, result)
+                products += self.load_deferred(candidates, products, result)
+                if not products:
+                    self._log(result, "⚠️ No products found matching all filters.")
+                    result.skipped = result.products_checked
+                    return self._finish(result)
+            else:
+                self._log(result, "'Price change should be there' filter is disabled - using existing prices")
+                products = None
+
+            # Base filter (current price < Buy Box) and history filters run server-side
+            eligible = self.filter_eligible(filters, result, products)
+            result.eligible = len(eligible)
+            result.skipped = result.products_checked - len(eligible)
+            self._log(result, f"Filter results: {len(eligible)} products eligible for publishing")
+
+            plan, deferred = self.select_deals(eligible, result.channels, auto_config, result)
+            self.db.set_auto_publish_deferred(
+                None if products is None else [p.get("Product_unique_ID") for p in products],
+                [p.get("Product_unique_ID") for p in deferred]
+            )
+
+            self._schedule_next_run(result)
+
+            self._log(result, f"Starting publication of {len(eligible) - len(deferred)} eligible products")
+            for plan_channels, group in plan:
+                self._log(result, f"Publishing {len(group)} products to channels: {', '.join(plan_channels)}")
+                self.publish(group, list(plan_channels), result, republish_after=republish_window(filters))
+            return self._finish(result)
+
+        except Exception as e:
+            print(f"❌ Error during auto publish job processing: {str(e)}")
+            traceback.print_exc()
+            result.status = "error"
+            result.error = str(e)
+            return self._finish(result)
+        finally:
+            self._run_lock.release()
+
+    def load_deferred(self, candidates, changed, result):
+        """
+        Products deferred by the previous run's channel budget, so they are
+        evaluated again even though their price has not changed since.
+
+        Returns:
+            list: Deferred candidates not already in changed
+        """
+        deferred_ids = set(self.db.get_deferred_product_ids())
+        seen = {p.get("Product_unique_ID") for p in changed}
+        deferred = [p for p in candidates if p.get("Product_unique_ID") in deferred_ids - seen]
+        if deferred:
+            self._log(result, f"Re-evaluating {len(deferred)} products deferred by the last run")
+        return deferred
+
+    def select_deals(self, eligible, channels, auto_config, result):
+        """
+        Score the eligible products and keep the best ones per channel within
+        auto_config["channel_budgets"] (messages per run); see utils.deal_scoring.
+
+        Returns:
+            tuple: (plan, deferred) - plan is a list of (channels, products best first)
+        """
+        budgets = auto_config.get("channel_budgets") or {}
+        plan, deferred = plan_channel_budgets(eligible, channels, budgets, auto_config.get("category_weights"))
+        for plan_channels, group in plan:
+            for product in group:
+                self._log(result, f"Selected {product.get('product_name', 'Unknown')} (score {product['_deal_score']}) "
+                                  f"for {', '.join(plan_channels)}", event="selected",
+                          product_id=product.get("Product_unique_ID"), score=product["_deal_score"],
+                          channels=list(plan_channels))
+        for product in deferred:
+            self._log(result, f"⏭️ Deferred {product.get('product_name', 'Unknown')} (score {product['_deal_score']}) "
+                              f"to the next run: channel budget reached", event="deferred",
+                      product_id=product.get("Product_unique_ID"), score=product["_deal_score"])
+        result.deferred = len(deferred)
+        if budgets:
+            self._log(result, f"Channel budgets {budgets}: {len(eligible) - len(deferred)} selected, {len(deferred)} deferred")
+        return plan, deferred
+
+    def repair_buybox_prices(self):
+        """
+        Make sure every product has a Buy Box price above its current price, so
+        products with a missing or stale Buy Box are not filtered out. Done as
+        one server-side update (see DataManager.repair_buybox_prices).
+
+        Returns:
+            int: Number of products updated
+        """
+        updated = self.db.repair_buybox_prices()
+        print(f"✅ Buy box price check complete: {updated} products updated")
+        return updated
+
+    def refresh_prices(self, candidates, result):
+        """
+        Fetch live prices from Amazon for the candidates and keep those whose price changed.
+
+        Returns:
+            list: Re-read candidate products whose price changed, flagged with
+                  _price_change_detected, _old_price and _new_price
+        """
+        pre_update_prices = {}
+        for product in candidates:
+            product_id = product.get("Product_unique_ID")
+            current_price = product.get("Product_current_price")
+            if product_id and current_price is not None:
+                try:
+                    pre_update_prices[product_id] = float(current_price)
+                except (ValueError, TypeError):
+                    self._log(result, f"⚠️ Warning: Could not convert price for product {product_id}: {current_price}")
+
+        self._log(result, "Fetching latest prices from Amazon...")
+        try:
+            from monitors.amazon_monitor import AmazonIndiaMonitor
+            amazon_monitor = AmazonIndiaMonitor()
+
+            asins = list(pre_update_prices)
+            batch_size = self.PRICE_BATCH_SIZE
+            batch_count = (len(asins) + batch_size - 1) // batch_size
+            for i in range(0, len(asins), batch_size):
+                batch = asins[i:i + batch_size]
+                self._log(result, f"Processing batch {i // batch_size + 1}/{batch_count}: {batch}")
+                product_data = amazon_monitor.fetch_product_data(batch)
+                for asin, data in product_data.items():
+                    new_price = data.get("price")
+                    if new_price is not None:
+                        self.db.update_product(asin, {
+                            "Product_current_price": new_price,
+                            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        })
+                        self._log(result, f"Updated price for {asin}: {new_price}", product_id=asin, price=new_price)
+                # Small delay between batches to avoid overloading the API
+                if i + batch_size < len(asins):
+                    time.sleep(self.PRICE_BATCH_DELAY)
+        except Exception as e:
+            self._log(result, f"❌ Error updating prices: {str(e)}", level="error")
+
+        self._log(result, "Refreshing products with updated prices...")
+        changed = []
+        for product in self.db.get_products(self.BASE_QUERY):
+            product_id = product.get("Product_unique_ID")
+            if not product_id or product_id not in pre_update_prices:
+                continue
+            product_name = product.get("product_name", "Unknown")
+            try:
+                old_price = pre_update_prices[product_id]
+                current_price = product.get("Product_current_price")
+                new_price = float(current_price) if current_price else None
+                if new_price is None or old_price != old_price or new_price != new_price:
+                    self._log(result, f"⚠️ Skipping {product_name}: Invalid price comparison - Old price: {old_price}, New price: {new_price}")
+                    continue
+                if new_price != old_price:
+                    self._log(result, f"✅ Price change detected for {product_name}: Previous price: ₹{old_price}, Current price: ₹{new_price}")
+                    product["_price_change_detected"] = True
+                    product["_old_price"] = old_price
+                    product["_new_price"] = new_price
+                    changed.append(product)
+            except (ValueError, TypeError) as e:
+                self._log(result, f"⚠️ Error comparing prices for {product_name}: {str(e)}")
+
+        result.price_changes = len(changed)
+        self._log(result, f"Found {len(changed)} products with real-time price changes")
+        return changed
+
+    def filter_eligible(self, filters, result, products=None):
+        """
+        Apply the base, never published, price dropped and not recent filters in
+        one Mongo aggregation (see utils.eligibility).
+
+        Args:
+            filters (dict): Auto-publish filters
+            result (AutoPublishResult): Skip reasons are counted here
+            products (list): Only evaluate these products (e.g. those whose price changed);
+                             None evaluates every product below its Buy Box price
+
+        Returns:
+            list: Eligible products
+        """
+        if not self._indexes_checked:
+            self.db.ensure_publication_indexes()
+            self._indexes_checked = True
+
+        annotated = None
+        if products is not None:
+            annotated = {p.get("Product_unique_ID"): p for p in products if p.get("Product_unique_ID")}
+        product_ids = list(annotated) if annotated is not None else None
+        if self.evaluator == "vectorized":
+            eligible, skipped = self._evaluate_vectorized(filters, product_ids)
+        else:
+            eligible, skipped = self.db.get_auto_publish_eligibility(filters, product_ids=product_ids)
+        if products is None:
+            result.products_checked = len(eligible) + len(skipped)
+        self._log(result, f"Evaluated {len(eligible) + len(skipped)} products: {len(eligible)} eligible, {len(skipped)} skipped")
+
+        threshold_days = filter_flags(filters)[3]
+        for product in skipped:
+            product_name = product.get("product_name", "Unknown")
+            reasons = [describe_reason(code, product.get("Product_current_price"), product.get("_last_published_price"),
+                                       product.get("_days_since_publish"), threshold_days)
+                       for code in product.get("_skip_reasons", [])]
+            self._log(result, f"❌ Product {product_name} NOT ELIGIBLE - {'; '.join(reasons)}",
+                      event="skipped", product_id=product.get("Product_unique_ID"), reasons=product.get("_skip_reasons"))
+            for reason in reasons:
+                result.add_skip_reason(reason)
+
+        for product in eligible:
+            # Keep the price change details found by refresh_prices
+            for key, value in (annotated or {}).get(product.get("Product_unique_ID"), {}).items():
+                if key.startswith("_price_change") or key in ("_old_price", "_new_price"):
+                    product[key] = value
+            if product.get("_last_published_date") is None:
+                self._log(result, f"✅ Product {product.get('product_name', 'Unknown')} eligible - never published before",
+                          event="eligible", product_id=product.get("Product_unique_ID"))
+            else:
+                self._log(result, f"✅ Product {product.get('product_name', 'Unknown')} ELIGIBLE - last published "
+                                  f"{product.get('_days_since_publish')} days ago at ₹{product.get('_last_published_price')}",
+                          event="eligible", product_id=product.get("Product_unique_ID"))
+        return eligible
+
+    def _evaluate_vectorized(self, filters, product_ids=None):
+        """
+        Same output as DataManager.get_auto_publish_eligibility, evaluated in-process.
+
+        Returns:
+            tuple: (eligible products, skipped products with _skip_reasons)
+        """
+        query = dict(self.BASE_QUERY)
+        history_query = {}
+        if product_ids is not None:
+            query["Product_unique_ID"] = {"$in": product_ids}
+            history_query = {"product_id": {"$in": product_ids}}
+        products = list(self.db.products.find(query))
+        history = list(self.db.published_products.find(
+            history_query, {"_id": 0, "product_id": 1, "product_price": 1, "published_date": 1}
+        ))
+        frame = evaluate_products(products, history, filters)
+
+        eligible, skipped = [], []
+        for product, row in zip(products, frame.itertuples(index=False)):
+            has_history = not pd.isna(row.last_published)
+            product["_last_published_price"] = row.last_price if has_history else None
+            product["_last_published_date"] = row.last_published.to_pydatetime() if has_history else None
+            product["_days_since_publish"] = int(row.days_since_publish) if has_history else None
+            product["_skip_reasons"] = decode_reasons(row.reasons)
+            product["_eligible"] = bool(row.eligible)
+            (eligible if row.eligible else skipped).append(product)
+        return eligible, skipped
+
+    def publish(self, products, channels, result=None, republish_after=None):
+        """
+        Publish the products, sending all WhatsApp messages per recipient in one
+        batch so each WhatsApp chat is opened once.
+
+        Args:
+            republish_after (timedelta): See publish_products_batch
+
+        Returns:
+            dict: Product ID -> (success, message) tuple; products without an ID
+            are reported under None
+        """
+        results = self.publish_products_batch(products, channels, republish_after=republish_after)
+        if result is None:
+            return results
+
+        result.publish_results.update(results)
+        for product in products:
+            product_id = product.get("Product_unique_ID") or None
+            product_name = product.get("product_name", "Unknown")
+            success, message = results.get(product_id, (False, "Not published"))
+            if success:
+                self._log(result, f"✅ Published: {product_name} - {message}", event="published", product_id=product_id)
+                result.published += 1
+                result.published_products.append({
+                    "name": product.get("product_name"),
+                    "id": product.get("Product_unique_ID"),
+                    "price": product.get("Product_current_price"),
+                    "buybox": product.get("Product_Buy_box_price"),
+                    "mrp": product.get("Product_MRP"),
+                    "channels": channels
+                })
+            else:
+                self._log(result, f"❌ Failed to publish {product_name}: {message}", level="error",
+                          event="failed", product_id=product_id)
+                result.failed += 1
+        return results
+
+    def publish_products_batch(self, products, channels, pacing_seconds=5, republish_after=None):
+        """
+        Publish through the PublishService: one outbox job per product and
+        destination, WhatsApp sent per recipient in one batch (best first),
+        publication records written in bulk.
+
+        Args:
+            products (list): Product dictionaries, in send order
+            channels (list): Channels to publish to
+            pacing_seconds (int): Delay between Telegram sends to avoid rate limiting
+            republish_after (timedelta): Send a deal already published at this price again if that
+                                         was at least this long ago (the filters' not_recent window);
+                                         None leaves it to the outbox's idempotency key
+
+        Returns:
+            dict: Product ID -> (success, message) tuple; products without an ID
+            are reported under None
+        """
+        results = {}
+        publishable = []
+        for product in products:
+            if product.get("Product_unique_ID"):
+                publishable.append(product)
+            else:
+                results[None] = (False, "Product ID is missing")
+
+        if publishable:
+            results.update(self.publish_service.publish_many(
+                publishable, channels, source="auto_publish", pacing_seconds=pacing_seconds,
+                republish_after=republish_after
+            ))
+        if "WhatsApp" in channels:
+            self.release_whatsapp_driver()
+        return results
+
+    def get_whatsapp_recipients(self):
+        """
+        Returns:
+            list: ("channel" | "group", name) tuples, or None if WhatsApp is not configured
+        """
+        whatsapp_config = self.config_manager.get_whatsapp_config()
+        if not whatsapp_config:
+            return None
+
+        whatsapp_channels = whatsapp_config.get("channel_names", "").split(",") if whatsapp_config.get("channel_names") else []
+        whatsapp_groups = whatsapp_config.get("group_names", "").split(",") if whatsapp_config.get("group_names") else []
+
+        recipients = []
+        for channel_type, items in [("channel", whatsapp_channels), ("group", whatsapp_groups)]:
+            for item in items:
+                item = item.strip()
+                if item:
+                    recipients.append((channel_type, item))
+        return recipients
+
+    def release_whatsapp_driver(self):
+        """Keep the publisher's WhatsApp browser warm for the next run; it is quit once idle."""
+        sender = getattr(self._notification_publisher, "_whatsapp_sender", None)
+        if not sender:
+            return
+        try:
+            sender.release_driver()
+        except Exception as e:
+            print(f"Error closing WhatsApp driver: {e}")
+
+    def _schedule_next_run(self, result):
+        auto_config = self.db.get_auto_publish_config()
+        frequency_minutes = auto_config.get("frequency", 30)
+        result.next_run = datetime.now() + timedelta(minutes=frequency_minutes)
+        self._log(result, f"Next run scheduled for: {result.next_run.strftime('%Y-%m-%d %I:%M:%S %p')} "
+                          f"(in {frequency_minutes} minutes)")
+        auto_config["next_run"] = result.next_run.strftime("%Y-%m-%d %H:%M:%S")
+        self.db.save_auto_publish_config(auto_config)
+
+    def _finish(self, result):
+        result.finished_at = datetime.now()
+        if result.status == "running":
+            result.status = "completed"
+
+        self._log(result, f"Automatic publishing completed in {result.duration_seconds:.2f} seconds.")
+        self._log(result, f"Products checked: {result.products_checked}, Eligible: {result.eligible}, "
+                          f"Deferred: {result.deferred}, Published: {result.published}, Failed: {result.failed}",
+                  event="run_summary", status=result.status, products_checked=result.products_checked,
+                  eligible=result.eligible, deferred=result.deferred, published=result.published, failed=result.failed,
+                  duration_seconds=result.duration_seconds)
+        self._write_summary(result)
+        self.run_logger.flush(timeout=5)
+
+        try:
+            auto_config = self.db.get_auto_publish_config()
+            auto_config["last_run_log"] = result.to_run_log()
+            self.db.save_auto_publish_config(auto_config)
+        except Exception as e:
+            print(f"❌ Error saving auto publish run log: {str(e)}")
+        return result
+
+    def _write_summary(self, result):
+        summary_filename = os.path.join(self.log_dir, f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        try:
+            with open(summary_filename, "w", encoding="utf-8") as f:
+                f.write(f"===== AUTO PUBLISH SUMMARY - {result.started_at.strftime('%Y-%m-%d %I:%M:%S %p')} =====\n\n")
+                f.write(f"Duration: {result.duration_seconds:.2f} seconds\n")
+                f.write(f"Products checked: {result.products_checked}\n")
+                f.write(f"Products eligible: {result.eligible}\n")
+                f.write(f"Products deferred to the next run: {result.deferred}\n")
+                f.write(f"Products published: {result.published}\n")
+                f.write(f"Products failed: {result.failed}\n\n")
+
+                f.write("===== PUBLISHED PRODUCTS =====\n\n")
+                if result.published_products:
+                    for i, product in enumerate(result.published_products):
+                        f.write(f"{i+1}. {product['name']} (ID: {product['id']})\n")
+                        f.write(f"   Price: ₹{product['price']} | Buy Box: ₹{product['buybox']} | MRP: ₹{product['mrp']}\n")
+                        f.write(f"   Published to: {', '.join(product['channels'])}\n\n")
+                else:
+                    f.write("No products were published in this run.\n\n")
+
+                f.write("===== SKIPPED PRODUCTS REASONS =====\n\n")
+                if result.skipped_reasons:
+                    for reason, count in result.skipped_reasons.items():
+                        f.write(f"- {reason}: {count} products\n")
+                else:
+                    f.write("No products were skipped in this run.\n")
+
+                if result.next_run:
+                    f.write(f"\n===== NEXT RUN SCHEDULED FOR: {result.next_run.strftime('%Y-%m-%d %I:%M:%S %p')} =====\n")
+
+            result.summary_file = summary_filename
+            self._log(result, f"✅ Summary log saved to {summary_filename}")
+        except Exception as e:
+            self._log(result, f"⚠️ Error creating summary log: {str(e)}", level="warning")
+
+    def _log(self, result, message, level="info", **fields):
+        log_entry = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
+        print(log_entry)
+        result.logs.append(log_entry)
+        self.run_logger.log(message, level, run_id=result.run_id, **fields)
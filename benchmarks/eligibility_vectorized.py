@@ -0,0 +1,149 @@
+"""
+Benchmark the vectorized eligibility evaluator against the per-product loop
+that auto_publish_job and HandsOffModeController.run_hands_off used.
+
+Both run on the same synthetic catalog and history, and their decisions are
+checked to agree before timings are reported. No database is needed.
+
+    python -m benchmarks.eligibility_vectorized --products 500000 --label after
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.eligibility import evaluate_eligibility, evaluate_products, filter_flags
+
+
+def make_catalog(products, published_share=0.6, publications_per_product=3, seed=0, now=None):
+    """
+    Returns:
+        tuple: (product records, history records) in the shapes stored in MongoDB
+    """
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now()
+    ids = [f"B{i:09d}" for i in range(products)]
+    current = np.round(rng.uniform(100, 5000, products), 2)
+    buy_box = np.round(current * rng.uniform(0.85, 1.3, products), 2)
+
+    product_records = [
+        {"Product_unique_ID": pid, "Product_current_price": float(c), "Product_Buy_box_price": float(b)}
+        for pid, c, b in zip(ids, current, buy_box)
+    ]
+
+    published = np.flatnonzero(rng.random(products) < published_share)
+    counts = rng.integers(1, publications_per_product + 1, len(published))
+    owners = np.repeat(published, counts)
+    prices = np.round(current[owners] * rng.uniform(0.8, 1.25, len(owners)), 2)
+    ages = rng.integers(0, 30 * 24 * 3600, len(owners))
+    history_records = [
+        {"product_id": ids[owner], "product_price": float(price), "published_date": now - timedelta(seconds=int(age))}
+        for owner, price, age in zip(owners, prices, ages)
+    ]
+    return product_records, history_records
+
+
+def loop_eligibility(products, history, filters, now):
+    """The previous approach: group history per product, then branch per product."""
+    never_filter, dropped_filter, recent_filter, threshold_days = filter_flags(filters)
+    all_off = not (never_filter or dropped_filter or recent_filter)
+
+    latest = {}
+    for record in history:
+        price, date = record.get("product_price"), record.get("published_date")
+        if not price or date is None:
+            continue
+        product_id = record.get("product_id")
+        if product_id not in latest or date > latest[product_id][1]:
+            latest[product_id] = (price, date)
+
+    eligible = []
+    for product in products:
+        current_price = product.get("Product_current_price")
+        buy_box_price = product.get("Product_Buy_box_price")
+        if not current_price or not buy_box_price or not current_price < buy_box_price:
+            eligible.append(False)
+            continue
+        if all_off:
+            eligible.append(True)
+            continue
+        if product["Product_unique_ID"] not in latest:
+            eligible.append(never_filter)
+            continue
+        last_price, last_date = latest[product["Product_unique_ID"]]
+        days_ago = (now - last_date).days
+        price_dropped = float(current_price) < float(last_price)
+        not_recent = days_ago >= threshold_days
+        eligible.append((dropped_filter and price_dropped) or (recent_filter and not_recent))
+    return np.array(eligible, dtype=bool)
+
+
+def _best_of(func, repeat):
+    best, value = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def run(products, repeat=3, filters=None, seed=0):
+    filters = filters or {}
+    now = datetime.now()
+    product_records, history_records = make_catalog(products, seed=seed, now=now)
+
+    loop_s, loop_result = _best_of(lambda: loop_eligibility(product_records, history_records, filters, now), repeat)
+    frame_s, frame = _best_of(lambda: evaluate_products(product_records, history_records, filters, now), repeat)
+
+    # The evaluator alone, on columns that are already built
+    columns = (frame["current_price"].to_numpy(), frame["buy_box_price"].to_numpy(),
+               frame["last_price"].to_numpy(), frame["last_published"].to_numpy())
+    masks_s, (eligible, _) = _best_of(lambda: evaluate_eligibility(*columns, filters, now), repeat)
+
+    mismatches = int(np.count_nonzero(loop_result != eligible))
+    return {
+        "products": products,
+        "history_records": len(history_records),
+        "eligible": int(eligible.sum()),
+        "mismatches": mismatches,
+        "loop_s": loop_s,
+        "vectorized_with_frames_s": frame_s,
+        "vectorized_masks_s": masks_s,
+        "speedup_with_frames": loop_s / frame_s if frame_s else None,
+        "speedup_masks": loop_s / masks_s if masks_s else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vectorized and per-product eligibility evaluation")
+    parser.add_argument("--products", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    parser.add_argument("--label", default="run", help="Name used for the result file")
+    parser.add_argument("--output-dir", default="bench_results")
+    args = parser.parse_args()
+
+    result = run(args.products, args.repeat)
+    result.update({"label": args.label, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                   "pandas": pd.__version__, "numpy": np.__version__})
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"eligibility_vectorized_{args.label}.json")
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{result['products']} products, {result['history_records']} history records, {result['eligible']} eligible")
+    print(f"loop:                {result['loop_s']:.3f}s")
+    print(f"vectorized + frames: {result['vectorized_with_frames_s']:.3f}s ({result['speedup_with_frames']:.1f}x)")
+    print(f"vectorized masks:    {result['vectorized_masks_s']:.3f}s ({result['speedup_masks']:.1f}x)")
+    if result["mismatches"]:
+        print(f"⚠️ {result['mismatches']} decisions differ from the loop")
+    print(f"Results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the WhatsApp Business Cloud API, for exercising
+CloudApiWhatsappBackend offline.
+
+It implements the two endpoints the backend uses:
+    POST /<version>/<phone_number_id>/media     -> {"id": "..."}
+    POST /<version>/<phone_number_id>/messages  -> {"messages": [{"id": "..."}]}
+
+Run it standalone and point whatsapp.cloud_api.api_base at it:
+
+    python -m benchmarks.fake_cloud_api --port 8599 --latency-ms 80
+
+or start it in-process with start_server() and read back what was received.
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeCloudApiState:
+    def __init__(self, access_token="test-token", latency_ms=0, error_rate=0.0):
+        self.access_token = access_token
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.messages = []
+        self.uploads = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self, prefix):
+        with self._lock:
+            return f"{prefix}.{next(self._ids)}"
+
+    def record(self, kind, item):
+        with self._lock:
+            getattr(self, kind).append(item)
+
+
+def _make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if state.latency_ms:
+                time.sleep(state.latency_ms / 1000)
+
+            if self.headers.get("Authorization") != f"Bearer {state.access_token}":
+                return self._reply(401, {"error": {"message": "Invalid OAuth access token", "code": 190}})
+            if state.error_rate and random.random() < state.error_rate:
+                return self._reply(429, {"error": {"message": "Rate limit hit", "code": 130429}}, {"Retry-After": "0"})
+
+            if self.path.endswith("/media"):
+                media_id = state.next_id("media")
+                state.record("uploads", {"id": media_id, "bytes": len(body)})
+                return self._reply(200, {"id": media_id})
+
+            if self.path.endswith("/messages"):
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return self._reply(400, {"error": {"message": "Invalid JSON"}})
+                if payload.get("messaging_product") != "whatsapp" or not payload.get("to"):
+                    return self._reply(400, {"error": {"message": "messaging_product and to are required"}})
+                message_id = state.next_id("wamid")
+                state.record("messages", dict(payload, id=message_id))
+                return self._reply(200, {
+                    "messaging_product": "whatsapp",
+                    "contacts": [{"input": payload["to"], "wa_id": payload["to"]}],
+                    "messages": [{"id": message_id}],
+                })
+
+            return self._reply(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    return Handler
+
+
+def start_server(port=0, **state_kwargs):
+    """
+    Start the fake API on a background thread.
+
+    Returns:
+        tuple: (server, state, api_base); call server.shutdown() when done
+    """
+    state = FakeCloudApiState(**state_kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local WhatsApp Cloud API stand-in")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--token", default="test-token")
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, state, api_base = start_server(args.port, access_token=args.token,
+                                           latency_ms=args.latency_ms, error_rate=args.error_rate)
+    print(f"Fake Cloud API listening on {api_base} (token: {args.token})")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"messages: {len(state.messages)}, uploads: {len(state.uploads)}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
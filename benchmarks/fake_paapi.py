@@ -0,0 +1,56 @@
+"""
+In-process stand-in for the Product Advertising API's DefaultApi, for
+exercising AmazonIndiaMonitor.fetch_product_data offline.
+
+get_items answers in the JSON shape fetch_product_data parses (ItemsResult ->
+Items -> ItemInfo / Offers.Listings with Price and SavingBasis). Prices come
+from the catalog it was given, and a share of them move on every call, so
+the refresh stage has real price changes to write.
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class FakePaapiApi:
+    def __init__(self, products=None, latency_ms=0, change_rate=0.3, seed=0):
+        """
+        Args:
+            products (list): Product documents to answer for; unknown ASINs get a made-up price
+            latency_ms (int): Delay per get_items call
+            change_rate (float): Share of items returned with a new price
+        """
+        self.latency_ms = latency_ms
+        self.change_rate = change_rate
+        self.prices = {
+            p["Product_unique_ID"]: (p.get("Product_current_price"), p.get("Product_MRP"), p.get("product_name"))
+            for p in products or []
+        }
+        self.calls = 0
+        self.items = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def item(self, asin, factor):
+        price, mrp, title = self.prices.get(asin) or (999.0, 1499.0, f"Product {asin}")
+        price = float(round((price or 999.0) * factor))
+        return {
+            "ASIN": asin,
+            "ItemInfo": {"Title": {"DisplayValue": title}},
+            "Offers": {"Listings": [{
+                "Price": {"Amount": price, "Currency": "INR", "DisplayAmount": f"₹{price:,.2f}"},
+                "SavingBasis": {"Amount": float(mrp or price * 1.2), "PriceType": "LIST_PRICE"},
+            }]},
+        }
+
+    def get_items(self, request):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        item_ids = list(request.item_ids)
+        with self._lock:
+            self.calls += 1
+            self.items += len(item_ids)
+            moves = self._rng.random(len(item_ids)) < self.change_rate
+            factors = np.where(moves, self._rng.uniform(0.85, 1.1, len(item_ids)), 1.0)
+        return {"ItemsResult": {"Items": [self.item(asin, factor) for asin, factor in zip(item_ids, factors)]}}
@@ -0,0 +1,66 @@
+"""
+In-process stand-in for the Telegram Bot API, for exercising
+NotificationPublisher.telegram_push offline.
+
+It is a requests transport adapter: mount it on the publisher's session and
+sendMessage / sendPhoto calls to api.telegram.org are answered locally
+(no sockets), with an optional delay and error rate.
+
+    adapter = FakeTelegramAdapter(latency_ms=40)
+    publisher.http_session.mount("https://api.telegram.org/", adapter)
+"""
+import itertools
+import json
+import random
+import threading
+import time
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+
+class FakeTelegramAdapter(BaseAdapter):
+    def __init__(self, latency_ms=0, error_rate=0.0):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.requests = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _response(self, request, status, body):
+        response = Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode("utf-8")
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def send(self, request, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        method = request.url.rsplit("/", 1)[-1]
+        with self._lock:
+            message_id = next(self._ids)
+            self.requests.append({"method": method, "bytes": len(request.body or b"")})
+
+        if self.error_rate and random.random() < self.error_rate:
+            return self._response(request, 429, {"ok": False, "error_code": 429,
+                                                 "description": "Too Many Requests: retry after 1"})
+        if method not in ("sendMessage", "sendPhoto"):
+            return self._response(request, 404, {"ok": False, "error_code": 404, "description": "Not Found"})
+
+        result = {"message_id": message_id, "date": int(time.time())}
+        if method == "sendPhoto":
+            result["photo"] = [{"file_id": f"photo-{message_id}-small"}, {"file_id": f"photo-{message_id}"}]
+        return self._response(request, 200, {"ok": True, "result": result})
+
+    def sent(self, method=None):
+        with self._lock:
+            return sum(1 for item in self.requests if method is None or item["method"] == method)
+
+    def close(self):
+        pass
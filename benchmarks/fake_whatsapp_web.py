@@ -0,0 +1,297 @@
+"""
+Local fake of the parts of WhatsApp Web that WhatsappSender drives.
+
+The page reproduces the DOM hooks the sender relies on: the #side panel and
+#pane-side chat list with span[@title] entries, the channels tab and search box,
+the data-tab="10" composer, the Attach button with the "Photos & videos" file
+input, the media editor with its caption box and send button, outgoing
+message-out bubbles with delivery ticks, and the #main header title.
+
+Render delays are configurable so timing-dependent code paths can be exercised.
+Every sent message is posted back to the server, so a harness can check what
+was actually rendered.
+
+    python -m benchmarks.fake_whatsapp_web --port 8598 --chats "testing_group" --channels "Testing channel"
+
+then use WhatsappSender(base_url="http://127.0.0.1:8598/").
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE_TEMPLATE = r"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>WhatsApp</title>
+<style>
+  body { font-family: sans-serif; margin: 0; display: flex; height: 100vh; }
+  #side { width: 320px; border-right: 1px solid #ccc; overflow: auto; }
+  #main { flex: 1; display: flex; flex-direction: column; }
+  #messages { flex: 1; overflow: auto; padding: 8px; }
+  .message-out { background: #dcf8c6; margin: 4px; padding: 4px; white-space: pre-wrap; }
+  [contenteditable] { border: 1px solid #aaa; min-height: 24px; padding: 4px; white-space: pre-wrap; }
+  .chat { padding: 8px; cursor: pointer; }
+  #media-editor { position: fixed; inset: 40px; background: #fff; border: 1px solid #888; padding: 8px; }
+  #attach-menu { border: 1px solid #888; padding: 4px; }
+</style>
+</head>
+<body>
+<div id="app"></div>
+<script>
+const CONFIG = __CONFIG__;
+const app = document.getElementById('app');
+let currentChat = null;
+let showingChannels = false;
+
+function later(ms, fn) { ms ? setTimeout(fn, ms) : fn(); }
+
+function el(tag, attrs, children) {
+  const node = document.createElement(tag);
+  for (const [key, value] of Object.entries(attrs || {})) {
+    if (key === 'text') node.textContent = value; else node.setAttribute(key, value);
+  }
+  (children || []).forEach(child => node.appendChild(child));
+  return node;
+}
+
+// Like WhatsApp's editor, handle paste by inserting the clipboard text ourselves
+function makeEditable(node) {
+  node.addEventListener('paste', event => {
+    event.preventDefault();
+    const text = (event.clipboardData || window.clipboardData).getData('text/plain');
+    document.execCommand('insertText', false, text);
+  });
+  return node;
+}
+
+function renderLogin() {
+  if (CONFIG.logged_out) {
+    app.appendChild(el('div', {'data-ref': 'fake-qr', text: 'Scan me!'}));
+    return;
+  }
+  later(CONFIG.login_delay_ms, renderApp);
+}
+
+function renderApp() {
+  const side = el('div', {id: 'side'});
+  const search = makeEditable(el('div', {contenteditable: 'true', 'data-tab': '3'}));
+  search.addEventListener('input', () => renderChatList(search.innerText.trim()));
+  const tabs = el('div', {}, [
+    el('span', {'data-icon': 'chats-tab', text: 'Chats', class: 'tab'}),
+    el('span', {'data-icon': 'newsletter-tab', text: ' Channels', class: 'tab'}),
+  ]);
+  tabs.children[0].addEventListener('click', () => { showingChannels = false; renderChatList(''); });
+  tabs.children[1].addEventListener('click', () => { showingChannels = true; renderChatList(''); });
+  side.appendChild(tabs);
+  side.appendChild(search);
+  side.appendChild(el('div', {id: 'pane-side'}));
+  app.appendChild(side);
+  app.appendChild(el('div', {id: 'main'}));
+  renderChatList('');
+}
+
+function renderChatList(filter) {
+  const pane = document.getElementById('pane-side');
+  pane.innerHTML = '';
+  const names = filter ? CONFIG.chats.concat(CONFIG.channels) : (showingChannels ? CONFIG.channels : CONFIG.chats);
+  names.filter(name => !filter || name.toLowerCase().includes(filter.toLowerCase())).forEach(name => {
+    const span = el('span', {title: name, text: name});
+    const row = el('div', {class: 'chat'}, [span]);
+    row.addEventListener('click', () => openChat(name));
+    pane.appendChild(row);
+  });
+}
+
+function openChat(name) {
+  currentChat = name;
+  const main = document.getElementById('main');
+  main.innerHTML = '';
+  later(CONFIG.chat_open_delay_ms, () => {
+    if (currentChat !== name) return;
+    main.appendChild(el('header', {}, [el('span', {title: name, text: name})]));
+    main.appendChild(el('div', {id: 'messages'}));
+    main.appendChild(el('footer', {id: 'footer'}));
+    renderComposer();
+  });
+}
+
+function renderComposer() {
+  const footer = document.getElementById('footer');
+  footer.innerHTML = '';
+  const attach = el('div', {title: 'Attach', role: 'button'}, [el('span', {'data-icon': 'attach', text: '📎'})]);
+  attach.addEventListener('click', toggleAttachMenu);
+  const composer = makeEditable(el('div', {contenteditable: 'true', 'data-tab': '10', role: 'textbox'}));
+  composer.addEventListener('keydown', event => {
+    if (event.key === 'Enter' && !event.shiftKey) {
+      event.preventDefault();
+      const text = composer.innerText.replace(/\n$/, '');
+      if (text.trim()) { composer.innerHTML = ''; sendMessage(text, null); }
+    }
+  });
+  footer.appendChild(attach);
+  footer.appendChild(composer);
+}
+
+function toggleAttachMenu() {
+  const existing = document.getElementById('attach-menu');
+  if (existing) { existing.remove(); return; }
+  const input = el('input', {type: 'file', accept: 'image/*,video/mp4,video/3gpp,video/quicktime', style: 'display:none'});
+  input.addEventListener('change', () => openMediaEditor(input.files[0]));
+  const menu = el('div', {id: 'attach-menu'}, [
+    el('li', {}, [el('span', {text: 'Document'})]),
+    el('li', {}, [el('span', {text: 'Photos & videos'}), input]),
+  ]);
+  later(CONFIG.menu_delay_ms, () => document.getElementById('footer').appendChild(menu));
+}
+
+function openMediaEditor(file) {
+  const composer = document.querySelector('div[data-tab="10"]');
+  const pendingText = composer ? composer.innerText.replace(/\n$/, '') : '';
+  // The conversation footer is replaced by the media editor while it is open
+  document.getElementById('footer').innerHTML = '';
+  later(CONFIG.upload_delay_ms, () => {
+    const caption = makeEditable(el('div', {contenteditable: 'true', role: 'textbox', 'data-testid': 'media-caption'}));
+    caption.innerText = pendingText;
+    const send = el('div', {role: 'button', 'aria-label': 'Send'}, [el('span', {'data-icon': 'send', text: '➤'})]);
+    const editor = el('div', {id: 'media-editor', 'data-testid': 'media-editor'}, [
+      el('img', {src: URL.createObjectURL(file), style: 'max-height: 200px'}), caption, send,
+    ]);
+    send.addEventListener('click', () => {
+      const text = caption.innerText.replace(/\n$/, '');
+      editor.remove();
+      renderComposer();
+      sendMessage(text, file.name);
+    });
+    document.body.appendChild(editor);
+  });
+}
+
+function sendMessage(text, imageName) {
+  const bubble = el('div', {class: 'message-out'}, [el('span', {class: 'text', text: text})]);
+  document.getElementById('messages').appendChild(bubble);
+  fetch('/api/sent', {method: 'POST', headers: {'Content-Type': 'application/json'},
+                      body: JSON.stringify({chat: currentChat, text: text, image: imageName})});
+  later(CONFIG.ack_delay_ms, () => bubble.appendChild(el('span', {'data-icon': 'msg-check', text: '✓'})));
+}
+
+renderLogin();
+</script>
+</body>
+</html>
+"""
+
+
+class FakeWhatsappWebState:
+    def __init__(self, chats, channels, login_delay_ms=0, chat_open_delay_ms=0,
+                 menu_delay_ms=0, upload_delay_ms=0, ack_delay_ms=0, logged_out=False):
+        self.config = {
+            "chats": list(chats),
+            "channels": list(channels),
+            "login_delay_ms": login_delay_ms,
+            "chat_open_delay_ms": chat_open_delay_ms,
+            "menu_delay_ms": menu_delay_ms,
+            "upload_delay_ms": upload_delay_ms,
+            "ack_delay_ms": ack_delay_ms,
+            "logged_out": logged_out,
+        }
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def record(self, item):
+        with self._lock:
+            self.sent.append(dict(item, received_at=time.time()))
+
+    def sent_messages(self):
+        with self._lock:
+            return list(self.sent)
+
+
+def _make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, content_type, data):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.startswith("/api/sent"):
+                return self._reply(200, "application/json", json.dumps(state.sent_messages()).encode("utf-8"))
+            page = PAGE_TEMPLATE.replace("__CONFIG__", json.dumps(state.config))
+            return self._reply(200, "text/html; charset=utf-8", page.encode("utf-8"))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path.startswith("/api/sent"):
+                state.record(json.loads(body or b"{}"))
+                return self._reply(204, "application/json", b"")
+            return self._reply(404, "application/json", b"{}")
+
+    return Handler
+
+
+def start_server(port=0, chats=("testing_group",), channels=("Testing channel",), **delays):
+    """
+    Start the fake page on a background thread.
+
+    Returns:
+        tuple: (server, state, base_url); call server.shutdown() when done
+    """
+    state = FakeWhatsappWebState(chats, channels, **delays)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def _split(names):
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+def add_delay_arguments(parser):
+    parser.add_argument("--login-delay-ms", type=int, default=300)
+    parser.add_argument("--chat-open-delay-ms", type=int, default=150)
+    parser.add_argument("--menu-delay-ms", type=int, default=100)
+    parser.add_argument("--upload-delay-ms", type=int, default=400)
+    parser.add_argument("--ack-delay-ms", type=int, default=300)
+
+
+def delays_from_args(args):
+    return {
+        "login_delay_ms": args.login_delay_ms,
+        "chat_open_delay_ms": args.chat_open_delay_ms,
+        "menu_delay_ms": args.menu_delay_ms,
+        "upload_delay_ms": args.upload_delay_ms,
+        "ack_delay_ms": args.ack_delay_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local fake WhatsApp Web page")
+    parser.add_argument("--port", type=int, default=8598)
+    parser.add_argument("--chats", default="testing_group")
+    parser.add_argument("--channels", default="Testing channel")
+    parser.add_argument("--logged-out", action="store_true", help="Show the QR code instead of logging in")
+    add_delay_arguments(parser)
+    args = parser.parse_args()
+
+    server, state, base_url = start_server(args.port, _split(args.chats), _split(args.channels),
+                                           logged_out=args.logged_out, **delays_from_args(args))
+    print(f"Fake WhatsApp Web on {base_url}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"messages received: {len(state.sent_messages())}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
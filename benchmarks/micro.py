@@ -0,0 +1,366 @@
+"""
+Microbenchmarks for the functions called in tight loops, with checked-in baselines.
+
+Works like pytest-benchmark without the dependency: each benchmark does its
+setup once and returns the call to time; the call is repeated until a round
+takes at least --min-time, and the per-call min / median / mean over
+--rounds rounds are reported. The fastest round is compared with
+benchmarks/baselines/micro.json (--stat median to compare medians), since
+it is the least disturbed by whatever else the machine is doing.
+
+    python -m benchmarks.micro                         # run and print
+    python -m benchmarks.micro --check                 # exit 1 if a benchmark is >25% slower than its baseline
+    python -m benchmarks.micro --check --threshold 0.1 -k format
+    python -m benchmarks.micro --save-baseline         # after an intended change, on the baseline machine
+    python -m benchmarks.micro --check --allow-skipped # don't fail on benchmarks that cannot run here
+
+Baselines are machine-specific: compare runs from the machine that saved them.
+Benchmarks that need MongoDB use --mongo-uri and are skipped when it is not reachable;
+the PA-API one needs paapi5_python_sdk. --check exits 2 when a benchmark has no
+baseline yet or was skipped, since either leaves it unchecked: record baselines
+and check where all of them run.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+BENCHMARKS = {}
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when it cannot run here (missing package or database)."""
+
+
+def benchmark(name):
+    """Register a setup function that returns the zero-argument callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def sample_products(count=1000, seed=0):
+    from benchmarks.synthetic_catalog import make_products
+    return make_products(count, seed=seed)
+
+
+@benchmark("format_product_message")
+def bench_format_product_message(context):
+    from notification_publisher import NotificationPublisher
+
+    publisher = NotificationPublisher.__new__(NotificationPublisher)  # the formatter reads no config
+    product = sample_products(1)[0]
+    return lambda: publisher.format_product_message(product)
+
+
+@benchmark("paapi_item_extraction")
+def bench_paapi_item_extraction(context):
+    try:
+        import monitors.amazon_monitor as amazon_monitor
+    except ImportError as e:
+        raise Skip(f"needs {e.name}")
+    from benchmarks.fake_paapi import FakePaapiApi
+
+    products = sample_products(10)
+    api = FakePaapiApi(products, change_rate=0)
+    monitor = amazon_monitor.AmazonIndiaMonitor.__new__(amazon_monitor.AmazonIndiaMonitor)
+    monitor.access_key, monitor.secret_key, monitor.partner_tag = "bench-access-key", "bench-secret-key", "bench-21"
+    monitor.host, monitor.region = "webservices.amazon.in", "eu-west-1"
+    ids = [p["Product_unique_ID"] for p in products]
+
+    def call():
+        # One PA-API batch of 10 items; no images, and the rate-limit sleep is skipped
+        with mock.patch.object(amazon_monitor, "DefaultApi", lambda **kwargs: api), \
+                mock.patch.object(amazon_monitor, "time", SimpleNamespace(sleep=lambda seconds: None)):
+            return monitor.fetch_product_data(ids)
+    return call
+
+
+@benchmark("parse_datetime_x1000")
+def bench_parse_datetime(context):
+    from ui.product_page import ProductPage
+
+    page = ProductPage.__new__(ProductPage)  # parse_datetime reads no page state
+    now = datetime(2026, 1, 1)
+    values = []
+    for i in range(1000):
+        moment = now - timedelta(minutes=37 * i)
+        values.append(moment.strftime("%Y-%m-%d %H:%M:%S") if i % 4 else moment.strftime("%Y-%m-%d"))
+    values[::50] = [None] * len(values[::50])
+    return lambda: [page.parse_datetime(value) for value in values]
+
+
+@benchmark("get_products_for_notification_10k")
+def bench_get_products_for_notification(context):
+    from utils.monitor_utils import get_products_for_notification
+
+    data_manager = context.data_manager(10000)
+    return lambda: get_products_for_notification(data_manager)
+
+
+@benchmark("auto_publish_eligibility_10k")
+def bench_auto_publish_eligibility(context):
+    from auto_publish_engine import AutoPublishEngine, AutoPublishResult
+
+    # The engine's default evaluator: one Mongo aggregation, as every automatic run does it
+    engine = AutoPublishEngine(None, db=context.data_manager(10000), log_dir=tempfile.mkdtemp(prefix="bench_logs_"))
+    auto_config = {"channel_budgets": {"WhatsApp": 20}, "category_weights": {}}
+
+    def call():
+        result = AutoPublishResult()
+        eligible = engine.filter_eligible({}, result, None)
+        return engine.select_deals(eligible, ["Telegram", "WhatsApp"], auto_config, result)
+    return call
+
+
+@benchmark("auto_publish_eligibility_vectorized_10k")
+def bench_auto_publish_eligibility_vectorized(context):
+    # utils.eligibility over in-memory columns, as Hands-Off mode and --evaluator vectorized use it
+    from benchmarks.eligibility_vectorized import make_catalog
+    from utils.deal_scoring import plan_channel_budgets
+    from utils.eligibility import evaluate_products
+
+    now = datetime(2026, 1, 1)
+    products, history = make_catalog(10000, now=now)
+
+    def call():
+        frame = evaluate_products(products, history, {}, now)
+        eligible = [p for p, ok in zip(products, frame["eligible"].to_numpy()) if ok]
+        return plan_channel_budgets(eligible, ["Telegram", "WhatsApp"], {"WhatsApp": 20})
+    return call
+
+
+@benchmark("ensure_valid_buybox_prices_10k")
+def bench_ensure_valid_buybox_prices(context):
+    data_manager = context.data_manager(10000)
+    data_manager.repair_buybox_prices()
+    # Steady state: the scan that finds nothing left to repair, as on every run after the first
+    return data_manager.repair_buybox_prices
+
+
+@benchmark("parse_telegram_channels")
+def bench_parse_telegram_channels(context):
+    from notification_publisher import parse_telegram_channels
+
+    config = {
+        "telegram_channels": ["deals_india, @loot_offers", "-1001234567890", "@deals_india", "tech_deals"],
+        "telegram_chat_id": "-1009876543210",
+    }
+    return lambda: parse_telegram_channels(config)
+
+
+class Context:
+    """Shared, lazily built resources: seeded MongoDB catalogs by size."""
+
+    def __init__(self, mongo_uri, db_name):
+        self.mongo_uri = mongo_uri
+        self.db_name = db_name
+        self._client = None
+        self._seeded = {}
+        self._unavailable = None
+
+    def data_manager(self, size):
+        from pymongo.errors import PyMongoError
+
+        from benchmarks.synthetic_catalog import bench_data_manager, connect, seed_catalog
+
+        if self._unavailable:
+            raise Skip(self._unavailable)
+        if size not in self._seeded:
+            try:
+                if self._client is None:
+                    self._client, _, _ = connect(self.mongo_uri, self.db_name, serverSelectionTimeoutMS=2000)
+                    self._client.admin.command("ping")
+                database = self._client[f"{self.db_name}_{size}"]
+                seed_catalog(database, size)
+            except PyMongoError as e:
+                self._client = None
+                self._unavailable = f"needs MongoDB at {self.mongo_uri} ({type(e).__name__})"
+                raise Skip(self._unavailable)
+            self._seeded[size] = bench_data_manager(database)
+        return self._seeded[size]
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+def time_call(func, rounds=7, min_time=0.05):
+    """
+    Returns:
+        dict: min_s, median_s, mean_s, stdev_s per call, loops per round, rounds, ops_per_s
+    """
+    func()  # warm-up: imports, caches, connections
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    timings = [elapsed / loops]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    median = statistics.median(timings)
+    return {
+        "min_s": min(timings),
+        "median_s": median,
+        "mean_s": statistics.mean(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "loops": loops,
+        "rounds": rounds,
+        "ops_per_s": 1 / median if median else None,
+    }
+
+
+def run(selected, rounds, min_time, mongo_uri, db_name):
+    context = Context(mongo_uri, db_name)
+    results = {}
+    try:
+        for name in selected:
+            try:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    results[name] = time_call(BENCHMARKS[name](context), rounds, min_time)
+            except Skip as e:
+                results[name] = {"skipped": str(e)}
+            print(_format_row(name, results[name]))
+    finally:
+        context.close()
+    return results
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def _format_row(name, result):
+    if "skipped" in result:
+        return f"{name:<40} skipped: {result['skipped']}"
+    return (f"{name:<40} median {_format_time(result['median_s']):>9}  min {_format_time(result['min_s']):>9}  "
+            f"±{_format_time(result['stdev_s']):>9}  ({result['loops']} loops x {result['rounds']})")
+
+
+def check(results, baseline, threshold, stat="min_s"):
+    """
+    Compare one statistic (min_s or median_s) with the baseline.
+
+    Returns:
+        tuple: (regressions, missing, skipped) - names of benchmarks slower than baseline by more
+               than threshold (0.25 = 25%), that ran but have no baseline, and that did not run
+    """
+    regressions, missing, skipped = [], [], []
+    print(f"\n{'benchmark':<40}{'baseline':>11}{'now':>11}{'change':>9}")
+    for name, result in results.items():
+        old = baseline.get("benchmarks", {}).get(name, {})
+        if "skipped" in result or stat not in old:
+            (skipped if "skipped" in result else missing).append(name)
+            status = "skipped" if "skipped" in result else "no baseline"
+            print(f"{name:<40}{status:>31}")
+            continue
+        change = (result[stat] - old[stat]) / old[stat]
+        flag = "  ⚠️ slower" if change > threshold else ""
+        print(f"{name:<40}{_format_time(old[stat]):>11}{_format_time(result[stat]):>11}"
+              f"{change * 100:>+8.0f}%{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions, missing, skipped
+
+
+def machine_info():
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "processor": platform.processor(), "cpus": os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run microbenchmarks and compare them with the checked-in baseline")
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per round")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a benchmark regressed beyond --threshold")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown, as a fraction of the baseline")
+    parser.add_argument("--stat", choices=["min", "median"], default="min", help="Statistic compared by --check")
+    parser.add_argument("--allow-skipped", action="store_true",
+                        help="With --check, only warn when a benchmark was skipped (missing MongoDB or package)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/")
+    parser.add_argument("--db-name", default="affiliate_bench_micro")
+    parser.add_argument("--label", help="Also save the results as bench_results/micro_<label>.json")
+    parser.add_argument("--output-dir", default="bench_results")
+    args = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if not args.keyword or args.keyword in name]
+    if not selected:
+        parser.error(f"No benchmark matches {args.keyword!r}; available: {', '.join(BENCHMARKS)}")
+
+    results = run(selected, args.rounds, args.min_time, args.mongo_uri, args.db_name)
+    output = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": machine_info(),
+        "benchmarks": results,
+    }
+
+    if args.label:
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_path = os.path.join(args.output_dir, f"micro_{args.label}.json")
+        with open(output_path, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"Results saved to {output_path}")
+
+    if args.save_baseline:
+        baseline = {"benchmarks": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Keep entries of benchmarks that were filtered out or skipped on this run
+        baseline["benchmarks"].update({name: result for name, result in results.items() if "skipped" not in result})
+        baseline.update({"timestamp": output["timestamp"], "machine": output["machine"]})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(2)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("machine", {}).get("platform") != output["machine"]["platform"]:
+            print(f"⚠️ Baseline was recorded on {baseline.get('machine', {}).get('platform')}; timings may not compare")
+        regressions, missing, skipped = check(results, baseline, args.threshold, f"{args.stat}_s")
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) more than {args.threshold:.0%} slower than baseline: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        if missing:
+            print(f"\n❌ No baseline for {', '.join(missing)}; record it with --save-baseline on the baseline machine")
+            sys.exit(2)
+        if skipped:
+            print(f"\n{'⚠️' if args.allow_skipped else '❌'} Not checked, could not run here: {', '.join(skipped)}")
+            if not args.allow_skipped:
+                sys.exit(2)
+        print(f"\n✅ No checked benchmark more than {args.threshold:.0%} slower than baseline")
+
+
+if __name__ == "__main__":
+    main()
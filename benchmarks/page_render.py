@@ -0,0 +1,199 @@
+"""
+Render benchmark for the Streamlit pages on seeded catalogs of increasing size.
+
+Each page is run headless with Streamlit's AppTest against a synthetic
+catalog (benchmarks/synthetic_catalog.py): a first run, then --reruns
+reruns, which is what every widget interaction costs. Per page and size it
+records script-run time, the MongoDB commands issued and peak Python memory
+(tracemalloc, measured on an extra rerun so it does not slow the timed ones).
+
+    python -m benchmarks.page_render --sizes 1000 2000 5000 10000 --label after
+    python -m benchmarks.page_render --pages dashboard view_products --sizes 20000
+    python -m benchmarks.page_render --compare bench_results/page_render_before.json bench_results/page_render_after.json
+
+Pages whose imports are not installed (e.g. the PA-API SDK for the monitor page) are reported as skipped.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+from pymongo import monitoring
+
+from benchmarks.synthetic_catalog import CommandCounter, connect, seed_catalog
+
+DEFAULT_SIZES = [1000, 2000, 5000, 10000]
+
+
+def use_bench_database():
+    """Called first by every page script: DataManagers created by the page use the seeded catalog."""
+    import streamlit as st
+
+    import db.db_manager as db_manager
+
+    settings = st.session_state["render_bench"]
+    db_manager.MONGO_URI = settings["mongo_uri"]
+    db_manager.DB_NAME = settings["db_name"]
+
+
+def dashboard_script():
+    from benchmarks.page_render import use_bench_database
+    use_bench_database()
+
+    from ui.dashboard_page import DashboardPage
+    DashboardPage().render()
+
+
+def view_products_script():
+    from benchmarks.page_render import use_bench_database
+    use_bench_database()
+
+    from ui.config_page import ConfigPage
+    from ui.product_page import ProductPage
+    ProductPage(ConfigPage().load_config()).render_view_products()
+
+
+def manual_publish_script():
+    from benchmarks.page_render import use_bench_database
+    use_bench_database()
+
+    from config_manager import ConfigManager
+    from ui.publish_page import PublishPage
+    PublishPage(ConfigManager()).render_manual_publish()
+
+
+def product_monitor_script():
+    from benchmarks.page_render import use_bench_database
+    use_bench_database()
+
+    from ui.monitor_page import ProductMonitorPage
+    ProductMonitorPage().render()
+
+
+PAGES = {
+    "dashboard": dashboard_script,
+    "view_products": view_products_script,
+    "manual_publish": manual_publish_script,
+    "product_monitor": product_monitor_script,
+}
+
+
+def render_page(script, settings, counter, reruns, timeout):
+    """
+    Returns:
+        dict: first_run_s, rerun_median_s, rerun_max_s, mongo_commands (first run, per rerun),
+              peak_python_mb and any exception the script raised
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_function(script, default_timeout=timeout)
+    app.session_state["render_bench"] = settings
+
+    def timed_run():
+        snapshot = counter.snapshot()
+        started = time.perf_counter()
+        app.run()
+        return time.perf_counter() - started, counter.since(snapshot)
+
+    first_s, first_ops = timed_run()
+    if app.exception:
+        messages = [exception.message for exception in app.exception]
+        if any("No module named" in message for message in messages):
+            return {"skipped": "; ".join(messages)}
+        return {"error": "; ".join(messages), "first_run_s": round(first_s, 3)}
+
+    rerun_times, rerun_ops = [], {}
+    for _ in range(reruns):
+        seconds, rerun_ops = timed_run()
+        rerun_times.append(seconds)
+
+    tracemalloc.start()
+    try:
+        app.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "first_run_s": round(first_s, 3),
+        "rerun_median_s": round(statistics.median(rerun_times), 3) if rerun_times else None,
+        "rerun_max_s": round(max(rerun_times), 3) if rerun_times else None,
+        "mongo_commands_first_run": first_ops,
+        "mongo_commands_per_rerun": rerun_ops,
+        "mongo_commands_per_rerun_total": sum(rerun_ops.values()),
+        "peak_python_mb": round(peak / 1024 / 1024, 1),
+    }
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'size':>7} {'page':<16}{'rerun before':>14}{'rerun after':>13}{'change':>9}{'queries':>9}{'peak MB':>9}")
+    for size, pages in after["sizes"].items():
+        for page, new in pages.items():
+            old = before["sizes"].get(size, {}).get(page, {})
+            if not old.get("rerun_median_s") or not new.get("rerun_median_s"):
+                continue
+            change = (new["rerun_median_s"] - old["rerun_median_s"]) / old["rerun_median_s"]
+            print(f"{size:>7} {page:<16}{old['rerun_median_s']:>14.3f}{new['rerun_median_s']:>13.3f}{change * 100:>+8.0f}%"
+                  f"{new['mongo_commands_per_rerun_total']:>9}{new['peak_python_mb']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Streamlit page renders on seeded catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds allowed per script run")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/")
+    parser.add_argument("--db-name", default="affiliate_bench_render", help="Reseeded for every size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="run", help="Name used for the result file")
+    parser.add_argument("--output-dir", default="bench_results")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Registered before any client exists, so the pages' own clients are counted too
+    counter = CommandCounter()
+    monitoring.register(counter)
+    seed_client, database, _ = connect(args.mongo_uri, args.db_name)
+    settings = {"mongo_uri": args.mongo_uri, "db_name": args.db_name}
+
+    result = {"label": args.label, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+              "reruns": args.reruns, "sizes": {}}
+    try:
+        for size in args.sizes:
+            print(f"[{size}] Seeding catalog...")
+            seed_catalog(database, size, seed=args.seed)
+            result["sizes"][str(size)] = pages = {}
+            for page in args.pages:
+                pages[page] = render_page(PAGES[page], settings, counter, args.reruns, args.timeout)
+                outcome = pages[page]
+                if "skipped" in outcome or "error" in outcome:
+                    print(f"[{size}] {page:<16} {'skipped' if 'skipped' in outcome else 'error'}: "
+                          f"{outcome.get('skipped') or outcome.get('error')}")
+                    continue
+                print(f"[{size}] {page:<16} first {outcome['first_run_s']:.3f}s  rerun {outcome['rerun_median_s']:.3f}s  "
+                      f"{outcome['mongo_commands_per_rerun_total']} Mongo commands/rerun  "
+                      f"peak {outcome['peak_python_mb']}MB")
+    finally:
+        seed_client.close()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"page_render_{args.label}.json")
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Scaling benchmark for the monitor -> filter -> publish pipeline on synthetic
+catalogs in a local mongod (see benchmarks/synthetic_catalog.py).
+
+For each catalog size it runs three stages against local stand-ins:
+    refresh      AmazonIndiaMonitor.fetch_product_data + update_product_data on a
+                 sample of products, against FakePaapiApi
+    eligibility  AutoPublishEngine.filter_eligible + select_deals over the whole catalog
+    publish      PublishService.publish_many to Telegram (FakeTelegramAdapter) and a
+                 WhatsApp group (benchmarks/fake_cloud_api.py)
+and reports throughput, p50/p99 latency, peak RSS and MongoDB command counts
+per stage. Each size uses its own database, affiliate_bench_<size>.
+
+    python -m benchmarks.pipeline_scaling --sizes 1000 10000 100000 1000000 --label after
+    python -m benchmarks.pipeline_scaling --sizes 100000 --skip-seed --evaluator vectorized --label vectorized
+    python -m benchmarks.pipeline_scaling --compare bench_results/pipeline_before.json bench_results/pipeline_after.json
+
+Stage output is muted unless --verbose; the PA-API rate-limit sleep is skipped.
+"""
+import argparse
+import configparser
+import contextlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from benchmarks.fake_cloud_api import start_server
+from benchmarks.fake_paapi import FakePaapiApi
+from benchmarks.fake_telegram_api import FakeTelegramAdapter
+from benchmarks.synthetic_catalog import RssSampler, bench_data_manager, connect, seed_catalog
+from benchmarks.whatsapp_send_latency import _percentile
+from config_manager import ConfigManager
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+WHATSAPP_GROUP = "Bench group"
+TELEGRAM_CHAT = "@bench_deals"
+
+
+class BenchConfigManager(ConfigManager):
+    """Credentials and recipients for the stand-ins, without reading config.ini or config.json."""
+
+    def __init__(self, whatsapp_api_base):
+        self.config_file = None
+        self.config = configparser.ConfigParser()
+        self.json_config = {"whatsapp": {
+            "group_names": WHATSAPP_GROUP,
+            "channel_names": "",
+            "cloud_api": {
+                "access_token": "test-token",
+                "phone_number_id": "100000000000001",
+                "api_base": whatsapp_api_base,
+                "recipients": {WHATSAPP_GROUP: "120363000000000001@g.us"},
+            },
+        }}
+
+    def get_amazon_config(self):
+        return {"access_key": "bench-access-key", "secret_key": "bench-secret-key", "partner_tag": "bench-21"}
+
+    def get_telegram_config(self):
+        return {"bot_token": "bench-token", "channel_ids": {"bench": TELEGRAM_CHAT}}
+
+
+def latency_summary(latencies):
+    return {
+        "count": len(latencies),
+        "p50_s": _percentile(latencies, 50),
+        "p99_s": _percentile(latencies, 99),
+        "max_s": max(latencies) if latencies else None,
+    }
+
+
+def measure(counter, func, verbose=False):
+    """
+    Run one stage. func returns (items processed, per-item or per-call latencies in seconds, extra fields).
+
+    Returns:
+        dict: items, seconds, throughput_per_s, latency, peak_rss_mb, mongo_ops, mongo_ops_total
+    """
+    snapshot = counter.snapshot()
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        memory = stack.enter_context(RssSampler())
+        started = time.perf_counter()
+        items, latencies, extra = func()
+        seconds = time.perf_counter() - started
+    ops = counter.since(snapshot)
+    return {
+        "items": items,
+        "seconds": round(seconds, 3),
+        "throughput_per_s": round(items / seconds, 1) if seconds else None,
+        "latency": latency_summary(latencies),
+        "peak_rss_mb": memory.peak_mb,
+        "mongo_ops": ops,
+        "mongo_ops_total": sum(ops.values()),
+        **extra,
+    }
+
+
+def refresh_stage(data_manager, api, sample_ids):
+    """fetch_product_data + update_product_data per PA-API batch of 10, as AmazonIndiaMonitor.run does."""
+    import monitors.amazon_monitor as amazon_monitor
+
+    monitor = amazon_monitor.AmazonIndiaMonitor.__new__(amazon_monitor.AmazonIndiaMonitor)
+    monitor.db = data_manager
+    monitor.temp_image_folder = tempfile.mkdtemp(prefix="bench_images_")
+    monitor.access_key, monitor.secret_key, monitor.partner_tag = "bench-access-key", "bench-secret-key", "bench-21"
+    monitor.host, monitor.region = "webservices.amazon.in", "eu-west-1"
+
+    def run():
+        latencies = []
+        with mock.patch.object(amazon_monitor, "DefaultApi", lambda **kwargs: api), \
+                mock.patch.object(amazon_monitor, "time", SimpleNamespace(sleep=lambda seconds: None)):
+            for i in range(0, len(sample_ids), 10):
+                started = time.perf_counter()
+                monitor.update_product_data(monitor.fetch_product_data(sample_ids[i:i + 10]))
+                latencies.append(time.perf_counter() - started)
+        return len(sample_ids), latencies, {"paapi_calls": api.calls}
+    return run
+
+
+def eligibility_stage(engine, repeat, holder):
+    """filter_eligible + select_deals over the whole catalog, `repeat` times."""
+    from auto_publish_engine import AutoPublishResult
+
+    def run():
+        latencies = []
+        auto_config = {"channel_budgets": {}, "category_weights": {}}
+        for _ in range(repeat):
+            result = AutoPublishResult()
+            started = time.perf_counter()
+            eligible = engine.filter_eligible({}, result, None)
+            plan, _ = engine.select_deals(eligible, ["Telegram", "WhatsApp"], auto_config, result)
+            latencies.append(time.perf_counter() - started)
+            holder["eligible"] = [product for _, group in plan for product in group]
+            holder["checked"] = result.products_checked
+        return holder["checked"] * repeat, latencies, {"eligible": len(holder["eligible"]), "runs": repeat}
+    return run
+
+
+def publish_stage(service, telegram, holder, count):
+    """PublishService.publish_many of the best `count` eligible products to Telegram and WhatsApp."""
+    def run():
+        products = holder.get("eligible", [])[:count]
+        results = service.publish_many(products, ["Telegram", "WhatsApp"], source="benchmark", republish=True)
+        jobs = list(service.outbox.collection.find(
+            {"product_id": {"$in": [p.get("Product_unique_ID") for p in products]}, "source": "benchmark"},
+            {"send_seconds": 1, "status": 1}
+        ))
+        latencies = [job["send_seconds"] for job in jobs if job.get("send_seconds") is not None]
+        failed = sum(1 for success, _ in results.values() if not success)
+        return len(jobs), latencies, {"products": len(products), "failed_products": failed,
+                                      "telegram_requests": telegram.sent()}
+    return run
+
+
+def run_size(size, args):
+    from auto_publish_engine import AutoPublishEngine
+    from notification_publisher import NotificationPublisher
+    from publish_service import PublishService
+
+    client, database, counter = connect(args.mongo_uri, f"{args.db_prefix}_{size}")
+    server, cloud_state, api_base = start_server(latency_ms=args.whatsapp_latency_ms)
+    config_manager = BenchConfigManager(api_base)
+    telegram = FakeTelegramAdapter(latency_ms=args.telegram_latency_ms)
+    log_dir = tempfile.mkdtemp(prefix="bench_logs_")
+    result = {"products": size}
+    try:
+        if not args.skip_seed:
+            print(f"[{size}] Seeding catalog...")
+            result["seed"] = seed_catalog(database, size, args.changes_per_product, seed=args.seed)
+        data_manager = bench_data_manager(database)
+        products = list(database["products"].find({}, {"_id": 0, "Product_unique_ID": 1, "Product_current_price": 1,
+                                                        "Product_MRP": 1, "product_name": 1}))
+
+        publisher = NotificationPublisher(config_manager)
+        publisher.get_telegram_channels = lambda: [TELEGRAM_CHAT]
+        publisher.http_session.mount("https://api.telegram.org/", telegram)
+        service = PublishService(config_manager, db=data_manager, notification_publisher=publisher)
+        engine = AutoPublishEngine(config_manager, db=data_manager, notification_publisher=publisher,
+                                   log_dir=log_dir, evaluator=args.evaluator)
+
+        step = max(1, len(products) // max(1, args.refresh_products))
+        sample_ids = [p["Product_unique_ID"] for p in products[::step][:args.refresh_products]]
+        api = FakePaapiApi(products, latency_ms=args.paapi_latency_ms, seed=args.seed)
+        holder = {}
+        stages = [
+            ("refresh", refresh_stage(data_manager, api, sample_ids)),
+            ("eligibility", eligibility_stage(engine, args.repeat, holder)),
+            ("publish", publish_stage(service, telegram, holder, args.publish_products)),
+        ]
+        result["stages"] = {}
+        for name, stage in stages:
+            print(f"[{size}] {name}...")
+            result["stages"][name] = measure(counter, stage, args.verbose)
+        result["whatsapp_messages"] = len(cloud_state.messages)
+        service.close()
+    finally:
+        server.shutdown()
+        client.close()
+    return result
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'size':>9} {'stage':<12}{'before/s':>12}{'after/s':>12}{'change':>9}{'p99 before':>12}{'p99 after':>11}")
+    for size, new in after["sizes"].items():
+        old = before["sizes"].get(size)
+        if not old:
+            continue
+        for stage, new_stage in new["stages"].items():
+            old_stage = old["stages"].get(stage)
+            if not old_stage or not old_stage["throughput_per_s"] or not new_stage["throughput_per_s"]:
+                continue
+            change = (new_stage["throughput_per_s"] - old_stage["throughput_per_s"]) / old_stage["throughput_per_s"]
+            print(f"{size:>9} {stage:<12}{old_stage['throughput_per_s']:>12.1f}{new_stage['throughput_per_s']:>12.1f}"
+                  f"{change * 100:>+8.0f}%{old_stage['latency']['p99_s'] or 0:>12.4f}"
+                  f"{new_stage['latency']['p99_s'] or 0:>11.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the refresh, eligibility and publish stages on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/")
+    parser.add_argument("--db-prefix", default="affiliate_bench")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse catalogs seeded by an earlier run")
+    parser.add_argument("--changes-per-product", type=int, default=4, help="Mean price_history points per product")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--refresh-products", type=int, default=2000, help="Products refreshed from the PA-API stand-in")
+    parser.add_argument("--publish-products", type=int, default=200, help="Eligible products published")
+    parser.add_argument("--repeat", type=int, default=3, help="Eligibility runs per size")
+    parser.add_argument("--evaluator", choices=["aggregation", "vectorized"], default="aggregation")
+    parser.add_argument("--paapi-latency-ms", type=int, default=0)
+    parser.add_argument("--telegram-latency-ms", type=int, default=0)
+    parser.add_argument("--whatsapp-latency-ms", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show the stages' own output")
+    parser.add_argument("--label", default="run", help="Name used for the result file")
+    parser.add_argument("--output-dir", default="bench_results")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    result = {
+        "label": args.label,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "evaluator": args.evaluator,
+        "settings": {key: getattr(args, key) for key in ("refresh_products", "publish_products", "repeat",
+                                                           "paapi_latency_ms", "telegram_latency_ms",
+                                                           "whatsapp_latency_ms", "changes_per_product", "seed")},
+        "sizes": {},
+    }
+    for size in args.sizes:
+        result["sizes"][str(size)] = run_size(size, args)
+        for name, stage in result["sizes"][str(size)]["stages"].items():
+            print(f"[{size}] {name:<12} {stage['throughput_per_s'] or 0:>10.1f}/s  p50 {stage['latency']['p50_s'] or 0:.4f}s  "
+                  f"p99 {stage['latency']['p99_s'] or 0:.4f}s  rss {stage['peak_rss_mb']}MB  "
+                  f"mongo ops {stage['mongo_ops_total']}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"pipeline_{args.label}.json")
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=2, default=str)
+    print(f"Results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
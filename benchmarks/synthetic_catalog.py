@@ -0,0 +1,292 @@
+"""
+Synthetic catalogs for scaling benchmarks, written into a local mongod.
+
+A catalog has products in the shape the Product pages add them, a
+price_history with a few changes per product over the last `days` days,
+and published_products records in the PublishWorker schema for a share of
+the products. Everything is generated with NumPy from a seed, so the same
+size and seed always give the same catalog.
+
+    python -m benchmarks.synthetic_catalog --products 100000 --db-name affiliate_bench_100k
+
+Also has the helpers benchmarks share: a DataManager pointed at another
+database, and a command listener that counts MongoDB operations.
+"""
+import argparse
+import resource
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+from pymongo import ASCENDING, MongoClient, monitoring
+
+CATEGORIES = {
+    "Electronics": ["Headphones", "Chargers", "Smart Watches", "Speakers"],
+    "Home & Kitchen": ["Cookware", "Storage", "Appliances"],
+    "Fashion": ["Shoes", "Watches", "Bags"],
+    "Books": ["Fiction", "Non-fiction"],
+    "Beauty": ["Skincare", "Grooming"],
+}
+WORDS = ["Pro", "Max", "Lite", "Plus", "Wireless", "Smart", "Classic", "Ultra", "Mini", "Prime"]
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts the MongoDB commands a client issues, by command name."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self.counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.counts)
+
+    def since(self, snapshot):
+        """Commands issued since snapshot, e.g. {"find": 3, "update": 1000}."""
+        return dict(self.snapshot() - snapshot)
+
+
+class RssSampler:
+    """Peak resident memory of this process while the block runs, sampled every interval."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current_rss():
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss
+        except ImportError:
+            # ru_maxrss is in KiB on Linux: the process-wide high-water mark, not per block
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_bytes = self.current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current_rss())
+
+    @property
+    def peak_mb(self):
+        return round(self.peak_bytes / 1024 / 1024, 1)
+
+
+def connect(mongo_uri, db_name, **client_options):
+    """
+    Args:
+        client_options: Extra MongoClient options, e.g. serverSelectionTimeoutMS
+
+    Returns:
+        tuple: (client, database, CommandCounter) - the counter sees every command of the client
+    """
+    counter = CommandCounter()
+    client = MongoClient(mongo_uri, event_listeners=[counter], **client_options)
+    return client, client[db_name], counter
+
+
+def bench_data_manager(database):
+    """A DataManager whose collections live in `database` instead of the configured one."""
+    from db.db_manager import DataManager
+
+    data_manager = DataManager()
+    data_manager.client.close()
+    data_manager.client = database.client
+    data_manager.db = database
+    data_manager.products = database["products"]
+    data_manager.price_history = database.price_history
+    data_manager.published_products = database["published_products"]
+    return data_manager
+
+
+def asins(count, offset=0):
+    return [f"B0{i:08d}" for i in range(offset, offset + count)]
+
+
+def make_products(count, seed=0, now=None):
+    """
+    Returns:
+        list: Product documents; about 40% are below their Buy Box price
+    """
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now()
+    current = np.round(rng.lognormal(7, 1, count).clip(99, 200000))
+    buy_box = np.round(current * rng.uniform(0.85, 1.3, count))
+    mrp = np.round(np.maximum(current, buy_box) * rng.uniform(1.05, 2.5, count))
+    majors = list(CATEGORIES)
+    major_index = rng.integers(0, len(majors), count)
+    minor_pick = rng.integers(0, 1000, count)
+    name_words = rng.integers(0, len(WORDS), (count, 2))
+    updated = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    products = []
+    for i, product_id in enumerate(asins(count)):
+        major = majors[major_index[i]]
+        minors = CATEGORIES[major]
+        products.append({
+            "s_no": i + 1,
+            "product_name": f"{minors[minor_pick[i] % len(minors)]} {WORDS[name_words[i, 0]]} "
+                            f"{WORDS[name_words[i, 1]]} {product_id[-5:]}",
+            "Product_unique_ID": product_id,
+            "product_Affiliate_site": "amazon",
+            "product_Affiliate_url": f"https://www.amazon.in/dp/{product_id}?tag=bench-21",
+            "product_major_category": major,
+            "product_minor_category": minors[minor_pick[i] % len(minors)],
+            "Product_Buy_box_price": float(buy_box[i]),
+            "Product_current_price": float(current[i]),
+            "Product_MRP": float(mrp[i]),
+            "Product_lowest_price": float(current[i]),
+            "Product_image_path": None,
+            "Publish": False,
+            "Publish_time": None,
+            "updated_date": updated,
+        })
+    return products
+
+
+def iter_price_history(products, changes_per_product=4, days=30, seed=0, now=None, chunk=50000):
+    """
+    Price changes for each product over the last `days` days, ending at its current prices.
+
+    Yields:
+        list: price_history documents, `chunk` products at a time
+    """
+    rng = np.random.default_rng(seed + 1)
+    now = now or datetime.now()
+    for start in range(0, len(products), chunk):
+        batch = products[start:start + chunk]
+        counts = rng.poisson(changes_per_product, len(batch))
+        owners = np.repeat(np.arange(len(batch)), counts)
+        ages = rng.integers(0, days * 24 * 3600, len(owners))
+        drift = rng.uniform(0.8, 1.2, len(owners))
+        documents = []
+        for owner, age, factor in zip(owners, ages, drift):
+            product = batch[owner]
+            documents.append({
+                "product_id": product["Product_unique_ID"],
+                "price": round(product["Product_current_price"] * factor),
+                "buy_box_price": product["Product_Buy_box_price"],
+                "mrp": product["Product_MRP"],
+                "timestamp": now - timedelta(seconds=int(age)),
+            })
+        yield documents
+
+
+def iter_publications(products, published_share=0.6, publications_per_product=3, days=30, seed=0, now=None,
+                      chunk=50000):
+    """
+    Past publications of a share of the products, as PublishWorker records them.
+
+    Yields:
+        list: published_products documents, `chunk` products at a time
+    """
+    rng = np.random.default_rng(seed + 2)
+    now = now or datetime.now()
+    for start in range(0, len(products), chunk):
+        batch = products[start:start + chunk]
+        published = np.flatnonzero(rng.random(len(batch)) < published_share)
+        counts = rng.integers(1, publications_per_product + 1, len(published))
+        owners = np.repeat(published, counts)
+        ages = rng.integers(3600, days * 24 * 3600, len(owners))
+        factors = rng.uniform(0.85, 1.25, len(owners))
+        whatsapp = rng.random(len(owners)) < 0.5
+        documents = []
+        for owner, age, factor, to_whatsapp in zip(owners, ages, factors, whatsapp):
+            product = batch[owner]
+            published_date = now - timedelta(seconds=int(age))
+            channels = ["Telegram", "WhatsApp group: Bench group"] if to_whatsapp else ["Telegram"]
+            documents.append({
+                "group_id": f"bench-{start + owner}-{age}",
+                "product_id": product["Product_unique_ID"],
+                "product_name": product["product_name"],
+                "product_price": round(product["Product_current_price"] * factor),
+                "published_date": published_date,
+                "message": None,
+                "channels": channels,
+            })
+        yield documents
+
+
+def seed_catalog(database, products, changes_per_product=4, published_share=0.6, days=30, seed=0,
+                 batch_size=10000):
+    """
+    Replace the products, price_history and published_products of `database` with a synthetic catalog.
+
+    Returns:
+        dict: Document counts and seconds taken
+    """
+    started = time.perf_counter()
+    now = datetime.now()
+    for name in ("products", "price_history", "published_products", "publish_jobs"):
+        database.drop_collection(name)
+
+    documents = make_products(products, seed=seed, now=now)
+    counts = {"products": 0, "price_history": 0, "published_products": 0}
+    for i in range(0, len(documents), batch_size):
+        database["products"].insert_many(documents[i:i + batch_size], ordered=False)
+    counts["products"] = len(documents)
+    for chunk in iter_price_history(documents, changes_per_product, days, seed, now):
+        for i in range(0, len(chunk), batch_size):
+            database["price_history"].insert_many(chunk[i:i + batch_size], ordered=False)
+        counts["price_history"] += len(chunk)
+    for chunk in iter_publications(documents, published_share, days=days, seed=seed, now=now):
+        for i in range(0, len(chunk), batch_size):
+            database["published_products"].insert_many(chunk[i:i + batch_size], ordered=False)
+        counts["published_products"] += len(chunk)
+
+    # The indexes the app creates for itself
+    database["products"].create_index([("Product_unique_ID", ASCENDING)])
+    database["price_history"].create_index([("product_id", ASCENDING), ("timestamp", ASCENDING)])
+    database["published_products"].create_index([("product_id", ASCENDING), ("published_date", -1)])
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic catalog into a local MongoDB")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/")
+    parser.add_argument("--db-name", default="affiliate_bench")
+    parser.add_argument("--changes-per-product", type=int, default=4)
+    parser.add_argument("--published-share", type=float, default=0.6)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client, database, _ = connect(args.mongo_uri, args.db_name)
+    try:
+        counts = seed_catalog(database, args.products, args.changes_per_product, args.published_share,
+                              args.days, args.seed)
+    finally:
+        client.close()
+    print(f"Seeded {args.db_name}: {counts['products']} products, {counts['price_history']} price changes, "
+          f"{counts['published_products']} publications in {counts['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
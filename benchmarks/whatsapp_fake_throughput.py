@@ -0,0 +1,129 @@
+"""
+Headless throughput benchmark for the real WhatsappSender against the local
+fake WhatsApp Web page (benchmarks/fake_whatsapp_web.py).
+
+Sends a mix of text and image messages to a group and a channel, checks that
+the fake page received exactly the expected text, and reports messages/minute.
+Needs Microsoft Edge and msedgedriver, but no WhatsApp account.
+
+    python -m benchmarks.whatsapp_fake_throughput --count 20 --label after
+    python -m benchmarks.whatsapp_fake_throughput --count 20 --batch --upload-delay-ms 800
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.fake_whatsapp_web import add_delay_arguments, delays_from_args, start_server
+from benchmarks.whatsapp_send_latency import summarize
+
+GROUP = "testing_group"
+CHANNEL = "Testing channel"
+
+# A tiny valid PNG, so the image path needs no external files
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def build_messages(count, image_path, image_every):
+    messages = []
+    for i in range(count):
+        text = (f"*Deal {i + 1}* 🔥 Fake benchmark product\n"
+                f"💰 Deal Price: ₹{999 + i}\n"
+                f"🔗 https://example.com/dp/B{i:09d}")
+        use_image = image_every and (i % image_every == 0)
+        messages.append({"message": text, "image_path": image_path if use_image else None})
+    return messages
+
+
+def run(count, batch=False, image_every=3, delays=None):
+    from utils.whatsapp_sender import WhatsappSender
+
+    server, state, base_url = start_server(chats=[GROUP], channels=[CHANNEL], **(delays or {}))
+    image_file = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+    image_file.write(PNG_BYTES)
+    image_file.close()
+
+    sender = WhatsappSender("fake_web_bench", headless=True, base_url=base_url)
+    latencies, failures = [], []
+    expected = []
+    try:
+        started = time.perf_counter()
+        for recipient, is_channel in [(GROUP, False), (CHANNEL, True)]:
+            messages = build_messages(count, image_file.name, image_every)
+            expected.extend((recipient, item["message"]) for item in messages)
+            if batch:
+                batch_started = time.perf_counter()
+                results = sender.send_batch(recipient, messages, is_channel)
+                per_message = (time.perf_counter() - batch_started) / max(len(messages), 1)
+                latencies.extend([per_message] * len(messages))
+                failures.extend(status for success, status in results if not success)
+            else:
+                for item in messages:
+                    message_started = time.perf_counter()
+                    success, status = sender.send_message(recipient, item["message"], item["image_path"], is_channel)
+                    latencies.append(time.perf_counter() - message_started)
+                    if not success:
+                        failures.append(status)
+        elapsed = time.perf_counter() - started
+        # Give the page a moment to post the last message back
+        time.sleep(0.5)
+        received = [(item["chat"], item["text"]) for item in state.sent_messages()]
+    finally:
+        sender.close()
+        server.shutdown()
+        os.remove(image_file.name)
+
+    mismatches = [{"expected": e, "received": r} for e, r in zip(expected, received) if e != r]
+    if len(received) != len(expected):
+        mismatches.append({"expected_count": len(expected), "received_count": len(received)})
+
+    sent = len(expected) - len(failures)
+    return {
+        "messages": len(expected),
+        "sent": sent,
+        "failures": failures,
+        "text_mismatches": mismatches,
+        "elapsed_s": elapsed,
+        "messages_per_minute": sent / elapsed * 60 if elapsed else None,
+        "latency": summarize(latencies),
+        "phase_timings": sender.pop_timing_records(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WhatsappSender against a local fake WhatsApp Web")
+    parser.add_argument("--count", type=int, default=10, help="Messages per recipient")
+    parser.add_argument("--batch", action="store_true", help="Use send_batch instead of send_message")
+    parser.add_argument("--image-every", type=int, default=3, help="Attach an image to every Nth message (0 = never)")
+    parser.add_argument("--label", default="run", help="Name used for the result file")
+    parser.add_argument("--output-dir", default="bench_results")
+    add_delay_arguments(parser)
+    args = parser.parse_args()
+
+    result = run(args.count, args.batch, args.image_every, delays_from_args(args))
+    result.update({
+        "label": args.label,
+        "batch": args.batch,
+        "delays": delays_from_args(args),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"whatsapp_fake_{args.label}.json")
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=2, default=str)
+
+    print(f"{result['sent']}/{result['messages']} sent in {result['elapsed_s']:.1f}s "
+          f"-> {result['messages_per_minute']:.1f} messages/minute")
+    if result["text_mismatches"]:
+        print(f"⚠️ {len(result['text_mismatches'])} rendered text mismatches, see {output_path}")
+    print(f"Results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
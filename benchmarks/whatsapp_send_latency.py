@@ -0,0 +1,126 @@
+"""
+Per-message latency benchmark for WhatsappSender.send_message.
+
+Run it once on the old code and once on the new code with different labels,
+then compare the two result files:
+
+    python -m benchmarks.whatsapp_send_latency --recipient "testing_group" --count 5 --label before
+    python -m benchmarks.whatsapp_send_latency --recipient "testing_group" --count 5 --label after
+    python -m benchmarks.whatsapp_send_latency --compare bench_results/whatsapp_before.json bench_results/whatsapp_after.json
+
+The first send of a run includes driver start-up and login, so it is reported
+separately from the steady-state sends.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(latencies, text_entry=None):
+    """Summarize a list of per-message latencies in seconds."""
+    steady = latencies[1:] if len(latencies) > 1 else latencies
+    entry_times = [entry["seconds"] for entry in (text_entry or []) if entry.get("seconds") is not None]
+    return {
+        "count": len(latencies),
+        "first_message_s": latencies[0] if latencies else None,
+        "mean_s": statistics.mean(steady) if steady else None,
+        "p50_s": _percentile(steady, 50),
+        "p95_s": _percentile(steady, 95),
+        "max_s": max(steady) if steady else None,
+        "text_entry_mean_s": statistics.mean(entry_times) if entry_times else None,
+        "text_entry_p95_s": _percentile(entry_times, 95),
+    }
+
+
+def run(recipient, count, is_channel=False, image_path=None):
+    from utils.whatsapp_sender import WhatsappSender
+
+    sender = WhatsappSender()
+    latencies = []
+    text_entry = []
+    failures = []
+    try:
+        for i in range(count):
+            message = f"Latency benchmark {i + 1}/{count} - {datetime.now().strftime('%H:%M:%S')}"
+            started = time.perf_counter()
+            success, status = sender.send_message(recipient, message, image_path, is_channel)
+            elapsed = time.perf_counter() - started
+            latencies.append(elapsed)
+            entry = sender.last_text_entry or {}
+            text_entry.append(entry)
+            if not success:
+                failures.append(status)
+            print(f"[{i + 1}/{count}] {elapsed:.2f}s (text entry {entry.get('seconds', 0):.3f}s via {entry.get('method', '-')}) - {status}")
+    finally:
+        sender.close()
+    return latencies, text_entry, failures
+
+
+def compare(before_path, after_path):
+    with open(before_path, "r") as f:
+        before = json.load(f)["summary"]
+    with open(after_path, "r") as f:
+        after = json.load(f)["summary"]
+
+    print(f"{'metric':<18}{'before':>10}{'after':>10}{'change':>10}")
+    for key in ["first_message_s", "mean_s", "p50_s", "p95_s", "max_s", "text_entry_mean_s", "text_entry_p95_s"]:
+        old, new = before.get(key), after.get(key)
+        if old is None or new is None:
+            continue
+        change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+        print(f"{key:<18}{old:>10.2f}{new:>10.2f}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure WhatsApp per-message send latency")
+    parser.add_argument("--recipient", help="Group, contact or channel name to send to")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--channel", action="store_true", help="Recipient is a channel")
+    parser.add_argument("--image", help="Optional image to attach to every message")
+    parser.add_argument("--label", default="run", help="Name used for the result file")
+    parser.add_argument("--output-dir", default="bench_results")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if not args.recipient:
+        parser.error("--recipient is required unless --compare is used")
+
+    latencies, text_entry, failures = run(args.recipient, args.count, args.channel, args.image)
+    result = {
+        "label": args.label,
+        "recipient": args.recipient,
+        "is_channel": args.channel,
+        "with_image": bool(args.image),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "latencies_s": latencies,
+        "text_entry": text_entry,
+        "failures": failures,
+        "summary": summarize(latencies, text_entry),
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"whatsapp_{args.label}.json")
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps(result["summary"], indent=2))
+    print(f"Results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
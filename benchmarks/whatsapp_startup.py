@@ -0,0 +1,106 @@
+"""
+Cold-start and warm-start benchmark for WhatsappSender session preparation.
+
+Cold start: a fresh browser on the existing (already linked) profile, from
+driver launch until WhatsApp Web shows the chat list.
+Warm start: the same call again while that browser is still open, which is
+what every message after the first one pays.
+
+    python -m benchmarks.whatsapp_startup --runs 3 --label after
+    python -m benchmarks.whatsapp_startup --compare bench_results/whatsapp_startup_before.json bench_results/whatsapp_startup_after.json
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from benchmarks.whatsapp_send_latency import _percentile
+
+
+def run(runs, profile_name="default", headless=False, warm_calls=5):
+    from utils.whatsapp_sender import WhatsappSender
+
+    cold, warm = [], []
+    for i in range(runs):
+        sender = WhatsappSender(profile_name, headless=headless)
+        try:
+            started = time.perf_counter()
+            if not sender._prepare_session():
+                print(f"[{i + 1}/{runs}] login failed, is the profile linked?")
+                continue
+            cold.append(time.perf_counter() - started)
+
+            for _ in range(warm_calls):
+                started = time.perf_counter()
+                sender._prepare_session()
+                warm.append(time.perf_counter() - started)
+            print(f"[{i + 1}/{runs}] cold {cold[-1]:.2f}s, warm p50 {_percentile(warm[-warm_calls:], 50):.3f}s")
+        finally:
+            sender.close()
+    return cold, warm
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50_s": _percentile(values, 50),
+        "p95_s": _percentile(values, 95),
+        "max_s": max(values) if values else None,
+    }
+
+
+def compare(before_path, after_path):
+    with open(before_path, "r") as f:
+        before = json.load(f)
+    with open(after_path, "r") as f:
+        after = json.load(f)
+
+    print(f"{'metric':<14}{'before':>10}{'after':>10}{'change':>10}")
+    for kind in ["cold", "warm"]:
+        for key in ["p50_s", "p95_s"]:
+            old, new = before[kind].get(key), after[kind].get(key)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            print(f"{kind + ' ' + key:<14}{old:>10.3f}{new:>10.3f}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure WhatsApp sender cold and warm start times")
+    parser.add_argument("--runs", type=int, default=3, help="Number of cold starts")
+    parser.add_argument("--warm-calls", type=int, default=5, help="Warm calls measured per cold start")
+    parser.add_argument("--profile", default="default")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--label", default="run", help="Name used for the result file")
+    parser.add_argument("--output-dir", default="bench_results")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    cold, warm = run(args.runs, args.profile, args.headless, args.warm_calls)
+    result = {
+        "label": args.label,
+        "profile": args.profile,
+        "headless": args.headless,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "cold_s": cold,
+        "warm_s": warm,
+        "cold": summarize(cold),
+        "warm": summarize(warm),
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"whatsapp_startup_{args.label}.json")
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps({"cold": result["cold"], "warm": result["warm"]}, indent=2))
+    print(f"Results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,67 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from config import MONGO_URI, DB_NAME
 from datetime import datetime,time
+from utils.eligibility import build_eligibility_pipeline
+
+PRICE_FIELDS = ("Product_current_price", "Product_Buy_box_price", "Product_MRP")
+_price_history_indexed = False
+
+
+def update_product_prices(products, product_id, update_data):
+    """
+    $set update_data on a product and add a price_history point (in the same database)
+    when it changed any of its prices, which the auto-publish backtest replays. Every
+    price writer goes through here, including those holding only the products collection.
+    :return: True if the product exists
+    """
+    before = products.find_one_and_update(
+        {"Product_unique_ID": product_id},
+        {"$set": update_data},
+        projection={field: 1 for field in PRICE_FIELDS},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is not None:
+        record_price_change(products.database["price_history"], product_id, before, update_data)
+    return before is not None
+
+
+def _same_price(a, b):
+    # The product editor stores prices as entered, so "499" and 499.0 are the same price
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return a == b
+
+
+def record_price_change(price_history, product_id, before, update_data):
+    """Add a price_history point when an update changed any of the product's prices"""
+    global _price_history_indexed
+    if not _price_history_indexed:
+        ensure_price_history_indexes(price_history)
+        _price_history_indexed = True
+    after = {field: update_data.get(field, before.get(field)) for field in PRICE_FIELDS}
+    if all(_same_price(after[field], before.get(field)) for field in PRICE_FIELDS):
+        return
+    try:
+        price_history.insert_one({
+            "product_id": product_id,
+            "price": after["Product_current_price"],
+            "buy_box_price": after["Product_Buy_box_price"],
+            "mrp": after["Product_MRP"],
+            "timestamp": datetime.now(),
+        })
+    except Exception as e:
+        print(f"Error recording price history: {e}")
+
+
+def ensure_price_history_indexes(price_history):
+    """Index price history for per-product replays over a date range"""
+    try:
+        price_history.create_index([("timestamp", 1)])
+        price_history.create_index([("product_id", 1), ("timestamp", 1)])
+    except Exception as e:
+        print(f"Error creating price_history index: {e}")
+
 
 class DataManager:
     def __init__(self):
@@ -98,6 +159,10 @@ class DataManager:
         try:
             update_data["updated_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+            if any(field in update_data for field in PRICE_FIELDS):
+                # Price updates also go to price_history, which the auto-publish backtest replays
+                return update_product_prices(self.products, product_id, update_data)
+
             result = self.products.update_one(
                 {"Product_unique_ID": product_id},
                 {"$set": update_data}
@@ -257,3 +322,115 @@ class DataManager:
             self.db.auto_publish_config.update_one({}, {"$set": config})
         else:
             self.db.auto_publish_config.insert_one(config)
+
+    def save_whatsapp_send_timings(self, records):
+        """Store per-phase WhatsApp send timings"""
+        if not records:
+            return
+        try:
+            self.db.whatsapp_send_timings.insert_many(records)
+        except Exception as e:
+            print(f"Error saving WhatsApp send timings: {e}")
+
+    def get_whatsapp_send_timings(self, limit=500):
+        """Get the most recent WhatsApp send timing records"""
+        try:
+            return list(self.db.whatsapp_send_timings.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit))
+        except Exception as e:
+            print(f"Error retrieving WhatsApp send timings: {e}")
+            return []
+
+    PRICE_FIELDS = PRICE_FIELDS
+
+    def record_price_change(self, product_id, before, update_data):
+        """Add a price_history point when an update changed any of the product's prices"""
+        record_price_change(self.price_history, product_id, before, update_data)
+
+    def ensure_price_history_indexes(self):
+        """Index price history for per-product replays over a date range"""
+        ensure_price_history_indexes(self.price_history)
+
+    def ensure_publication_indexes(self):
+        """Index publication history for per-product "latest publication" lookups"""
+        try:
+            self.published_products.create_index([("product_id", 1), ("published_date", -1)])
+        except Exception as e:
+            print(f"Error creating published_products index: {e}")
+
+    def get_deferred_product_ids(self):
+        """IDs of eligible products left over from the last auto-publish run by its channel budget"""
+        return [p["Product_unique_ID"] for p in self.products.find(
+            {"auto_publish_deferred": {"$exists": True}}, {"_id": 0, "Product_unique_ID": 1}
+        ) if p.get("Product_unique_ID")]
+
+    def set_auto_publish_deferred(self, evaluated_ids, deferred_ids):
+        """
+        Clear the deferred flag on the products a run evaluated (None: the whole catalog),
+        then set it on the ones it deferred
+        """
+        try:
+            query = {"auto_publish_deferred": {"$exists": True}}
+            if evaluated_ids is not None:
+                query["Product_unique_ID"] = {"$in": list(evaluated_ids)}
+            self.products.update_many(query, {"$unset": {"auto_publish_deferred": ""}})
+            if deferred_ids:
+                self.products.update_many({"Product_unique_ID": {"$in": list(deferred_ids)}},
+                                          {"$set": {"auto_publish_deferred": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}})
+        except Exception as e:
+            print(f"Error saving deferred products: {e}")
+
+    def get_auto_publish_eligibility(self, filters, product_ids=None, now=None):
+        """
+        Evaluate auto-publish eligibility in one aggregation.
+        Returns (eligible products, skipped products); skipped products carry _skip_reasons.
+        """
+        pipeline = build_eligibility_pipeline(filters, now=now, product_ids=product_ids,
+                                              published_collection=self.published_products.name)
+        eligible, skipped = [], []
+        for product in self.products.aggregate(pipeline):
+            (eligible if product.get("_eligible") else skipped).append(product)
+        return eligible, skipped
+
+    def repair_buybox_prices(self):
+        """
+        Give every product a Buy Box price above its current price, in one update_many.
+        A missing, invalid or too low Buy Box becomes current price x 1.1; when that
+        exceeds the MRP it becomes MRP x 0.98, or current price x 1.05 if that is
+        still not above the current price. Repaired products get a new updated_date,
+        as update_product gives them. Returns the number of products changed.
+        """
+        def to_double(field):
+            return {"$convert": {"input": field, "to": "double", "onError": None, "onNull": None}}
+
+        current = to_double("$Product_current_price")
+        updated_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            result = self.products.update_many(
+                {
+                    "Product_unique_ID": {"$nin": [None, ""]},
+                    "$expr": {"$and": [
+                        {"$ne": [current, None]},
+                        # Comparisons with null are false, so missing or invalid Buy Boxes match too
+                        {"$not": [{"$gt": [to_double("$Product_Buy_box_price"), current]}]},
+                    ]},
+                },
+                [{"$set": {"updated_date": updated_date, "Product_Buy_box_price": {"$let": {
+                    "vars": {"current": current, "mrp": to_double("$Product_MRP")},
+                    "in": {"$let": {
+                        "vars": {"raised": {"$multiply": ["$$current", 1.1]}},
+                        "in": {"$cond": [
+                            {"$and": [{"$ne": ["$$mrp", None]}, {"$gt": ["$$raised", "$$mrp"]}]},
+                            {"$cond": [
+                                {"$gt": [{"$multiply": ["$$mrp", 0.98]}, "$$current"]},
+                                {"$multiply": ["$$mrp", 0.98]},
+                                {"$multiply": ["$$current", 1.05]},
+                            ]},
+                            "$$raised",
+                        ]},
+                    }},
+                }}}}],
+            )
+            return result.modified_count
+        except Exception as e:
+            print(f"Error repairing buy box prices: {e}")
+            return 0
@@ -1,8 +1,13 @@
-from datetime import datetime, timedelta
+import pandas as pd
 from pymongo.collection import Collection
 
+from utils.eligibility import MISSING_PRICE, decode_reasons, describe_reason, evaluate_products, republish_window
+
 
 class HandsOffModeController:
+    # Publish if never published, if the price dropped since the last publication, or if that was 4+ days ago
+    FILTERS = {"never_published": True, "price_dropped": True, "not_recent": True, "days_threshold": 4}
+
     def __init__(self, products_collection: Collection, published_collection: Collection, notification_publisher):
         self.products_collection = products_collection
         self.published_collection = published_collection
@@ -15,68 +20,44 @@ class HandsOffModeController:
         print("🔁 Running Hands-Off Mode Check...")
 
         all_products = list(self.products_collection.find({}))
-        now = datetime.now()
-
-        for product in all_products:
-            product_id = str(product.get("_id"))
-            title = product.get("product_name", "Unnamed Product")
-            current_price = product.get("Product_current_price")
-            buy_box_price = product.get("Product_Buy_box_price")
-            last_published_price = self._get_last_published_price(product_id)
-
-            if not current_price or not buy_box_price:
-                continue
-
-            if current_price >= buy_box_price:
-                print(f"❌ Skipping {title}: Current price is not lower than buy box price.")
-                continue
-
-            last_published = self.published_collection.find_one(
-                {"product_id": product_id},
-                sort=[("timestamp", -1)]
-            )
+        history = list(self.published_collection.find(
+            {}, {"_id": 0, "product_id": 1, "product_price": 1, "published_date": 1}
+        ))
 
-            if not last_published:
-                print(f"✅ Publishing {title}: Product has never been published.")
-                self._publish_product(product)
-                continue
-
-            last_published_time = last_published["timestamp"]
-            four_days_ago = now - timedelta(days=4)
+        # All rules are evaluated at once over price and history columns
+        frame = evaluate_products(all_products, history, self.FILTERS)
 
-            if last_published_time >= four_days_ago:
-                if current_price < last_published["price"]:
-                    print(f"✅ Publishing {title}: Current price is lower than last published price.")
-                    self._publish_product(product)
+        for product, row in zip(all_products, frame.itertuples(index=False)):
+            title = product.get("product_name", "Unnamed Product")
+            if row.eligible:
+                if pd.isna(row.last_published):
+                    print(f"✅ Publishing {title}: Product has never been published.")
                 else:
-                    print(f"❌ Skipping {title}: Current price is not lower than last published price.")
-            else:
-                print(f"✅ Publishing {title}: Last published more than 4 days ago.")
+                    print(f"✅ Publishing {title}: Last published {int(row.days_since_publish)} days ago at {row.last_price}.")
                 self._publish_product(product)
+                continue
 
-    def _get_last_published_price(self, product_id):
-        """
-        Returns the most recent published price of a product.
-        """
-        record = self.published_collection.find_one(
-            {"product_id": product_id},
-            sort=[("timestamp", -1)]
-        )
-        return record["price"] if record else None
+            reasons = decode_reasons(row.reasons)
+            if MISSING_PRICE in reasons:
+                continue
+            days_ago = None if pd.isna(row.days_since_publish) else int(row.days_since_publish)
+            print(f"❌ Skipping {title}: " + "; ".join(
+                describe_reason(code, row.current_price, row.last_price, days_ago, self.FILTERS["days_threshold"])
+                for code in reasons
+            ))
 
     def _publish_product(self, product):
         """
-        Handles publishing a product via the notification system
-        and logs the publication in published_collection.
+        Handles publishing a product via the notification system (PublishService),
+        which records it in published_products like every other publish path.
+        FILTERS already decided the product is due, so an earlier send at the same
+        price 4+ days ago must not stop it; a more recent one still does.
         """
-        self.notification_publisher.publish(product)
-
-        self.published_collection.insert_one({
-            "product_id": str(product["_id"]),
-            "title": product.get("product_name"),
-            "price": product.get("Product_current_price"),
-            "timestamp": datetime.now()
-        })
+        success, message = self.notification_publisher.publish(product, source="hands_off",
+                                                               republish_after=republish_window(self.FILTERS))
+        if not success:
+            print(f"❌ Hands-Off publish failed for {product.get('product_name')}: {message}")
+            return
 
         print(f"✅ Published (Hands-Off): {product.get('product_name')} @ ₹{product.get('Product_current_price')}")
 
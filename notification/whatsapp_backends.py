@@ -0,0 +1,265 @@
+import abc
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("WhatsAppSender")
+
+
+class WhatsappBackend(abc.ABC):
+    """
+    Interface shared by the WhatsApp delivery backends.
+
+    Messages are items of {"message": str, "image_path": str or None}, the same
+    shape WhatsappSender.send_batch accepts. Every send returns (success, status).
+    """
+
+    name = "base"
+
+    def send_message(self, recipient_name, message, image_path=None, is_channel=False):
+        return self.send_batch(recipient_name, [{"message": message, "image_path": image_path}], is_channel)[0]
+
+    @abc.abstractmethod
+    def send_batch(self, recipient_name, messages, is_channel=False):
+        """Returns: list of (success, status) tuples, one per message"""
+
+    def send_batches(self, jobs):
+        """
+        Args:
+            jobs (list): (recipient_name, messages, is_channel) tuples
+
+        Returns:
+            dict: (recipient_name, is_channel) -> list of (success, status) tuples
+        """
+        return {(recipient_name, is_channel): self.send_batch(recipient_name, messages, is_channel)
+                for recipient_name, messages, is_channel in jobs}
+
+    def close(self):
+        pass
+
+
+class SeleniumWhatsappBackend(WhatsappBackend):
+    """WhatsApp Web automation through a WhatsappSender or a WhatsappSenderPool."""
+
+    name = "selenium"
+
+    def __init__(self, sender=None, pool=None):
+        self.sender = sender
+        self.pool = pool
+
+    def send_message(self, recipient_name, message, image_path=None, is_channel=False):
+        sender = self.pool.sender_for(recipient_name) if self.pool else self.sender
+        return sender.send_message(recipient_name, message, image_path, is_channel)
+
+    def send_batch(self, recipient_name, messages, is_channel=False):
+        sender = self.pool.sender_for(recipient_name) if self.pool else self.sender
+        return sender.send_batch(recipient_name, messages, is_channel)
+
+    def send_batches(self, jobs):
+        if self.pool:
+            return self.pool.send_batches(jobs)
+        return super().send_batches(jobs)
+
+
+class CloudApiWhatsappBackend(WhatsappBackend):
+    """
+    WhatsApp Business Cloud API backend.
+
+    Recipients are mapped to WhatsApp IDs (phone numbers or group IDs) through
+    the "recipients" config. Requests go through one pooled HTTP session, each
+    image (local file or URL) is uploaded once and its media ID reused while it
+    is valid, and recipients are sent to concurrently. One recipient's messages
+    go out one after another so they arrive in the order given.
+
+    Config (whatsapp.cloud_api in config.json):
+        access_token, phone_number_id, recipients {name: wa_id},
+        api_base (default https://graph.facebook.com), api_version (default v19.0),
+        max_workers (default 8)
+    """
+
+    name = "cloud_api"
+    CAPTION_LIMIT = 1024
+    # Uploaded media stays available for 30 days; re-upload a bit earlier
+    MEDIA_TTL_SECONDS = 29 * 24 * 3600
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    MAX_RETRY_DELAY_SECONDS = 60
+
+    def __init__(self, access_token, phone_number_id, recipients=None,
+                 api_base="https://graph.facebook.com", api_version="v19.0",
+                 max_workers=8, max_retries=3, timeout=30):
+        self.phone_number_id = phone_number_id
+        self.recipients = dict(recipients or {})
+        self.base_url = f"{api_base.rstrip('/')}/{api_version}/{phone_number_id}"
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # The token is sent per request so image downloads from other hosts don't carry it
+        self._auth_headers = {"Authorization": f"Bearer {access_token}"}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._media_ids = {}
+        self._media_locks = {}
+        self._media_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cloud_config):
+        return cls(
+            access_token=cloud_config["access_token"],
+            phone_number_id=cloud_config["phone_number_id"],
+            recipients=cloud_config.get("recipients", {}),
+            api_base=cloud_config.get("api_base", "https://graph.facebook.com"),
+            api_version=cloud_config.get("api_version", "v19.0"),
+            max_workers=int(cloud_config.get("max_workers", 8)),
+        )
+
+    def handles(self, recipient_name):
+        return recipient_name in self.recipients
+
+    def send_batch(self, recipient_name, messages, is_channel=False):
+        return self.send_batches([(recipient_name, messages, is_channel)])[(recipient_name, is_channel)]
+
+    def send_batches(self, jobs):
+        results = {}
+        if not jobs:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)), thread_name_prefix="wa-cloud") as executor:
+            futures = [((recipient_name, is_channel), executor.submit(self._send_sequence, recipient_name, messages))
+                       for recipient_name, messages, is_channel in jobs]
+            for key, future in futures:
+                results[key] = future.result()
+        return results
+
+    def _send_sequence(self, recipient_name, messages):
+        """Send one recipient's messages in order."""
+        results = []
+        for item in messages:
+            if isinstance(item, dict):
+                message, image_path = item.get("message"), item.get("image_path")
+            else:
+                message, image_path = (tuple(item) + (None,))[:2]
+            try:
+                results.append(self._send_one(recipient_name, message, image_path))
+            except Exception as e:
+                results.append((False, f"Error: {str(e)}"))
+        return results
+
+    def _send_one(self, recipient_name, message, image_path):
+        wa_id = self.recipients.get(recipient_name)
+        if not wa_id:
+            return False, f"No Cloud API recipient configured for {recipient_name}"
+
+        message = message or ""
+        payload = {"messaging_product": "whatsapp", "to": wa_id}
+        if image_path:
+            image = {"id": self._media_id(image_path)}
+            if len(message) <= self.CAPTION_LIMIT:
+                image["caption"] = message
+                message = ""
+            payload.update({"type": "image", "image": image})
+            response = self._post("messages", json=payload)
+            if not message:
+                return True, f"Message sent (id {self._message_id(response)})"
+            # Caption too long for the image: send the text as a follow-up message
+            image_id = self._message_id(response)
+            payload = {"messaging_product": "whatsapp", "to": wa_id,
+                       "type": "text", "text": {"body": message, "preview_url": True}}
+            try:
+                response = self._post("messages", json=payload)
+            except Exception as e:
+                # The image is already in the chat, so a retry would post it twice
+                logger.warning(f"Image sent to {recipient_name} but its text failed: {e}")
+                return True, f"Partially sent: image (id {image_id}) delivered, text failed: {str(e)}"
+            return True, f"Message sent (ids {image_id}, {self._message_id(response)})"
+
+        payload.update({"type": "text", "text": {"body": message, "preview_url": True}})
+        response = self._post("messages", json=payload)
+        return True, f"Message sent (id {self._message_id(response)})"
+
+    def _media_id(self, image_path):
+        """
+        Upload an image once and reuse its media ID. URLs are keyed by URL (and
+        downloaded only on the first use), local files by their content.
+        """
+        is_url = image_path.startswith(("http://", "https://"))
+        if is_url:
+            key = image_path
+            content = None
+        else:
+            with open(image_path, "rb") as f:
+                content = f.read()
+            key = hashlib.sha1(content).hexdigest()
+
+        with self._media_lock:
+            lock = self._media_locks.setdefault(key, threading.Lock())
+        # One upload per image even when several sends need it at the same time
+        with lock:
+            cached = self._media_ids.get(key)
+            if cached and time.time() - cached[1] < self.MEDIA_TTL_SECONDS:
+                return cached[0]
+
+            if content is None:
+                download = self.session.get(image_path, timeout=self.timeout)
+                download.raise_for_status()
+                content = download.content
+
+            mime_type = mimetypes.guess_type(image_path.split("?")[0])[0] or "image/jpeg"
+            response = self._post(
+                "media",
+                data={"messaging_product": "whatsapp", "type": mime_type},
+                files={"file": (os.path.basename(image_path), content, mime_type)},
+            )
+            media_id = response["id"]
+            self._media_ids[key] = (media_id, time.time())
+            logger.info(f"Uploaded {os.path.basename(image_path)} as media {media_id}")
+            return media_id
+
+    def _post(self, path, **kwargs):
+        url = f"{self.base_url}/{path}"
+        for attempt in range(self.max_retries + 1):
+            response = self.session.post(url, headers=self._auth_headers, timeout=self.timeout, **kwargs)
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(response.headers.get("Retry-After"), attempt)
+                logger.warning(f"Cloud API {path} returned {response.status_code}, retrying in {delay:.0f}s")
+                time.sleep(delay)
+                continue
+            if not response.ok:
+                raise RuntimeError(f"Cloud API {path} failed ({response.status_code}): {response.text[:200]}")
+            return response.json()
+
+    def _retry_delay(self, retry_after, attempt):
+        """Seconds to wait before a retry: Retry-After (seconds or an HTTP date), else 2 ** attempt; capped."""
+        delay = 2 ** attempt
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    if retry_at.tzinfo is None:
+                        retry_at = retry_at.replace(tzinfo=timezone.utc)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    pass
+        return min(max(delay, 0), self.MAX_RETRY_DELAY_SECONDS)
+
+    @staticmethod
+    def _message_id(response):
+        messages = response.get("messages") or [{}]
+        return messages[0].get("id")
+
+    def close(self):
+        self.session.close()
@@ -6,14 +6,53 @@ import json
 import os
 from notification.notification_manager import NotificationManager
 from utils.whatsapp_sender import WhatsappSender
+from utils.whatsapp_pool import WhatsappSenderPool
+from notification.whatsapp_backends import CloudApiWhatsappBackend, SeleniumWhatsappBackend
+from db.db_manager import DataManager
+import hashlib
 import shutil
 import tempfile
+from collections import OrderedDict
 from email.mime.application import MIMEApplication
 # import telegram
 import requests  # For fallback method
 import asyncio  # For handling async operations
 
 
+def _telegram_chat(ch):
+    ch = ch.strip()
+    if ch and not ch.startswith("@") and not ch.lstrip('-').isdigit():
+        ch = f"@{ch}"
+    return ch
+
+
+def parse_telegram_channels(json_config):
+    """
+    Collect Telegram chats from config.json's telegram_channels list and telegram_chat_id.
+
+    Args:
+        json_config (dict): Parsed config.json
+
+    Returns:
+        list: Unique chat ids / @usernames, in config order
+    """
+    channels = []
+    items = json_config.get("telegram_channels")
+    items = list(items) if isinstance(items, list) else []
+    chat_id = json_config.get("telegram_chat_id")
+    if chat_id:
+        items.append(str(chat_id))
+    for item in items:
+        if not isinstance(item, str):
+            continue
+        # Entries may hold several comma-separated chats
+        for ch in item.split(","):
+            ch = _telegram_chat(ch)
+            if ch and ch not in channels:
+                channels.append(ch)
+    return channels
+
+
 class NotificationPublisher:
     """
     Handles notifications for publishing products by sending messages via Telegram, WhatsApp,
@@ -22,6 +61,14 @@ class NotificationPublisher:
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self._whatsapp_sender = None  # Lazy initialization
+        self._whatsapp_pool = None  # Lazy initialization, only when whatsapp.pool_size > 1
+        self._db = None  # Lazy initialization, used to store WhatsApp send timings
+        self._whatsapp_cloud_backend = None  # Lazy initialization, only when whatsapp.cloud_api is configured
+        self._publish_service = None  # Lazy initialization, see publish()
+        self._http_session = None  # Lazy initialization, pooled connections to the Telegram API
+        self._telegram_channels = (None, [])  # (config.json mtime, parsed channels)
+        self._telegram_photo_ids = {}  # (image path, mtime) -> Telegram file_id of an uploaded photo
+        self._media_cache = OrderedDict()  # image URL -> downloaded file, most recently used last
         self.driver = None
         self.email_config = self.load_email_config()  
         self.telegram_config = self.load_telegram_config()
@@ -38,8 +85,108 @@ class NotificationPublisher:
         """Lazy initialize WhatsApp sender."""
         if self._whatsapp_sender is None:
             self._whatsapp_sender = WhatsappSender()
+            self._apply_whatsapp_debug_config([self._whatsapp_sender])
         return self._whatsapp_sender
 
+    @property
+    def whatsapp_pool(self):
+        """
+        Lazy initialize the pool of parallel WhatsApp profiles.
+        Returns None unless "pool_size" > 1 is set in the whatsapp config.
+        """
+        if self._whatsapp_pool is None:
+            whatsapp_config = self.config_manager.get_whatsapp_config() or {}
+            try:
+                pool_size = int(whatsapp_config.get("pool_size", 1))
+            except (TypeError, ValueError):
+                pool_size = 1
+            if pool_size > 1:
+                self._whatsapp_pool = WhatsappSenderPool(
+                    size=pool_size,
+                    headless=bool(whatsapp_config.get("headless", True))
+                )
+                self._apply_whatsapp_debug_config(self._whatsapp_pool.senders)
+        return self._whatsapp_pool
+
+    @property
+    def publish_service(self):
+        """Lazy initialize the PublishService used by publish()."""
+        if self._publish_service is None:
+            from publish_service import PublishService
+            self._publish_service = PublishService(self.config_manager, notification_publisher=self)
+        return self._publish_service
+
+    @property
+    def http_session(self):
+        """Lazy initialize a requests session, so Telegram sends reuse connections."""
+        if self._http_session is None:
+            self._http_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            self._http_session.mount("https://", adapter)
+        return self._http_session
+
+    def get_telegram_channels(self):
+        """Telegram chats from config.json, re-parsed only when the file changes."""
+        try:
+            mtime = os.path.getmtime("config.json")
+        except OSError:
+            return []
+        if self._telegram_channels[0] != mtime:
+            with open("config.json", "r") as f:
+                self._telegram_channels = (mtime, parse_telegram_channels(json.load(f)))
+        return self._telegram_channels[1]
+
+    @property
+    def whatsapp_cloud_backend(self):
+        """
+        Lazy initialize the WhatsApp Business Cloud API backend.
+        Returns None unless whatsapp.cloud_api has an access_token and phone_number_id.
+        """
+        if self._whatsapp_cloud_backend is None:
+            whatsapp_config = self.config_manager.get_whatsapp_config() or {}
+            cloud_config = whatsapp_config.get("cloud_api") or {}
+            if cloud_config.get("access_token") and cloud_config.get("phone_number_id"):
+                self._whatsapp_cloud_backend = CloudApiWhatsappBackend.from_config(cloud_config)
+        return self._whatsapp_cloud_backend
+
+    @property
+    def whatsapp_selenium_backend(self):
+        """WhatsApp Web backend over the sender pool when configured, else the single sender."""
+        pool = self.whatsapp_pool
+        if pool is not None:
+            return SeleniumWhatsappBackend(pool=pool)
+        return SeleniumWhatsappBackend(sender=self.whatsapp_sender)
+
+    def whatsapp_backend_for(self, recipient_name):
+        """
+        Pick the delivery backend for a recipient: the Cloud API when the recipient
+        is mapped in whatsapp.cloud_api.recipients, otherwise WhatsApp Web.
+        """
+        cloud_backend = self.whatsapp_cloud_backend
+        if cloud_backend is not None and cloud_backend.handles(recipient_name):
+            return cloud_backend
+        return self.whatsapp_selenium_backend
+
+    def _cloud_image_ref(self, product):
+        """Image URL or existing local path for the Cloud API backend, or None."""
+        image_path = product.get("Product_image_path")
+        if image_path is None or isinstance(image_path, (int, float)):
+            return None
+        if image_path.startswith(('http://', 'https://')) or os.path.exists(image_path):
+            return image_path
+        print(f"⚠️ Image file not found: {image_path}")
+        return None
+
+    def _apply_whatsapp_debug_config(self, senders):
+        """Apply the optional whatsapp.debug_sample_rate setting (0..1) to senders."""
+        whatsapp_config = self.config_manager.get_whatsapp_config() or {}
+        try:
+            sample_rate = float(whatsapp_config.get("debug_sample_rate", 0.0))
+        except (TypeError, ValueError):
+            sample_rate = 0.0
+        for sender in senders:
+            sender.debug_sample_rate = min(max(sample_rate, 0.0), 1.0)
+
     def load_email_config(self):
         """
         Load email configuration from the latest config.json file.
@@ -158,43 +305,18 @@ class NotificationPublisher:
                     f"🔗 [Buy Now]({product.get('product_Affiliate_url', '#')})"
                 )
                 
-            # Convert HTML tags to WhatsApp markdown (basic conversion)
-            # Replace <b> with * for bold in WhatsApp
-            whatsapp_message = message.replace("<b>", "*").replace("</b>", "*")
-            
-            # Get image path
-            image_path = product.get("Product_image_path")
-            
-            # Check and convert image_path to string if it's a number
-            if image_path is not None:
-                if isinstance(image_path, (int, float)):
-                    print(f"[WhatsApp] Warning: image_path was a number ({image_path}), converting to string")
-                    image_path = str(image_path)
-            
-            # Rest of the method remains the same
-            local_image_path = None
-            
-            # Process image if available
-            if image_path:
-                # If it's a URL, download it first
-                if image_path.startswith(('http://', 'https://')):
-                    os.makedirs("temp_images", exist_ok=True)
-                    local_image_path = f"temp_images/{os.path.basename(image_path)}"
-                    
-                    if self.whatsapp_sender.download_image(image_path, local_image_path):
-                        image_path = local_image_path
-                    else:
-                        print(f"⚠️ Could not download image from {image_path}")
-                        image_path = None
-                # If it's a local path, verify it exists
-                elif not os.path.exists(image_path):
-                    print(f"⚠️ Image file not found: {image_path}")
-                    image_path = None
+            whatsapp_message = self._to_whatsapp_markup(message)
+
+            backend = self.whatsapp_backend_for(recipient_name)
+            if backend is self.whatsapp_cloud_backend:
+                image_path = self._cloud_image_ref(product)
+            else:
+                image_path = self._prepare_whatsapp_image(product)
             
-            print(f"Attempting to send WhatsApp message to {('channel' if is_channel else 'group')}: {recipient_name}")
+            print(f"Attempting to send WhatsApp message to {('channel' if is_channel else 'group')}: {recipient_name} via {backend.name}")
             
             # Send the message with image
-            success, status_msg = self.whatsapp_sender.send_message(recipient_name, whatsapp_message, image_path, is_channel)
+            success, status_msg = backend.send_message(recipient_name, whatsapp_message, image_path, is_channel)
             
             if success:
                 print(f"✅ WhatsApp message sent to {recipient_name}")
@@ -207,12 +329,202 @@ class NotificationPublisher:
             print(f"❌ WhatsApp push failed: {str(e)}")
             return False
         finally:
-            # Clean up temporary files
-            if local_image_path and os.path.exists(local_image_path):
-                try:
-                    os.remove(local_image_path)
-                except:
-                    pass
+            self._persist_whatsapp_timings()
+
+    def whatsapp_push_batch(self, recipient_name, items, is_channel=False):
+        """
+        Send several products to one WhatsApp group or channel, opening its chat only once.
+
+        Args:
+            recipient_name (str): WhatsApp group or channel name to send to
+            items (list): (product, message) tuples, in send order
+            is_channel (bool): Whether recipient is a channel (True) or group (False)
+
+        Returns:
+            list: One (success, status) tuple per item, in input order
+        """
+        return self.whatsapp_push_batches([(recipient_name, is_channel)], items)[(recipient_name, is_channel)]
+
+    def whatsapp_push_batches(self, recipients, items):
+        """
+        Send the same products to several WhatsApp recipients. Each recipient goes
+        through its backend (see whatsapp_backend_for); Selenium images are
+        prepared once, and recipients are served in parallel when a sender pool
+        or the Cloud API is used.
+
+        Args:
+            recipients (list): (recipient_name, is_channel) tuples
+            items (list): (product, message) tuples, in send order
+
+        Returns:
+            dict: (recipient_name, is_channel) -> list of (success, status) tuples
+        """
+        results = {}
+        try:
+            messages = [self._to_whatsapp_markup(message or self.format_product_message(product))
+                        for product, message in items]
+
+            cloud_backend = self.whatsapp_cloud_backend
+            cloud_recipients = [(name, is_channel) for name, is_channel in recipients
+                                if cloud_backend is not None and cloud_backend.handles(name)]
+            selenium_recipients = [recipient for recipient in recipients if recipient not in cloud_recipients]
+
+            if cloud_recipients:
+                # The Cloud API uploads (and reuses) images itself, straight from the URL or file
+                cloud_batch = [{"message": message, "image_path": self._cloud_image_ref(product)}
+                               for (product, _), message in zip(items, messages)]
+                print(f"Sending {len(cloud_batch)} WhatsApp messages to {len(cloud_recipients)} recipients via Cloud API")
+                results.update(self.whatsapp_cloud_backend.send_batches(
+                    [(name, cloud_batch, is_channel) for name, is_channel in cloud_recipients]
+                ))
+
+            if selenium_recipients:
+                batch = []
+                for (product, _), message in zip(items, messages):
+                    batch.append({"message": message, "image_path": self._prepare_whatsapp_image(product)})
+
+                pool = self.whatsapp_pool
+                if pool is not None:
+                    print(f"Sending {len(batch)} WhatsApp messages to {len(selenium_recipients)} recipients using {len(pool)} profiles")
+                else:
+                    print(f"Sending {len(batch)} WhatsApp messages to {len(selenium_recipients)} recipients via WhatsApp Web")
+                results.update(self.whatsapp_selenium_backend.send_batches(
+                    [(name, batch, is_channel) for name, is_channel in selenium_recipients]
+                ))
+
+            for (recipient_name, _), recipient_results in results.items():
+                sent = sum(1 for success, _ in recipient_results if success)
+                print(f"{'✅' if sent == len(recipient_results) else '⚠️'} WhatsApp batch to {recipient_name}: {sent}/{len(recipient_results)} sent")
+            return results
+
+        except Exception as e:
+            print(f"❌ WhatsApp batch push failed: {str(e)}")
+            for recipient_name, is_channel in recipients:
+                results.setdefault((recipient_name, is_channel), [(False, str(e))] * len(items))
+            return results
+        finally:
+            self._persist_whatsapp_timings()
+
+    def _persist_whatsapp_timings(self):
+        """Move the per-phase send timings collected by the WhatsApp sender(s) to MongoDB."""
+        senders = []
+        if self._whatsapp_sender:
+            senders.append(self._whatsapp_sender)
+        if self._whatsapp_pool:
+            senders.extend(s for s in self._whatsapp_pool.senders if s is not self._whatsapp_sender)
+
+        records = []
+        for sender in senders:
+            records.extend(sender.pop_timing_records())
+        if not records:
+            return
+
+        try:
+            if self._db is None:
+                self._db = DataManager()
+            self._db.save_whatsapp_send_timings(records)
+        except Exception as e:
+            print(f"⚠️ Could not store WhatsApp send timings: {e}")
+
+    def _to_whatsapp_markup(self, message):
+        """Convert HTML tags to WhatsApp markdown (basic conversion)."""
+        return message.replace("<b>", "*").replace("</b>", "*")
+
+    def _prepare_whatsapp_image(self, product):
+        """
+        Resolve a product's image to a local file for WhatsApp. Downloads stay in
+        the media cache (see _cached_download), so nothing is left to clean up.
+
+        Returns:
+            str: Local image path, or None
+        """
+        image_path = product.get("Product_image_path")
+
+        # Check and convert image_path to string if it's a number
+        if image_path is not None and isinstance(image_path, (int, float)):
+            print(f"[WhatsApp] Warning: image_path was a number ({image_path}), converting to string")
+            image_path = str(image_path)
+
+        if image_path:
+            # If it's a URL, download it first (once; see _cached_download)
+            if image_path.startswith(('http://', 'https://')):
+                cached_path = self._cached_download(image_path)
+                if cached_path:
+                    image_path = cached_path
+                else:
+                    print(f"⚠️ Could not download image from {image_path}")
+                    image_path = None
+            # If it's a local path, verify it exists
+            elif not os.path.exists(image_path):
+                print(f"⚠️ Image file not found: {image_path}")
+                image_path = None
+
+        return image_path
+
+    MEDIA_CACHE_DIR = os.path.join("temp_images", "cache")
+    MEDIA_CACHE_SIZE = 200
+
+    def _cached_download(self, url):
+        """
+        Download an image URL into the media cache, reusing earlier downloads.
+        The least recently used files are deleted beyond MEDIA_CACHE_SIZE, in
+        memory and in MEDIA_CACHE_DIR, which outlives the process.
+
+        Returns:
+            str: Local file path, or None if the download failed
+        """
+        local_path = self._media_cache.get(url)
+        if local_path and os.path.exists(local_path):
+            self._media_cache.move_to_end(url)
+            self._touch(local_path)
+            return local_path
+
+        os.makedirs(self.MEDIA_CACHE_DIR, exist_ok=True)
+        extension = os.path.splitext(url.split("?")[0])[1] or ".jpg"
+        local_path = os.path.join(self.MEDIA_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + extension)
+        if os.path.exists(local_path):
+            self._touch(local_path)
+        elif not self.whatsapp_sender.download_image(url, local_path):
+            return None
+        else:
+            self._evict_media_files(keep=local_path)
+
+        self._media_cache[url] = local_path
+        while len(self._media_cache) > self.MEDIA_CACHE_SIZE:
+            _, old_path = self._media_cache.popitem(last=False)
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+        return local_path
+
+    @staticmethod
+    def _touch(path):
+        """Mark a cached file as recently used; the directory sweep goes by modification time."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict_media_files(self, keep=None):
+        """Delete the least recently used files in MEDIA_CACHE_DIR beyond MEDIA_CACHE_SIZE."""
+        try:
+            entries = [entry for entry in os.scandir(self.MEDIA_CACHE_DIR) if entry.is_file() and entry.path != keep]
+        except OSError:
+            return
+        excess = len(entries) + (1 if keep else 0) - self.MEDIA_CACHE_SIZE
+        if excess <= 0:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        removed = set()
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+                removed.add(entry.path)
+            except OSError:
+                pass
+        for url in [url for url, path in self._media_cache.items() if path in removed]:
+            del self._media_cache[url]
 
     def _cleanup_lock(self):
         """Clean up the lock file"""
@@ -323,6 +635,19 @@ class NotificationPublisher:
                     print(f"Warning: Error in WhatsApp sender cleanup: {e}")
                 finally:
                     self._whatsapp_sender = None
+            if self._whatsapp_cloud_backend:
+                self._whatsapp_cloud_backend.close()
+                self._whatsapp_cloud_backend = None
+            if self._whatsapp_pool:
+                try:
+                    self._whatsapp_pool.close()
+                except Exception as e:
+                    print(f"Warning: Error in WhatsApp pool cleanup: {e}")
+                finally:
+                    self._whatsapp_pool = None
+            if self._http_session:
+                self._http_session.close()
+                self._http_session = None
         except Exception as e:
             print(f"Warning: Error closing WebDriver: {e}")
         finally:
@@ -353,48 +678,11 @@ class NotificationPublisher:
                 return False, "No bot token configured"
         
             # Get channels - read directly from config.json for reliability
-            channels = []
-        
             try:
-                with open("config.json", "r") as f:
-                    json_config = json.load(f)
-            
-                # Process telegram_channels array
-                if "telegram_channels" in json_config and isinstance(json_config["telegram_channels"], list):
-                    for item in json_config["telegram_channels"]:
-                        if isinstance(item, str):
-                            # Split by commas if it contains commas
-                            if "," in item:
-                                for ch in item.split(","):
-                                    ch = ch.strip()
-                                    if ch:
-                                        if not ch.startswith("@") and not ch.lstrip('-').isdigit():
-                                            ch = f"@{ch}"
-                                        channels.append(ch)
-                            else:
-                                # Add as a single item if no commas
-                                ch = item.strip()
-                                if ch:
-                                    if not ch.startswith("@") and not ch.lstrip('-').isdigit():
-                                        ch = f"@{ch}"
-                                    channels.append(ch)
-                    
-                # Also check for comma-separated telegram_chat_id 
-                if "telegram_chat_id" in json_config:
-                    chat_id = json_config["telegram_chat_id"]
-                    if isinstance(chat_id, str) and "," in chat_id:
-                        for ch in chat_id.split(","):
-                            ch = ch.strip()
-                            if ch and ch not in channels:
-                                if not ch.startswith("@") and not ch.lstrip('-').isdigit():
-                                    ch = f"@{ch}"
-                                channels.append(ch)
-                    elif chat_id and chat_id not in channels:
-                        if not chat_id.startswith("@") and not chat_id.lstrip('-').isdigit():
-                            chat_id = f"@{chat_id}"
-                        channels.append(chat_id)
+                channels = self.get_telegram_channels()
             except Exception as e:
                 print(f"[Telegram] Error reading config.json: {e}")
+                channels = []
     
             if not channels:
                 print("[Telegram] No channels configured")
@@ -415,17 +703,25 @@ class NotificationPublisher:
                 
                     # If we have an image, send photo with caption
                     if image_path and os.path.exists(image_path):
-                        with open(image_path, 'rb') as photo:
-                            # Send photo with caption
-                            url = api_url + "sendPhoto"
-                            files = {'photo': photo}
-                            data = {
-                                'chat_id': channel,
-                                'caption': message,
-                                'parse_mode': 'HTML'
-                            }
-                            print(f"[DEBUG] Sending photo with caption to {url}")
-                            response = requests.post(url, files=files, data=data)
+                        url = api_url + "sendPhoto"
+                        data = {
+                            'chat_id': channel,
+                            'caption': message,
+                            'parse_mode': 'HTML'
+                        }
+                        photo_key = (os.path.abspath(image_path), os.path.getmtime(image_path))
+                        if photo_key in self._telegram_photo_ids:
+                            # Already uploaded: Telegram reuses the file by id
+                            data['photo'] = self._telegram_photo_ids[photo_key]
+                            print(f"[DEBUG] Sending cached photo with caption to {url}")
+                            response = self.http_session.post(url, data=data)
+                        else:
+                            with open(image_path, 'rb') as photo:
+                                # Send photo with caption
+                                print(f"[DEBUG] Sending photo with caption to {url}")
+                                response = self.http_session.post(url, files={'photo': photo}, data=data)
+                            if response.status_code == 200:
+                                self._remember_telegram_photo(photo_key, response)
                     else:
                         # Send just text message
                         url = api_url + "sendMessage"
@@ -436,7 +732,7 @@ class NotificationPublisher:
                             'disable_web_page_preview': False
                         }
                         print(f"[DEBUG] Sending text message to {url}")
-                        response = requests.post(url, json=data)
+                        response = self.http_session.post(url, json=data)
                 
                     # Check response
                     print(f"[DEBUG] Response status code: {response.status_code}")
@@ -459,75 +755,38 @@ class NotificationPublisher:
 
         except Exception as errors:
             return False, str(errors)
+        if not successful_channels:
+            return False, "; ".join(errors)
         return True, None
 
+    def _remember_telegram_photo(self, photo_key, response):
+        """Keep the file_id of an uploaded photo so later sends skip the upload."""
+        try:
+            sizes = response.json()["result"]["photo"]
+            self._telegram_photo_ids[photo_key] = sizes[-1]["file_id"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            pass
+
 
-    def publish(self, product):
+    def publish(self, product, channels=("Telegram", "WhatsApp"), source="notification_publisher", republish=False,
+                republish_after=None):
         """
         Publish a product by sending notifications via Telegram and WhatsApp.
-        
+
+        Sends go through the publish_jobs outbox, so the same product at the
+        same price is never sent to the same channel twice, and failed sends
+        are retried by run_publish_worker.py.
+
         Args:
             product (dict): Dictionary containing product details.
-            
+            channels (list): "Telegram" and/or "WhatsApp"; WhatsApp goes to the configured channels and groups
+            source (str): Caller name stored with the jobs
+            republish (bool): Send again even if already published at this price, e.g. a manual push
+            republish_after (timedelta): Send again only if that was at least this long ago, for
+                                         callers whose rules make a deal due again after a while
+
         Returns:
             tuple: (success, message) - True if published to at least one platform
         """
-        success = False
-        channels_published = []
-        errors = []
-        
-        # Format the message using our formatter method for consistency
-        message = self.format_product_message(product)
-        image_path = product.get("Product_image_path")
-        
-        # Try Telegram first
-        telegram_success, telegram_error = self.telegram_push(message, image_path)
-        if telegram_success:
-            channels_published.append("Telegram")
-            success = True
-        else:
-            error_msg = f"❌ Telegram push failed: {telegram_error}"
-            print(error_msg)
-            errors.append(error_msg)
-
-        # Try WhatsApp
-        try:
-            # Get WhatsApp configuration
-            whatsapp_groups = []
-            
-            # Try to get group from self.config_manager (should be there)
-            try:
-                group_name = self.config_manager.get("whatsapp_channel_names", "")
-                if group_name:
-                    whatsapp_groups.append(group_name)
-            except Exception as e:
-                print(f"Warning: Could not get WhatsApp group from config: {e}")
-                
-            # If no groups configured, use default
-            if not whatsapp_groups:
-                whatsapp_groups.append("Default Group")
-            
-            # Send to all configured groups
-            whatsapp_success = False
-            for group_name in whatsapp_groups:
-                if self.whatsapp_push(product, group_name):
-                    channels_published.append(f"WhatsApp ({group_name})")
-                    whatsapp_success = True
-                    success = True
-            
-            if not whatsapp_success:
-                errors.append("❌ WhatsApp: Failed to send to any groups")
-                
-        except Exception as e:
-            error_msg = f"❌ WhatsApp push failed: {str(e)}"
-            print(error_msg)
-            errors.append(error_msg)
-
-        # Return overall status
-        result_message = ""
-        if channels_published:
-            result_message += f"Published to: {', '.join(channels_published)}. "
-        if errors:
-            result_message += f"Errors: {'; '.join(errors)}"
-            
-        return success, result_message
+        return self.publish_service.publish(product, channels, source=source, republish=republish,
+                                            republish_after=republish_after)
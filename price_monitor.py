@@ -1,5 +1,6 @@
 import pymongo
 from datetime import datetime
+from db.db_manager import update_product_prices
 from monitors.amazon_monitor import AmazonIndiaMonitor
 
 class PriceMonitor:
@@ -48,13 +49,11 @@ class PriceMonitor:
         :param product_id: Unique identifier of the product.
         :param new_price: New product price to update.
         """
-        self.products_collection.update_one(
-            {"Product_unique_ID": product_id},
-            {"$set": {
-                "Product_current_price": new_price,
-                "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }}
-        )
+        # Through update_product_prices, so the change is also kept in price_history
+        update_product_prices(self.products_collection, product_id, {
+            "Product_current_price": new_price,
+            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
         print(f"[INFO] Updated product {product_id} with new price: {new_price}")
 
     def monitor_all_products(self, fetch_price_callback):
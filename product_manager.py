@@ -4,7 +4,9 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import pymongo
-from notification_publisher import NotificationManager
+from db.db_manager import update_product_prices
+from publish_outbox import DEAD, PublishOutbox
+from publish_service import get_publish_service
 
 
 class ProductManager:
@@ -15,6 +17,7 @@ class ProductManager:
         """
         self.db = db
         self.products_collection = db["products"]
+        self.publish_outbox = PublishOutbox(db["publish_jobs"])
 
     def dashboard_page(self):
         st.header("📊 Product Dashboard")
@@ -289,10 +292,8 @@ class ProductManager:
                         "Publish": publish,
                         "Publish_time": pub_time
                     }
-                    self.products_collection.update_one(
-                        {"Product_unique_ID": product["Product_unique_ID"]},
-                        {"$set": updated_product}
-                    )
+                    # Edited prices are kept in price_history too
+                    update_product_prices(self.products_collection, product["Product_unique_ID"], updated_product)
                     st.success("✅ Product updated successfully!")
                     st.rerun()
 
@@ -451,66 +452,53 @@ class ProductManager:
                 elif not channels:
                     st.warning("Please select at least one channel")
                 else:
-                    from publisher import Publisher
-                    publisher = Publisher()
-                    success_count = 0
+                    products = []
                     for product_name in selected_products:
-                        product_id = product_options[product_name]
-                        product = self.products_collection.find_one({"Product_unique_ID": product_id})
-                        if not product:
+                        product = self.products_collection.find_one({"Product_unique_ID": product_options[product_name]})
+                        if product:
+                            products.append(product)
+                        else:
                             st.error(f"Could not find product: {product_name}")
-                            continue
-                        try:
-                            if "Telegram" in channels:
-                                publisher.telegram_push(product)
-                            if "WhatsApp" in channels:
-                                notification_manager = NotificationManager()
-                                group_name = "Your WhatsApp Group Name"  # Replace with your group name
-                                message = (
-                                    f"🛍️ *{product['product_name']}*\n"
-                                    f"💰 *Current Price:* ₹{product['Product_current_price']}\n"
-                                    f"💸 *MRP:* ₹{product['Product_Buy_box_price']}\n"
-                                    f"🔗 [Buy Now]({product['product_Affiliate_url']})"
-                                )
-                                notification_manager.send_whatsapp_channel_message(group_name, message)
-                            self.products_collection.update_one(
-                                {"Product_unique_ID": product_id},
-                                {"$set": {
-                                    "published_status": True,
-                                    "published_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                }}
-                            )
-                            publisher.published_collection.insert_one({**product, "published_at": datetime.now()})
+                    # Chosen by hand, so sent even if already published at this price
+                    results = get_publish_service().publish_many(
+                        products, channels, source="product_manager", republish=True
+                    )
+                    success_count = 0
+                    for product in products:
+                        success, message = results[product.get("Product_unique_ID")]
+                        if success:
                             success_count += 1
-                        except Exception as e:
-                            st.error(f"Failed to publish {product_name}: {str(e)}")
+                        else:
+                            st.error(f"Failed to publish {product.get('product_name')}: {message}")
                     if success_count > 0:
                         st.success(f"Successfully published {success_count} products!")
                         st.balloons()
 
-        st.subheader("Publisher Service Status")
-        col1, col2 = st.columns(2)
-        with col1:
-            service_status = st.radio(
-                "Publisher service:",
-                ["Check status", "Start service", "Stop service"]
-            )
-            if service_status == "Check status":
-                st.info("Publisher service status is simulated in this interface.")
-            elif service_status == "Start service":
-                st.success("Publisher service start command sent.")
-                st.info("In a production environment, this would start the publisher.py script.")
-            elif service_status == "Stop service":
-                st.warning("Publisher service stop command sent.")
-                st.info("In a production environment, this would stop the publisher.py script.")
-        with col2:
-            st.write("**Publisher Logs:**")
-            st.code("""
-[Publisher] Scheduler started.
-[Publisher] Checking for scheduled publications...
-[SUCCESS] Published Product ABC
-[SUCCESS] Published Product XYZ
-            """, language="text")
+        st.subheader("Publish Queue")
+        st.caption("Jobs in the publish_jobs outbox. Start workers with: python run_publish_worker.py --workers 4")
+        stats = self.publish_outbox.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Pending", stats["pending"])
+        col2.metric("In progress", stats["leased"])
+        col3.metric("Done", stats["done"])
+        col4.metric("Failed", stats["dead"])
+
+        dead_jobs = list(self.publish_outbox.collection.find(
+            {"status": DEAD}, {"product": 0, "message": 0}
+        ).sort("updated_at", -1).limit(50))
+        if dead_jobs:
+            st.write("**Failed jobs:**")
+            st.dataframe(pd.DataFrame([
+                {
+                    "Product": job.get("product_id"),
+                    "Channel": job.get("label"),
+                    "Attempts": job.get("attempts"),
+                    "Last Error": job.get("last_error"),
+                    "Updated": job.get("updated_at"),
+                } for job in dead_jobs
+            ]))
+            if st.button("Retry failed jobs", key="requeue_dead_jobs"):
+                st.success(f"Re-queued {self.publish_outbox.requeue_dead()} jobs")
 
     def configuration_page(self):
         st.header("⚙️ Configuration")
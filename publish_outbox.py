@@ -0,0 +1,618 @@
+import hashlib
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+TELEGRAM = "telegram"
+WHATSAPP = "whatsapp"
+
+
+def publish_targets(channels, whatsapp_config=None):
+    """
+    Expand UI channel names into one target per destination.
+
+    Args:
+        channels (list): Channel names as shown in the UI ("Telegram", "WhatsApp")
+        whatsapp_config (dict): The "whatsapp" config, for its channel_names and group_names
+
+    Returns:
+        list: {"channel", "recipient", "is_channel"} dicts
+    """
+    targets = []
+    if "Telegram" in channels:
+        targets.append({"channel": TELEGRAM, "recipient": None, "is_channel": False})
+    if "WhatsApp" in channels and whatsapp_config:
+        for key, is_channel in [("channel_names", True), ("group_names", False)]:
+            for name in (whatsapp_config.get(key) or "").split(","):
+                if name.strip():
+                    targets.append({"channel": WHATSAPP, "recipient": name.strip(), "is_channel": is_channel})
+    return targets
+
+
+def target_label(target):
+    """Channel label stored in published_channels, e.g. "Telegram" or "WhatsApp group: Deals"."""
+    if target["channel"] == TELEGRAM:
+        return "Telegram"
+    return f"WhatsApp {'channel' if target.get('is_channel') else 'group'}: {target['recipient']}"
+
+
+def idempotency_key(product_id, price, target):
+    """Same product, price and destination -> same key, so a deal is never sent there twice."""
+    try:
+        price = f"{float(price):.2f}"
+    except (TypeError, ValueError):
+        price = str(price)
+    destination = target["channel"]
+    if target.get("recipient"):
+        destination += f":{'channel' if target.get('is_channel') else 'group'}:{target['recipient']}"
+    return hashlib.sha1(f"{product_id}|{price}|{destination}".encode("utf-8")).hexdigest()
+
+
+class PublishOutbox:
+    """
+    Durable queue of publish jobs in the publish_jobs collection.
+
+    One job is one product sent to one destination. Its _id is the
+    idempotency key (product, price, destination), so enqueueing the same
+    deal twice - from a retry, a second click or a second scheduler - is a
+    no-op. Workers claim jobs with an atomic find_one_and_update lease; a job
+    whose worker dies is picked up again once its lease expires. Failed jobs
+    are retried with exponential backoff and dead-lettered (status "dead")
+    after max_attempts.
+    """
+
+    def __init__(self, collection, lease_seconds=300, max_attempts=5, retry_base_seconds=30):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._indexes_checked = False
+
+    def ensure_indexes(self):
+        if self._indexes_checked:
+            return
+        try:
+            self.collection.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+            self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+            self.collection.create_index([("group_id", ASCENDING)])
+            self._indexes_checked = True
+        except Exception as e:
+            print(f"Error creating publish_jobs indexes: {e}")
+
+    def enqueue(self, product, message, targets, source, group_id=None, republish=False, republish_after=None):
+        """
+        Add one job per target.
+
+        Args:
+            product (dict): Product document; a copy is stored with the job
+            message (str): Formatted message, shared by all targets
+            targets (list): From publish_targets()
+            source (str): Caller, for troubleshooting (e.g. "publish_page")
+            group_id (str): Jobs of one publish request share it and one published_products record
+            republish (bool): Re-queue targets that were already published at this price,
+                              e.g. for a push chosen by hand
+            republish_after (timedelta): Re-queue them only if they were done (or dead-lettered)
+                                         at least this long ago, e.g. for a rule's not_recent window
+
+        Returns:
+            list: Job keys, in target order
+        """
+        self.ensure_indexes()
+        product_id = product.get("Product_unique_ID")
+        price = product.get("Product_current_price")
+        group_id = group_id or f"{product_id}:{int(time.time() * 1000)}"
+        snapshot = {k: v for k, v in product.items() if k != "_id"}
+        now = datetime.now()
+
+        keys = []
+        for target in targets:
+            key = idempotency_key(product_id, price, target)
+            job = {
+                "product_id": product_id,
+                "price": price,
+                "channel": target["channel"],
+                "recipient": target.get("recipient"),
+                "is_channel": bool(target.get("is_channel")),
+                "label": target_label(target),
+                "product": snapshot,
+                "message": message,
+                "source": source,
+                "group_id": group_id,
+                "status": PENDING,
+                "attempts": 0,
+                "available_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            result = self.collection.update_one({"_id": key}, {"$setOnInsert": job}, upsert=True)
+            if result.upserted_id is None and (republish or republish_after is not None):
+                if republish:
+                    rearm = {"_id": key, "status": {"$in": [DONE, DEAD]}}
+                else:
+                    cutoff = now - republish_after
+                    rearm = {"_id": key, "$or": [{"status": DONE, "completed_at": {"$lt": cutoff}},
+                                                 {"status": DEAD, "dead_at": {"$lt": cutoff}}]}
+                self.collection.update_one(
+                    rearm,
+                    {"$set": {"status": PENDING, "attempts": 0, "available_at": now, "created_at": now, "updated_at": now,
+                              "group_id": group_id, "message": message, "product": snapshot, "source": source},
+                     "$unset": {"lease_owner": "", "lease_expires_at": "", "last_error": ""}}
+                )
+            keys.append(key)
+        return keys
+
+    def claim(self, worker_id, keys=None, channels=None):
+        """
+        Lease the next available job, or None. Safe with any number of concurrent workers.
+
+        Args:
+            keys (list): Only consider these jobs
+            channels (list): Only consider jobs for these channels (e.g. ["telegram"])
+        """
+        now = datetime.now()
+        query = {"$or": [
+            {"status": PENDING, "available_at": {"$lte": now}},
+            {"status": LEASED, "lease_expires_at": {"$lt": now}},
+        ]}
+        if keys is not None:
+            query["_id"] = {"$in": list(keys)}
+        if channels is not None:
+            query["channel"] = {"$in": list(channels)}
+        return self.collection.find_one_and_update(
+            query,
+            {"$set": {"status": LEASED, "lease_owner": worker_id, "updated_at": now,
+                      "lease_expires_at": now + timedelta(seconds=self.lease_seconds)},
+             "$inc": {"attempts": 1}},
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def extend_lease(self, job, worker_id, seconds=None):
+        """Heartbeat for long sends; returns False if the lease was lost."""
+        result = self.collection.update_one(
+            {"_id": job["_id"], "status": LEASED, "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": datetime.now() + timedelta(seconds=seconds or self.lease_seconds)}}
+        )
+        return result.modified_count == 1
+
+    def complete(self, job, worker_id, status_message=None, send_seconds=None):
+        """Mark a leased job done; returns False if the lease was lost to another worker."""
+        now = datetime.now()
+        result = self.collection.update_one(
+            {"_id": job["_id"], "status": LEASED, "lease_owner": worker_id},
+            {"$set": {"status": DONE, "completed_at": now, "updated_at": now, "result": status_message,
+                      "send_seconds": send_seconds},
+             "$unset": {"lease_expires_at": ""}}
+        )
+        return result.modified_count == 1
+
+    def fail(self, job, worker_id, error):
+        """
+        Record a failed attempt: retry later with backoff, or dead-letter after max_attempts.
+
+        Returns:
+            str: The job's new status (PENDING or DEAD), or None if the lease was lost
+        """
+        now = datetime.now()
+        attempts = job.get("attempts", 1)
+        if attempts >= self.max_attempts:
+            update = {"status": DEAD, "dead_at": now}
+        else:
+            delay = self.retry_base_seconds * (2 ** (attempts - 1))
+            update = {"status": PENDING, "available_at": now + timedelta(seconds=delay)}
+        update.update({"last_error": str(error)[:500], "updated_at": now})
+        result = self.collection.update_one(
+            {"_id": job["_id"], "status": LEASED, "lease_owner": worker_id},
+            {"$set": update, "$unset": {"lease_expires_at": "", "lease_owner": ""},
+             "$push": {"errors": {"$each": [{"at": now, "error": str(error)[:500]}], "$slice": -10}}}
+        )
+        return update["status"] if result.modified_count == 1 else None
+
+    def get_jobs(self, keys):
+        """Returns: dict of key -> job"""
+        return {job["_id"]: job for job in self.collection.find({"_id": {"$in": list(keys)}}, {"product": 0})}
+
+    def wait(self, keys, timeout=120, poll_seconds=1):
+        """
+        Wait until none of the jobs is leased any more (done, dead or waiting for a retry).
+
+        Returns:
+            dict: key -> job
+        """
+        deadline = time.time() + timeout
+        while True:
+            jobs = self.get_jobs(keys)
+            if all(job.get("status") != LEASED for job in jobs.values()) or time.time() >= deadline:
+                return jobs
+            time.sleep(poll_seconds)
+
+    def requeue_dead(self, keys=None):
+        """Give dead-lettered jobs a fresh set of attempts. Returns the number re-queued."""
+        query = {"status": DEAD}
+        if keys is not None:
+            query["_id"] = {"$in": list(keys)}
+        result = self.collection.update_many(
+            query, {"$set": {"status": PENDING, "attempts": 0, "available_at": datetime.now()}}
+        )
+        return result.modified_count
+
+    def stats(self):
+        """Returns: dict of status -> job count"""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+
+class PublishWorker:
+    """
+    Sends outbox jobs through a NotificationPublisher and records successful
+    ones in products / published_products. A sent job stays leased until its
+    records are written and is only then marked done, so a crash or a failed
+    write leaves it to be retried instead of done without a record. Run many
+    of these (see run_publish_worker.py) to publish in parallel, or call
+    publish_now() to enqueue and send one product inline.
+    """
+
+    def __init__(self, outbox, notification_publisher, worker_id=None, channels=None):
+        """
+        Args:
+            channels (list): Only process jobs for these channels; None means all
+        """
+        self.outbox = outbox
+        self.notification_publisher = notification_publisher
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.channels = channels
+        database = outbox.collection.database
+        self.products = database["products"]
+        self.published_products = database["published_products"]
+        self._pending_records = []  # (job, status, send_seconds, operations) collected while batching
+        self._pending_since = None
+        self._batch_depth = 0  # open batch_records() contexts, across threads
+        self._records_lock = threading.Lock()
+
+    RECORD_BATCH_SIZE = 100
+    # Sent jobs wait at most this long for their records, well within their lease
+    RECORD_FLUSH_SECONDS = 30
+    # Extra lease per message while a WhatsApp batch is sent, so no other worker takes its jobs
+    WHATSAPP_BATCH_LEASE_PER_JOB = 60
+
+    @contextmanager
+    def batch_records(self):
+        """
+        Collect publication records and write them with bulk_write instead of one update per job;
+        their jobs are completed once the records are written. Contexts may overlap (nested, or other threads sharing the worker); each flushes what is
+        pending when it exits, and records are written directly once none is open.
+        """
+        with self._records_lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._records_lock:
+                self._batch_depth -= 1
+            self.flush_records()
+
+    def flush_records(self):
+        """Write collected publication records and complete their jobs; returns how many jobs were settled."""
+        with self._records_lock:
+            if not self._pending_records:
+                return 0
+            pending, self._pending_records = self._pending_records, []
+            self._pending_since = None
+        self._write_records(pending)
+        return len(pending)
+
+    def _write_records(self, entries):
+        """
+        Write the records of sent jobs, then mark each job done. A job whose records
+        could not be written goes back to the queue through outbox.fail().
+
+        Args:
+            entries (list): (job, status, send_seconds, operations) tuples
+        """
+        errors = {}  # entry index -> error
+        # Ordered, so upserts of the same publish request never race each other
+        for collection in (self.published_products, self.products):
+            batch = [(index, op) for index, entry in enumerate(entries) if index not in errors
+                     for target, op in entry[3] if target is collection]
+            if not batch:
+                continue
+            try:
+                collection.bulk_write([op for index, op in batch], ordered=True)
+            except BulkWriteError as e:
+                # An ordered bulk write stops at its first error; everything before it was applied
+                failed_at = e.details["writeErrors"][0]["index"] if e.details.get("writeErrors") else 0
+                for index, op in batch[failed_at:]:
+                    errors.setdefault(index, e)
+            except Exception as e:
+                for index, op in batch:
+                    errors.setdefault(index, e)
+
+        for index, (job, status, send_seconds, operations) in enumerate(entries):
+            if index in errors:
+                new_status = self.outbox.fail(job, self.worker_id, f"Error writing publication record: {errors[index]}")
+                print(f"❌ Publication record for {job['label']} / {job['product_id']} not written ({new_status}): "
+                      f"{errors[index]}")
+            else:
+                self.outbox.complete(job, self.worker_id, status, send_seconds)
+
+    def send(self, job):
+        """
+        Returns:
+            tuple: (success, status message)
+        """
+        product = job.get("product") or {}
+        message = job.get("message") or self.notification_publisher.format_product_message(product)
+        if job["channel"] == TELEGRAM:
+            success, error = self.notification_publisher.telegram_push(message, product.get("Product_image_path"))
+            return success, "Sent" if success else error
+        if job["channel"] == WHATSAPP:
+            success = self.notification_publisher.whatsapp_push(product, job["recipient"], message,
+                                                                is_channel=job.get("is_channel", False))
+            return success, "Sent" if success else f"Failed to send to {job['recipient']}"
+        return False, f"Unknown channel {job['channel']}"
+
+    def process(self, job):
+        """Send one leased job and settle it (done, retry or dead)."""
+        started = time.perf_counter()
+        try:
+            success, status = self.send(job)
+        except Exception as e:
+            traceback.print_exc()
+            success, status = False, f"Error: {str(e)}"
+        return self._settle(job, success, status, round(time.perf_counter() - started, 3))
+
+    def _settle(self, job, success, status, send_seconds):
+        if not success:
+            new_status = self.outbox.fail(job, self.worker_id, status)
+            print(f"❌ Publish job {job['label']} for {job['product_id']} failed ({new_status}): {status}")
+            return False, status
+
+        self._record(job, status, send_seconds)
+        return True, status
+
+    def run_once(self, keys=None, channels=None):
+        """Claim and process one job. Returns the job, or None if nothing was available."""
+        job = self.outbox.claim(self.worker_id, keys=keys, channels=channels or self.channels)
+        if job:
+            self.process(job)
+        return job
+
+    def drain(self, keys=None, max_jobs=None, channels=None, pacing_seconds=0):
+        """
+        Process available jobs until none is left. Returns the number processed.
+
+        Args:
+            pacing_seconds (float): Delay between sends, e.g. to stay under Telegram's rate limit
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            job = self.outbox.claim(self.worker_id, keys=keys, channels=channels or self.channels)
+            if not job:
+                break
+            if processed and pacing_seconds:
+                time.sleep(pacing_seconds)
+            self.process(job)
+            processed += 1
+        return processed
+
+    def drain_whatsapp_batches(self, keys):
+        """
+        Send a publish request's WhatsApp jobs per recipient: each chat is opened
+        once and gets its products in key order (best first). Recipients go out
+        in parallel when a sender pool or the Cloud API is configured.
+
+        Returns:
+            int: Number of jobs processed
+        """
+        jobs = []
+        while True:
+            job = self.outbox.claim(self.worker_id, keys=keys, channels=[WHATSAPP])
+            if not job:
+                break
+            jobs.append(job)
+        if not jobs:
+            return 0
+        order = {key: index for index, key in enumerate(keys)}
+        jobs.sort(key=lambda job: order.get(job["_id"], len(order)))
+        lease_seconds = self.outbox.lease_seconds + self.WHATSAPP_BATCH_LEASE_PER_JOB * len(jobs)
+        for job in jobs:
+            self.outbox.extend_lease(job, self.worker_id, lease_seconds)
+
+        per_recipient = {}
+        for job in jobs:
+            per_recipient.setdefault((job["recipient"], job.get("is_channel", False)), []).append(job)
+        # Recipients that get the same products share one whatsapp_push_batches call
+        groups = {}
+        for recipient, recipient_jobs in per_recipient.items():
+            groups.setdefault(tuple(job["product_id"] for job in recipient_jobs), []).append(recipient)
+
+        for recipients in groups.values():
+            items = [(job.get("product") or {}, job.get("message")) for job in per_recipient[recipients[0]]]
+            started = time.perf_counter()
+            try:
+                results = self.notification_publisher.whatsapp_push_batches(recipients, items)
+                error = "No result"
+            except Exception as e:
+                traceback.print_exc()
+                results, error = {}, f"Error: {str(e)}"
+            send_seconds = round((time.perf_counter() - started) / len(items), 3)
+            for recipient in recipients:
+                outcomes = results.get(recipient) or []
+                for index, job in enumerate(per_recipient[recipient]):
+                    success, status = outcomes[index] if index < len(outcomes) else (False, error)
+                    if not success:
+                        status = f"Failed to send to {job['recipient']}: {status}"
+                    self._settle(job, success, status or "Sent", send_seconds)
+        return len(jobs)
+
+    def fan_out(self, keys, targets, pacing_seconds=0):
+        """
+        Drain a publish request's jobs with one queue per channel, so the
+        Telegram sends and the WhatsApp sends run at the same time. Telegram
+        jobs go one by one, pacing_seconds apart; WhatsApp jobs are sent per
+        recipient in one batch (see drain_whatsapp_batches).
+
+        Returns:
+            int: Number of jobs processed
+        """
+        channels = [c for c in (TELEGRAM, WHATSAPP) if any(t["channel"] == c for t in targets)]
+        if self.channels is not None:
+            channels = [c for c in channels if c in self.channels]
+
+        def drain_channel(channel):
+            if channel == WHATSAPP:
+                return self.drain_whatsapp_batches(keys)
+            return self.drain(keys, channels=[channel], pacing_seconds=pacing_seconds)
+
+        if len(channels) <= 1:
+            return sum(drain_channel(channel) for channel in channels)
+        with ThreadPoolExecutor(max_workers=len(channels), thread_name_prefix="publish-fan-out") as executor:
+            return sum(executor.map(drain_channel, channels))
+
+    def run_forever(self, poll_seconds=2, stop_event=None):
+        print(f"[PublishWorker {self.worker_id}] started")
+        while not (stop_event and stop_event.is_set()):
+            try:
+                if not self.run_once():
+                    time.sleep(poll_seconds)
+            except Exception as e:
+                print(f"[PublishWorker {self.worker_id}] Error: {e}")
+                time.sleep(poll_seconds)
+
+    def publish_now(self, product, targets, source, republish=False, timeout=120, message=None, republish_after=None):
+        """
+        Enqueue a product for the given targets and send it right away.
+
+        Returns:
+            tuple: (success, message); success if at least one target is published
+        """
+        return self.publish_many([(product, message)], targets, source, republish, timeout,
+                                 republish_after=republish_after)[0]
+
+    def publish_many(self, items, targets, source, republish=False, timeout=120, pacing_seconds=0,
+                     republish_after=None):
+        """
+        Enqueue several products for the same targets and send them right away,
+        one queue per channel, writing their publication records in bulk.
+
+        Args:
+            items (list): (product, message) tuples, in send order; message None means format it here
+            pacing_seconds (float): Delay between Telegram sends
+            republish, republish_after: See PublishOutbox.enqueue
+
+        Returns:
+            list: (success, message) per item, in input order
+        """
+        started = datetime.now()
+        # MongoDB keeps datetimes to the millisecond; compare completed_at at that precision
+        started = started.replace(microsecond=started.microsecond // 1000 * 1000)
+        keys_per_item = []
+        for product, message in items:
+            message = message or self.notification_publisher.format_product_message(product)
+            keys_per_item.append(self.outbox.enqueue(product, message, targets, source, republish=republish,
+                                                     republish_after=republish_after))
+        all_keys = [key for keys in keys_per_item for key in keys]
+
+        with self.batch_records():
+            self.fan_out(all_keys, targets, pacing_seconds)
+        jobs = self.outbox.wait(all_keys, timeout=timeout)
+        return [self._summarize(keys, jobs, started) for keys in keys_per_item]
+
+    def _summarize(self, keys, jobs, started):
+        published, skipped, errors = [], [], []
+        for key in keys:
+            job = jobs.get(key, {})
+            label = job.get("label", key)
+            if job.get("status") == DONE:
+                # Done before this request: an earlier send at this price, nothing was sent now
+                if job.get("completed_at") and job["completed_at"] < started:
+                    skipped.append(label)
+                else:
+                    published.append(label)
+            elif job.get("status") == PENDING and job.get("attempts"):
+                errors.append(f"{label}: {job.get('last_error')} (will retry)")
+            elif job.get("status") == DEAD:
+                errors.append(f"{label}: {job.get('last_error')} (gave up)")
+            else:
+                errors.append(f"{label}: still {job.get('status', 'unknown')}")
+
+        if published:
+            message = f"Published to {', '.join(published)}"
+            if skipped:
+                message += f". Skipped (already published at this price): {', '.join(skipped)}"
+            if errors:
+                message += f". Errors: {'; '.join(errors)}"
+            return True, message
+        if skipped and not errors:
+            return False, f"Skipped: already published at this price to {', '.join(skipped)}"
+        message = f"Failed to publish to any channels: {'; '.join(errors) or 'no channels configured'}"
+        if skipped:
+            message += f". Skipped (already published at this price): {', '.join(skipped)}"
+        return False, message
+
+    def _record(self, job, status, send_seconds=None):
+        """
+        One published_products record per product and publish request, listing all its
+        channels. publish_latency_seconds is the time from the request to its last
+        successful send, so it covers queueing, retries and the slowest channel.
+        The job is completed once these are written (see _write_records).
+        """
+        now = datetime.now()
+        product = job.get("product") or {}
+        latency = (now - job["created_at"]).total_seconds() if job.get("created_at") else None
+        operations = [(self.published_products, UpdateOne(
+            {"group_id": job["group_id"], "product_id": job["product_id"]},
+            {"$setOnInsert": {
+                "product_name": product.get("product_name"),
+                "product_price": job.get("price"),
+                "published_date": now,
+                "message": job.get("message"),
+            },
+             "$addToSet": {"channels": job["label"]},
+             "$push": {"channel_timings": {"channel": job["label"], "send_seconds": send_seconds,
+                                           "attempts": job.get("attempts"), "completed_at": now}},
+             "$max": {"publish_latency_seconds": round(latency, 3) if latency is not None else 0}},
+            upsert=True,
+        )), (self.products, UpdateOne(
+            {"Product_unique_ID": job["product_id"]},
+            {"$set": {
+                "published_status": True,
+                "Publish": False,
+                "Publish_time": None,
+                "Last_published_date": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "last_published_price": job.get("price"),
+            }, "$addToSet": {"published_channels": job["label"]}}
+        ))]
+        self._write(job, status, send_seconds, operations)
+
+    def _write(self, job, status, send_seconds, operations):
+        """Write now and complete the job, or collect for flush_records() while batching."""
+        entry = (job, status, send_seconds, operations)
+        with self._records_lock:
+            if self._batch_depth:
+                self._pending_records.append(entry)
+                if self._pending_since is None:
+                    self._pending_since = time.monotonic()
+                flush = (len(self._pending_records) >= self.RECORD_BATCH_SIZE
+                         or time.monotonic() - self._pending_since >= self.RECORD_FLUSH_SECONDS)
+            else:
+                flush = None
+        if flush is None:
+            self._write_records([entry])
+        elif flush:
+            self.flush_records()
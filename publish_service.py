@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+
+from config_manager import ConfigManager
+from db.db_manager import DataManager
+from notification_publisher import NotificationPublisher
+from publish_outbox import PublishOutbox, PublishWorker, publish_targets
+
+
+class PublishService:
+    """
+    The one publish path: format, send and record a product the same way
+    whichever page, scheduler or script asks for it.
+
+    A service owns the resources worth sharing between callers: one
+    MongoDB client, one NotificationPublisher (pooled Telegram connections,
+    WhatsApp browser and pool, Telegram photo ids and downloaded images),
+    a cache of formatted messages, and the publish_jobs outbox whose
+    worker writes publication records in bulk. Use get_publish_service()
+    to share one per process.
+    """
+
+    MESSAGE_CACHE_SIZE = 1024
+    # Fields format_product_message reads; a message is reused while they are unchanged
+    MESSAGE_FIELDS = ("product_name", "Product_current_price", "Product_MRP", "Product_Buy_box_price",
+                      "product_Affiliate_url")
+
+    def __init__(self, config_manager=None, db=None, notification_publisher=None):
+        """
+        Args:
+            config_manager (ConfigManager): Defaults to the publisher's, or a new one
+            db (DataManager): Defaults to the publisher's, or a new one
+            notification_publisher (NotificationPublisher): Defaults to a new one
+        """
+        if config_manager is None:
+            config_manager = notification_publisher.config_manager if notification_publisher else ConfigManager()
+        self.config_manager = config_manager
+        self.notification_publisher = notification_publisher or NotificationPublisher(config_manager)
+        self.db = db or self.notification_publisher._db or DataManager()
+
+        # The publisher sends through this service and stores its timings with the same client
+        if self.notification_publisher._db is None:
+            self.notification_publisher._db = self.db
+        if self.notification_publisher._publish_service is None:
+            self.notification_publisher._publish_service = self
+
+        self.outbox = PublishOutbox(self.db.db["publish_jobs"])
+        self.worker = PublishWorker(self.outbox, self.notification_publisher)
+        self._message_cache = OrderedDict()
+        self._message_lock = threading.Lock()
+
+    def format_message(self, product):
+        """Formatted product message, cached by the fields it is built from."""
+        key = tuple(str(product.get(field)) for field in self.MESSAGE_FIELDS)
+        with self._message_lock:
+            message = self._message_cache.get(key)
+            if message is not None:
+                self._message_cache.move_to_end(key)
+                return message
+        message = self.notification_publisher.format_product_message(product)
+        with self._message_lock:
+            self._message_cache[key] = message
+            while len(self._message_cache) > self.MESSAGE_CACHE_SIZE:
+                self._message_cache.popitem(last=False)
+        return message
+
+    def targets(self, channels):
+        """Outbox targets for UI channel names ("Telegram", "WhatsApp")."""
+        return publish_targets(channels, self.config_manager.get_whatsapp_config())
+
+    def publish(self, product, channels=("Telegram",), source="publish_service", republish=False,
+                republish_after=None):
+        """
+        Publish one product to the given channels, recording it in products and published_products.
+
+        Args:
+            product (dict): Product document
+            channels (list): "Telegram" and/or "WhatsApp"
+            source (str): Caller name stored with the jobs
+            republish (bool): Send again even if already published at this price
+            republish_after (timedelta): Send again only if that was at least this long ago
+
+        Returns:
+            tuple: (success, message)
+        """
+        return self.worker.publish_now(product, self.targets(channels), source, republish=republish,
+                                       message=self.format_message(product), republish_after=republish_after)
+
+    def publish_many(self, products, channels=("Telegram",), source="publish_service", republish=False,
+                     pacing_seconds=0, republish_after=None):
+        """
+        Publish several products in one go: WhatsApp gets them per recipient in one
+        batch, in the given order, and records are written in bulk.
+
+        Args:
+            pacing_seconds (float): Delay between Telegram sends
+            republish, republish_after: As for publish()
+
+        Returns:
+            dict: Product ID -> (success, message)
+        """
+        results = self.worker.publish_many([(product, self.format_message(product)) for product in products],
+                                           self.targets(channels), source, republish=republish,
+                                           pacing_seconds=pacing_seconds, republish_after=republish_after)
+        return {product.get("Product_unique_ID"): result for product, result in zip(products, results)}
+
+    def send_telegram(self, message, image_path=None):
+        """
+        Send a ready-made message to the configured Telegram chats without recording it.
+
+        Returns:
+            tuple: (success, error_message)
+        """
+        return self.notification_publisher.telegram_push(message, image_path)
+
+    def close(self):
+        self.worker.flush_records()
+        self.notification_publisher.close()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_publish_service(config_manager=None):
+    """One PublishService per process, shared by every caller that doesn't bring its own publisher."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PublishService(config_manager)
+        return _service
@@ -20,6 +20,7 @@ class Publisher:
         self.email_sender = EmailSender()
         self.products_collection = self.db["products"]
         self.notification_publisher = notification_publisher
+        self._publish_service = None  # Lazy initialization, see telegram_push
         self.config = self.load_config()
 
     def load_config(self):
@@ -30,67 +31,47 @@ class Publisher:
             print("Failed to load config:", e)
             return {}
 
+    @property
+    def publish_service(self):
+        """The shared PublishService, built on this publisher's NotificationPublisher when one was given."""
+        if self._publish_service is None:
+            from publish_service import get_publish_service
+            if self.notification_publisher is not None:
+                self._publish_service = self.notification_publisher.publish_service
+            else:
+                self._publish_service = get_publish_service()
+        return self._publish_service
+
     def telegram_push(self, product_data):
+        """
+        Send a product (database document or scraper result) or a ready-made message
+        to the configured Telegram chats through the PublishService.
+
+        Returns:
+            bool: True if at least one chat received it
+        """
         try:
+            service = self.publish_service
             # First, check if product_data is a string (already formatted message)
             if isinstance(product_data, str):
                 message = product_data
+            elif 'product_name' in product_data:
+                # Format for database product structure
+                message = service.format_message(product_data)
+            elif 'title' in product_data:
+                # Format for direct scraper result structure
+                message = service.format_message({
+                    "product_name": product_data.get('title'),
+                    "Product_current_price": product_data.get('current_price'),
+                    "Product_MRP": product_data.get('mrp'),
+                    "product_Affiliate_url": product_data.get('buy_now_url', '#'),
+                })
             else:
-                # If not, check if it's a product dictionary
-                if 'product_name' in product_data:
-                    # Format for database product structure
-                    message = (
-                        f"🛍️ *{product_data.get('product_name', 'Unknown Product')}*\n\n"
-                        f"💰 *Deal Price:* ₹{product_data.get('Product_current_price', 'N/A')} ✅\n"
-                        f"💸 *MRP:* ₹{product_data.get('Product_MRP', product_data.get('Product_Buy_box_price', 'N/A'))} ❌\n\n"
-                        f"🔗 [Buy Now]({product_data.get('product_Affiliate_url', '#')})"
-                    )
-                elif 'title' in product_data:
-                    # Format for direct scraper result structure
-                    message = (
-                        f"🛍️ *{product_data.get('title', 'Unknown Product')}*\n\n"
-                        f"💰 *Deal Price:* ₹{product_data.get('current_price', 'N/A')} ✅\n"
-                        f"💸 *MRP:* ₹{product_data.get('mrp', product_data.get('current_price', 0) * 1.2 if product_data.get('current_price') else 'N/A')} ❌\n\n"
-                        f"🔗 [Buy Now]({product_data.get('buy_now_url', '#')})"
-                    )
-                else:
-                    raise ValueError("Unknown product data format")
-
-            # Check if Telegram configuration exists in the flat structure
-            bot_token = self.config.get("telegram_bot_token")
-            chat_id = self.config.get("telegram_chat_id")
-            
-            # If not found in flat structure, try nested structure
-            if not bot_token or not chat_id:
-                if "telegram" in self.config:
-                    telegram_config = self.config["telegram"]
-                    bot_token = telegram_config.get("bot_token")
-                    chat_id = telegram_config.get("chat_id")
-
-            # If still not found, raise exception
-            if not bot_token or not chat_id:
-                print("Telegram configuration is missing in config.json. Please add telegram_bot_token and telegram_chat_id.")
-                
-                # Create a sample config structure to show in logs
-                sample_config = {
-                    "telegram_bot_token": "YOUR_BOT_TOKEN_HERE",
-                    "telegram_chat_id": "YOUR_CHAT_ID_HERE"
-                }
-                print(f"Sample config: {json.dumps(sample_config, indent=2)}")
-                raise Exception("Telegram configuration is missing")
-                
-            print(f"[DEBUG] Sending to Telegram with bot_token: {bot_token[:5]}... and chat_id: {chat_id}")
-            print(f"[DEBUG] Message: {message[:100]}...")
-
-            response = requests.post(
-                f"https://api.telegram.org/bot{bot_token}/sendMessage",
-                data={"chat_id": chat_id, "text": message, "parse_mode": "Markdown"}
-            )
-
-            print(f"[DEBUG] Telegram API response: {response.status_code} - {response.text[:200]}")
+                raise ValueError("Unknown product data format")
 
-            if response.status_code != 200:
-                raise Exception(f"Telegram API error: {response.text}")
+            success, error = service.send_telegram(message)
+            if not success:
+                raise Exception(f"Telegram API error: {error}")
             print("✅ Telegram message sent successfully")
             return True
         except Exception as e:
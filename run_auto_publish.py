@@ -0,0 +1,64 @@
+# run_auto_publish.py
+"""
+Run automatic publishing as a worker process, without the Streamlit app.
+
+    python run_auto_publish.py            # loop: run whenever next_run is due
+    python run_auto_publish.py --once     # one run now, exit code 1 on error
+
+Uses the filters, channels and frequency saved from the Automatic Publish tab.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from auto_publish_engine import AutoPublishEngine
+from config_manager import ConfigManager
+from utils.leader_lock import LOCK_COLLECTION, LeaderLock
+
+
+def run_once(engine):
+    result = engine.run()
+    print(f"[AutoPublish] {result.status}: checked {result.products_checked}, eligible {result.eligible}, "
+          f"published {result.published}, failed {result.failed} in {result.duration_seconds:.1f}s")
+    return result
+
+
+def run_forever(engine, poll_seconds=60):
+    # Shared with the Publish page's scheduler, so only one of them runs each scheduled job
+    leader_lock = LeaderLock(engine.db.db[LOCK_COLLECTION], "auto_publish", ttl_seconds=max(180, poll_seconds * 3))
+    while True:
+        try:
+            if not leader_lock.ensure():
+                time.sleep(poll_seconds)
+                continue
+            config = engine.db.get_auto_publish_config()
+            next_run = config.get("next_run")
+            if config.get("active", False) and next_run:
+                if datetime.now() >= datetime.strptime(next_run, "%Y-%m-%d %H:%M:%S"):
+                    with leader_lock.keep_alive():
+                        run_once(engine)
+        except Exception as e:
+            print(f"[AutoPublish] Error checking schedule: {e}")
+        time.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run automatic publishing without the UI")
+    parser.add_argument("--once", action="store_true", help="Run one job now and exit")
+    parser.add_argument("--poll-seconds", type=int, default=60, help="How often to check next_run")
+    args = parser.parse_args()
+
+    engine = AutoPublishEngine(ConfigManager())
+    try:
+        if args.once:
+            result = run_once(engine)
+            sys.exit(0 if result.status != "error" else 1)
+        run_forever(engine, args.poll_seconds)
+    finally:
+        if engine._publish_service:
+            engine._publish_service.close()
+
+
+if __name__ == "__main__":
+    main()
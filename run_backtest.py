@@ -0,0 +1,98 @@
+# run_backtest.py
+"""
+Replay the auto-publish rules over recorded price history: nothing is sent or written.
+
+    python run_backtest.py --days 90
+    python run_backtest.py --start 2025-01-01 --end 2025-03-31 --filter days_threshold=7 --budget Telegram=10
+    python run_backtest.py --days 30 --filter price_change=false --output backtest.json
+
+Filters, channels, budgets and frequency default to the saved auto-publish config.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+from db.db_manager import DataManager
+from utils.backtest import backtest
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_value(value):
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def parse_pairs(pairs, option):
+    parsed = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"{option} expects KEY=VALUE, got {pair!r}")
+        parsed[key] = parse_value(value)
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest auto-publish filters over stored price history")
+    parser.add_argument("--start", type=parse_date, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="Last day (YYYY-MM-DD, default: now)")
+    parser.add_argument("--days", type=int, default=30, help="Days before --end when --start is not given")
+    parser.add_argument("--frequency", type=int, help="Minutes between runs")
+    parser.add_argument("--channels", nargs="+", help="Channels, e.g. Telegram WhatsApp")
+    parser.add_argument("--filter", action="append", metavar="KEY=VALUE",
+                        help="Override a filter (never_published, price_dropped, not_recent, days_threshold, price_change)")
+    parser.add_argument("--budget", action="append", metavar="CHANNEL=N", help="Messages per run for a channel")
+    parser.add_argument("--output", help="Also write the result as JSON to this file")
+    args = parser.parse_args()
+
+    end = args.end + timedelta(days=1) - timedelta(seconds=1) if args.end else datetime.now()
+    start = args.start or end - timedelta(days=args.days)
+
+    db = DataManager()
+    auto_config = db.get_auto_publish_config()
+    filters = {**auto_config.get("filters", {}), **parse_pairs(args.filter, "--filter")}
+    budgets = parse_pairs(args.budget, "--budget") if args.budget else None
+    try:
+        result = backtest(db, start, end, filters=filters, channels=args.channels, budgets=budgets,
+                          frequency_minutes=args.frequency)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    daily = result["simulated"].add_suffix(" (simulated)").join(result["actual"].add_suffix(" (actual)"))
+    print(daily.to_string())
+    print(f"\n{result['runs']} runs over {result['products']} products and {result['price_changes']} price changes "
+          f"in {result['elapsed_seconds']}s (load {result['load_seconds']}s)")
+    for channel, totals in result["totals"].items():
+        print(f"  {channel}: {totals['simulated']} simulated, {totals['actual']} actually sent")
+
+    if args.output:
+        output = {key: value for key, value in result.items() if key not in ("simulated", "actual")}
+        output.update({
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "filters": filters,
+            "daily": {
+                day.strftime("%Y-%m-%d"): {
+                    channel: {"simulated": int(result["simulated"].at[day, channel]),
+                              "actual": int(result["actual"].at[day, channel])}
+                    for channel in result["simulated"].columns
+                }
+                for day in result["simulated"].index
+            },
+        })
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
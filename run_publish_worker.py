@@ -0,0 +1,75 @@
+# run_publish_worker.py
+"""
+Run publish workers that drain the publish_jobs outbox.
+
+    python run_publish_worker.py                  # one worker, all channels
+    python run_publish_worker.py --workers 4      # 4 processes in parallel
+
+Jobs are leased atomically, so any number of workers (on any number of
+machines) can run at once without sending a job twice. Only the first
+--whatsapp-workers processes take WhatsApp jobs, because Selenium
+profiles cannot be shared between processes; the rest take Telegram jobs.
+"""
+import argparse
+import multiprocessing
+import signal
+
+from config_manager import ConfigManager
+from db.db_manager import DataManager
+from notification_publisher import NotificationPublisher
+from publish_outbox import TELEGRAM, WHATSAPP, PublishOutbox, PublishWorker
+
+
+def run_worker(index, channels, poll_seconds, lease_seconds, max_attempts):
+    stop_event = multiprocessing.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    db = DataManager()
+    notification_publisher = NotificationPublisher(ConfigManager())
+    outbox = PublishOutbox(db.db["publish_jobs"], lease_seconds=lease_seconds, max_attempts=max_attempts)
+    outbox.ensure_indexes()
+    worker = PublishWorker(outbox, notification_publisher, channels=channels)
+    print(f"[PublishWorker {index}] channels: {', '.join(channels)}")
+    try:
+        worker.run_forever(poll_seconds, stop_event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        notification_publisher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send queued publish jobs")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--whatsapp-workers", type=int, default=1,
+                        help="How many of the workers also send WhatsApp jobs")
+    parser.add_argument("--poll-seconds", type=float, default=2, help="Wait between polls when the queue is empty")
+    parser.add_argument("--lease-seconds", type=int, default=300,
+                        help="How long a job stays claimed before another worker may take it over")
+    parser.add_argument("--max-attempts", type=int, default=5, help="Attempts before a job is marked failed")
+    args = parser.parse_args()
+
+    worker_args = [
+        (i, [TELEGRAM, WHATSAPP] if i < args.whatsapp_workers else [TELEGRAM],
+         args.poll_seconds, args.lease_seconds, args.max_attempts)
+        for i in range(max(args.workers, 1))
+    ]
+    if len(worker_args) == 1:
+        run_worker(*worker_args[0])
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, args=a, name=f"publish-worker-{a[0]}") for a in worker_args]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
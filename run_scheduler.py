@@ -12,12 +12,13 @@ import time
 from threading import Thread
 from ui.product_page import ProductPage
 from db.db_manager import DataManager
+from utils.leader_lock import LOCK_COLLECTION, LeaderLock, run_as_leader
 
 def main():
     client = pymongo.MongoClient("mongodb://localhost:27017/")
     db = client["ramesh"]
     products_collection = db["products"]
-    published_collection = client["published_data"]["products"]
+    published_collection = db["published_products"]
 
     config_manager = ConfigManager()
     config = config_manager.get_config()
@@ -81,8 +82,9 @@ def main():
     notification_publisher = NotificationPublisher(config_manager)
     product_page = ProductPage(notification_publisher)
 
-    # Define the scheduled job with mutex
+    # Define the scheduled job with mutex; the lease keeps other scheduler processes from running it too
     publishing_in_progress = False
+    publishing_lock = LeaderLock(db[LOCK_COLLECTION], "scheduled_publishing")
 
     def scheduled_publishing_job():
         nonlocal publishing_in_progress
@@ -93,7 +95,7 @@ def main():
         try:
             publishing_in_progress = True
             print("[Scheduler] Running scheduled publishing job...")
-            product_page.process_scheduled_publishing()
+            run_as_leader(publishing_lock, "Scheduler", product_page.process_scheduled_publishing)
         finally:
             publishing_in_progress = False
 
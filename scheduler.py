@@ -3,6 +3,7 @@ import threading
 import time
 from datetime import datetime, timedelta
 from utils.email_sender import EmailSender
+from utils.leader_lock import LOCK_COLLECTION, LeaderLock, run_as_leader
 
 
 class Scheduler:
@@ -14,15 +15,22 @@ class Scheduler:
         self.config_manager = config_manager
         self.jobs = []
         self.is_running = False  
+        # Only the process holding this lease runs jobs; the others stand by and take over if it dies
+        self.leader_lock = LeaderLock(products_collection.database[LOCK_COLLECTION], "scheduler")
+
+    def _leader_job(self, name, func):
+        """Wrap a job so it only runs in the leading scheduler process."""
+        return lambda: run_as_leader(self.leader_lock, name, func)
 
     def start(self):
         """
         Start the scheduling in a background thread.
         """
-        schedule.every(6).hours.do(self.hands_off_job)
-        schedule.every().day.at("06:00").do(self.daily_report_job)
-        schedule.every().sunday.at("06:00").do(self.weekly_report_job)
-        schedule.every(1).month.at("06:00").do(self.monthly_report_job)
+        self.leader_lock.start_heartbeat()
+        schedule.every(6).hours.do(self._leader_job("Hands-Off", self.hands_off_job))
+        schedule.every().day.at("06:00").do(self._leader_job("Daily Report", self.daily_report_job))
+        schedule.every().sunday.at("06:00").do(self._leader_job("Weekly Report", self.weekly_report_job))
+        schedule.every(1).month.at("06:00").do(self._leader_job("Monthly Report", self.monthly_report_job))
 
         thread = threading.Thread(target=self.run_schedule_loop, daemon=True)
         thread.start()
@@ -91,13 +99,15 @@ class Scheduler:
             print("⚠️ Scheduler is already running.")
             return
         self.is_running = True
+        self.leader_lock.start_heartbeat()
         print("Scheduler is running...")
         
 
         for job in self.jobs:
+            job_func = self._leader_job(job["kwargs"].get("name", job["func"].__name__), job["func"])
             if job["trigger"] == "interval":
                 hours = job["kwargs"].get("hours", 1)
-                schedule.every(hours).hours.do(job["func"])
+                schedule.every(hours).hours.do(job_func)
                 print(f"Scheduled {job['kwargs'].get('name', job['func'].__name__)} to run every {hours} hours")
             elif job["trigger"] == "cron":
                 hour = job["kwargs"].get("hour")
@@ -106,14 +116,14 @@ class Scheduler:
                 
                 if day_of_week:
                     if hour is not None:
-                        schedule.every().day.at(f"{hour:02d}:00").do(job["func"])
+                        schedule.every().day.at(f"{hour:02d}:00").do(job_func)
                         print(f"Scheduled {job['kwargs'].get('name', job['func'].__name__)} to run at {hour:02d}:00 on {day_of_week}")
                 elif day:
                     if hour is not None:
                         print(f"Scheduled {job['kwargs'].get('name', job['func'].__name__)} to run at {hour:02d}:00 on day {day} of month")
                 else:
                     if hour is not None:
-                        schedule.every().day.at(f"{hour:02d}:00").do(job["func"])
+                        schedule.every().day.at(f"{hour:02d}:00").do(job_func)
                         print(f"Scheduled {job['kwargs'].get('name', job['func'].__name__)} to run daily at {hour:02d}:00")
 
         self.run_schedule_loop()
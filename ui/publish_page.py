@@ -3,20 +3,29 @@ import pandas as pd
 from datetime import datetime, timedelta, time
 import time as time_module
 from threading import Thread
-from db.db_manager import DataManager
-from notification_publisher import NotificationPublisher
 import uuid
 import schedule
 import traceback
-from monitors.amazon_monitor import AmazonIndiaMonitor
+from auto_publish_engine import AutoPublishEngine
+from publish_service import get_publish_service
+from utils.backtest import backtest
+from utils.leader_lock import LOCK_COLLECTION, LeaderLock
+from utils.whatsapp_timing import summarize_phase_timings
 import sys
 import os
+import json
 
 class PublishPage:
     def __init__(self, config_manager):
-        self.db = DataManager()
-        self.notification_publisher = NotificationPublisher(config_manager)
+        # Shared by every session and rerun in this process: one Mongo client, one
+        # WhatsApp browser, pooled Telegram connections and the message/media caches
+        self.publish_service = get_publish_service(config_manager)
+        self.db = self.publish_service.db
+        self.notification_publisher = self.publish_service.notification_publisher
         self.config_manager = config_manager
+        self.auto_publish_engine = AutoPublishEngine(
+            config_manager, db=self.db, notification_publisher=self.notification_publisher
+        )
         # Initialize scheduler properly
         self.scheduler = schedule
         self.scheduled_tasks = []
@@ -27,16 +36,6 @@ class PublishPage:
         # Initialize the background scheduler for auto-publish
         self.initialize_auto_publish_scheduler()
  
-    def __del__(self):
-        """Cleanup resources when page is destroyed"""
-        try:
-            if hasattr(self, 'notification_publisher'):
-                self.notification_publisher.close()
-            # Also clean up any WebDriver instances
-            self._cleanup_whatsapp_drivers()
-        except Exception as e:
-            print(f"Warning: Error in PublishPage cleanup: {e}")
- 
  
     def render(self):
         st.title("📤 Publish Products")
@@ -50,6 +49,7 @@ class PublishPage:
         with tabs[1]:
             st.header("Automatic Publish")
             self.render_automatic_publish()
+            self.render_whatsapp_timings()
 
         with tabs[2]:
             st.header("Email Scheduling")
@@ -309,6 +309,21 @@ class PublishPage:
             default=auto_config.get("channels", ["Telegram"]),
             help="Choose where to publish products"
         )
+
+        # Per-run message budget per channel; the best-scoring deals go first
+        saved_budgets = auto_config.get("channel_budgets") or {}
+        channel_budgets = {}
+        with st.expander("🎯 Messages per run"):
+            st.caption("Eligible products are ranked by discount vs Buy Box and MRP and by the drop since they "
+                       "were last published; the rest wait for the next run. 0 means no limit.")
+            for channel in channels:
+                channel_budgets[channel] = st.number_input(
+                    f"Max {channel} messages per run",
+                    min_value=0,
+                    value=int(saved_budgets.get(channel) or 0),
+                    step=1,
+                    key=f"auto_publish_budget_{channel}"
+                )
         
         # Frequency setting
         frequency = st.number_input(
@@ -320,6 +335,14 @@ class PublishPage:
             help="How often to check for publishable products"
         )
 
+        self.render_backtest({
+            "price_change": price_change,
+            "never_published": never_published,
+            "price_dropped": price_dropped,
+            "not_recent": not_recent,
+            "days_threshold": 4
+        }, channels, channel_budgets, frequency)
+
         # Start/Stop buttons
         col1, col2 = st.columns(2)
         with col1:
@@ -362,7 +385,8 @@ class PublishPage:
                         "price_dropped": price_dropped,
                         "not_recent": not_recent
                     },
-                    "channels": channels
+                    "channels": channels,
+                    "channel_budgets": channel_budgets
                 }
                 st.json(upcoming_schedules)
             
@@ -400,7 +424,9 @@ class PublishPage:
                             )
                             
                             # Display the selected log file
-                            if selected_log:
+                            if selected_log and ".jsonl" in selected_log:
+                                self.render_run_log_records(os.path.join("logs", selected_log), last_run.get("run_id"))
+                            elif selected_log:
                                 selected_path = os.path.join("logs", selected_log)
                                 if os.path.exists(selected_path):
                                     with open(selected_path, 'r', encoding='utf-8') as f:
@@ -455,6 +481,7 @@ class PublishPage:
             config = {
                 "filters": filters,
                 "channels": channels,
+                "channel_budgets": channel_budgets,
                 "frequency": frequency,
                 "active": True,
                 "next_run": next_run.strftime("%Y-%m-%d %H:%M:%S"),
@@ -475,8 +502,7 @@ class PublishPage:
             if st.checkbox("Run immediately", value=True):
                 st.info("Running initial check now...")
                 try:
-                    # Fix buy box prices before running
-                    self.ensure_valid_buybox_prices()
+                    # The job repairs buy box prices itself
                     self.auto_publish_job(filters, channels)
                     st.success("✅ Initial run completed successfully!")
                 except Exception as e:
@@ -498,6 +524,98 @@ class PublishPage:
             st.success("Automatic publishing stopped")
             st.rerun()
 
+    def render_backtest(self, filters, channels, channel_budgets, frequency):
+        """
+        Replay the criteria above over recorded price history, without sending anything.
+        :param filters: Filters as they would be saved on start
+        :param channels: Selected channels
+        :param channel_budgets: Messages per run per channel
+        :param frequency: Minutes between runs
+        """
+        with st.expander("🧪 Backtest these settings"):
+            st.caption("Replays stored price changes through the criteria, budgets and frequency above and "
+                       "counts the messages they would have sent. Nothing is sent or saved.")
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input("From", value=datetime.now().date() - timedelta(days=30),
+                                           key="backtest_start")
+            with col2:
+                end_date = st.date_input("To", value=datetime.now().date(), key="backtest_end")
+
+            if st.button("Run backtest", key="run_backtest"):
+                if not channels:
+                    st.error("Please select at least one channel")
+                    return
+                start = datetime.combine(start_date, time.min)
+                end = min(datetime.combine(end_date, time.max), datetime.now())
+                try:
+                    with st.spinner("Replaying price history..."):
+                        result = backtest(self.db, start, end, filters=filters, channels=channels,
+                                          budgets=channel_budgets, frequency_minutes=frequency)
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+
+                cols = st.columns(len(channels))
+                for col, channel in zip(cols, channels):
+                    totals = result["totals"][channel]
+                    col.metric(f"{channel} messages", totals["simulated"],
+                               delta=totals["simulated"] - totals["actual"], delta_color="off",
+                               help=f"{totals['actual']} actually sent in this period")
+                st.bar_chart(result["simulated"])
+                st.caption(f"{result['runs']} runs over {result['products']} products and "
+                           f"{result['price_changes']} price changes in {result['elapsed_seconds']}s")
+                st.dataframe(result["simulated"].add_suffix(" (backtest)").join(result["actual"].add_suffix(" (sent)")))
+
+    def render_run_log_records(self, path, last_run_id=None):
+        """
+        Show a JSON-lines auto-publish run log as a table.
+        :param path: Path of the log file (current or rotated)
+        :param last_run_id: Run ID of the latest run, offered as the default filter
+        """
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        if not records:
+            st.info("This log file is empty.")
+            return
+
+        df = pd.DataFrame(records)
+        if last_run_id and "run_id" in df and st.checkbox("Only the latest run", value=True, key="run_log_latest_only"):
+            df = df[df["run_id"] == last_run_id]
+        level = st.radio("Level", ["All", "info", "warning", "error"], horizontal=True, key="run_log_level")
+        if level != "All":
+            df = df[df["level"] == level]
+        columns = [c for c in ["ts", "level", "message", "event", "product_id"] if c in df]
+        st.dataframe(df[columns], use_container_width=True, hide_index=True)
+
+    def render_whatsapp_timings(self):
+        """Show p50/p95 per phase of recent WhatsApp sends."""
+        with st.expander("⏱️ WhatsApp Send Timings"):
+            limit = st.selectbox("Recent sends to include", [100, 500, 2000], index=1, key="whatsapp_timing_limit")
+            records = self.db.get_whatsapp_send_timings(limit=limit)
+            if not records:
+                st.info("No WhatsApp send timings recorded yet.")
+                return
+
+            sent = sum(1 for r in records if r.get("outcome") == "sent")
+            st.caption(f"{len(records)} sends ({sent} sent, {len(records) - sent} failed), "
+                       f"from {records[-1]['timestamp']:%Y-%m-%d %H:%M} to {records[0]['timestamp']:%Y-%m-%d %H:%M}")
+
+            outcome = st.radio("Outcome", ["All", "sent", "failed"], horizontal=True, key="whatsapp_timing_outcome")
+            if outcome != "All":
+                records = [r for r in records if r.get("outcome") == outcome]
+
+            summary = summarize_phase_timings(records)
+            if summary:
+                st.dataframe(pd.DataFrame(summary).set_index("phase"), use_container_width=True)
+            else:
+                st.info("No sends match this filter.")
+
     def render_email_scheduling(self):
         st.subheader("Configure Email Schedules")
 
@@ -596,23 +714,18 @@ class PublishPage:
             )
 
             if st.button("Push Now"):
-                try:
-                    if not channels:
-                        st.warning("Please select at least one channel")
-                        return
+                if not channels:
+                    st.warning("Please select at least one channel")
+                    return
 
-                    success, message = self.publish_product(selected_product)
-                    if success:
-                        st.success("✅ Product pushed successfully!")
-                    else:
-                        st.error(f"❌ Failed to push: {message}")
-                finally:
-                    if hasattr(self, 'notification_publisher'):
-                        self.notification_publisher.close()
+                success, message = self.publish_product(selected_product)
+                if success:
+                    st.success("✅ Product pushed successfully!")
+                else:
+                    st.error(f"❌ Failed to push: {message}")
         except Exception as e:
+            # The publisher is shared by every session and the scheduler, so it stays open
             st.error(f"Error in immediate push: {e}")
-            if hasattr(self, 'notification_publisher'):
-                self.notification_publisher.close()
 
     def publish_product(self, product, override_channels=None):
         """
@@ -622,99 +735,46 @@ class PublishPage:
         :return: (success, message) tuple
         """
         try:
-            # Initialize publisher if needed
-            if not hasattr(self, 'notification_publisher'):
-                self.notification_publisher = NotificationPublisher(self.config_manager)
-            
-            # Generate formatted message using the centralized format function
-            message = self.notification_publisher.format_product_message(product)
-            
-            # Track successful channels and errors
-            successful_channels = []
-            errors = []
-            
             # Get the selected channels from session state or override
             selected_channels = override_channels if override_channels else st.session_state.get("immediate_channels", ["Telegram"])
-            
-            # Send to Telegram ONLY IF selected
-            if "Telegram" in selected_channels:
-                telegram_success, telegram_error = self.notification_publisher.telegram_push(
-                    message, 
-                    product.get("Product_image_path")
-                )
-                if telegram_success:
-                    successful_channels.append("Telegram")
-                else:
-                    errors.append(f"Telegram: {telegram_error}")
-                    print(f"❌ Telegram push failed: {telegram_error}")
-            
-            # Send to WhatsApp ONLY IF selected
-            if "WhatsApp" in selected_channels:
-                whatsapp_config = self.config_manager.get_whatsapp_config()
-                if not whatsapp_config:
-                    errors.append("WhatsApp: Configuration not found")
-                else:
-                    # Get channel and group configurations
-                    whatsapp_channels = whatsapp_config.get("channel_names", "").split(",") if whatsapp_config.get("channel_names") else []
-                    whatsapp_groups = whatsapp_config.get("group_names", "").split(",") if whatsapp_config.get("group_names") else []
-                    
-                    # Process each channel and group
-                    for channel_type, items in [("channel", whatsapp_channels), ("group", whatsapp_groups)]:
-                        for item in items:
-                            item = item.strip()
-                            if not item:
-                                continue
 
-                            try:
-                                # Initialize fresh WhatsApp sender for each send to avoid session issues
-                                is_channel = (channel_type == "channel")
-                                if self.notification_publisher.whatsapp_push(product, item, message, is_channel=is_channel):
-                                    successful_channels.append(f"WhatsApp {channel_type}: {item}")
-                                else:
-                                    errors.append(f"WhatsApp: Failed to send to {channel_type} {item}")
-                            except Exception as e:
-                                errors.append(f"WhatsApp {channel_type} error: {str(e)}")
-                                print(f"❌ WhatsApp {channel_type} error: {str(e)}")
-            
+            # Send through the publish_jobs outbox: one job per channel/recipient. A manual
+            # push is sent even if already published at this price; jobs still in flight
+            # are not queued twice
+            success, message = self.publish_service.publish(product, selected_channels, source="publish_page",
+                                                            republish=True)
+
             # Clean up WhatsApp driver after each operation
             self._cleanup_whatsapp_drivers()
 
-            # Update product status in database
-            product_id = product.get("Product_unique_ID")
-            if product_id:
-                # Update the product record
-                self.db.update_product(product_id, {
-                    "published_status": True,
-                    "Publish": False,
-                    "Publish_time": None,
-                    "Last_published_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "last_published_price": product.get("Product_current_price"),
-                    "published_channels": successful_channels
-                })
-                
-                # Record in the publications collection
-                self.db.db.published_products.insert_one({
-                    "product_id": product_id,
-                    "product_name": product.get("product_name"),
-                    "product_price": product.get("Product_current_price"),
-                    "published_date": datetime.now(),
-                    "channels": successful_channels,
-                    "message": message,
-                    "errors": errors if errors else None
-                })
-                
-                if successful_channels:
-                    return True, f"Published to {', '.join(successful_channels)}"
-                else:
-                    return False, f"Failed to publish to any channels: {'; '.join(errors)}"
-            else:
-                return False, "Product ID is missing"
+            return success, message
             
         except Exception as e:
             print(f"❌ Error in publish_product: {str(e)}")
             traceback.print_exc()
             return False, f"Error: {str(e)}"
 
+    def publish_products_batch(self, products, channels, pacing_seconds=5):
+        """
+        Publish several products, sending all WhatsApp messages per recipient in one batch
+        so each WhatsApp chat is opened once instead of once per product.
+        :param products: List of product dictionaries
+        :param channels: List of channels to publish to
+        :param pacing_seconds: Delay between Telegram sends to avoid rate limiting
+        :return: Dict of product ID -> (success, message) tuple
+        """
+        results = self.auto_publish_engine.publish_products_batch(products, channels, pacing_seconds)
+        if "WhatsApp" in channels:
+            self._cleanup_whatsapp_drivers()
+        return results
+
+    def _get_whatsapp_recipients(self):
+        """
+        Get configured WhatsApp recipients.
+        :return: List of ("channel" | "group", name) tuples, or None if WhatsApp is not configured
+        """
+        return self.auto_publish_engine.get_whatsapp_recipients()
+
     def _cleanup_whatsapp_drivers(self):
         """Clean up any WhatsApp web driver instances that might be in session"""
         try:
@@ -729,617 +789,39 @@ class PublishPage:
                         print(f"Error closing driver: {e}")
                 st.session_state.whatsapp_drivers = []
         
-            # Also make sure the notification_publisher's WhatsApp sender is cleaned up
-            if hasattr(self, 'notification_publisher') and hasattr(self.notification_publisher, '_whatsapp_sender') and self.notification_publisher._whatsapp_sender:
-                try:
-                    # Save cookies before closing for session persistence
-                    sender = self.notification_publisher._whatsapp_sender
-                    if sender and hasattr(sender, 'driver') and sender.driver:
-                        if hasattr(sender, '_save_cookies'):
-                            sender._save_cookies()
-                        sender.driver.quit()
-                        sender.driver = None
-                except Exception as e:
-                    print(f"Error closing WhatsApp driver: {e}")
+            # The shared publisher's WhatsApp browser stays warm for the next send and is
+            # quit once idle (see WhatsappSender.release_driver)
+            sender = getattr(self.notification_publisher, '_whatsapp_sender', None)
+            if sender:
+                sender.release_driver()
         except Exception as e:
             print(f"Error in cleanup: {e}")
 
     def ensure_valid_buybox_prices(self):
         """
         Ensures all products have valid Buy Box prices that are higher than their current prices.
-        This function fixes the common issue where Buy Box prices are not properly set or 
-        are lower than current prices, which prevents products from being published.
+        :return: True if any products were updated
         """
-        try:
-            db = DataManager()
-            all_products = list(db.products.find({}))
-            
-            print(f"🔍 Checking buy box prices for {len(all_products)} products...")
-            updated_count = 0
-            skipped_count = 0
-            error_count = 0
-            
-            for product in all_products:
-                product_id = product.get("Product_unique_ID")
-                product_name = product.get("product_name", "Unknown")
-                
-                if not product_id:
-                    print(f"⚠️ Skipping product without ID: {product_name}")
-                    skipped_count += 1
-                    continue
-                    
-                try:
-                    current_price = product.get("Product_current_price")
-                    buy_box_price = product.get("Product_Buy_box_price")
-                    mrp = product.get("Product_MRP")
-                    
-                    # Skip if no current price available
-                    if current_price is None:
-                        print(f"⚠️ Skipping {product_name} (ID: {product_id}): No current price")
-                        skipped_count += 1
-                        continue
-                        
-                    # Convert prices to float for proper comparison
-                    try:
-                        current_price = float(current_price)
-                    except (ValueError, TypeError):
-                        print(f"⚠️ Invalid current price for {product_name}: {current_price}")
-                        skipped_count += 1
-                        continue
-                    
-                    # Check if buy box price exists and is properly set
-                    needs_update = False
-                    new_buy_box = None
-                    
-                    # Case 1: Buy box is missing or None
-                    if buy_box_price is None:
-                        needs_update = True
-                        # Set buy box 10% higher than current price
-                        new_buy_box = current_price * 1.1
-                        print(f"📈 Setting buy box for {product_name}: No buy box price found")
-                        
-                    # Case 2: Buy box is not a proper number
-                    elif not isinstance(buy_box_price, (int, float, str)) or (isinstance(buy_box_price, str) and not buy_box_price.strip()):
-                        needs_update = True
-                        new_buy_box = current_price * 1.1
-                        print(f"🔄 Correcting invalid buy box price for {product_name}: {buy_box_price}")
-                        
-                    # Case 3: Buy box is a string that needs conversion
-                    elif isinstance(buy_box_price, str):
-                        try:
-                            buy_box_float = float(buy_box_price)
-                            # If buy box isn't higher than current price, update it
-                            if buy_box_float <= current_price:
-                                needs_update = True
-                                new_buy_box = current_price * 1.1
-                                print(f"📊 Adjusting buy box for {product_name}: {buy_box_float} → {new_buy_box:.2f} (current: {current_price})")
-                        except (ValueError, TypeError):
-                            needs_update = True
-                            new_buy_box = current_price * 1.1
-                            print(f"🔄 Converting invalid buy box value for {product_name}: {buy_box_price}")
-                            
-                    # Case 4: Buy box is numeric but not higher than current price
-                    elif float(buy_box_price) <= current_price:
-                        needs_update = True
-                        new_buy_box = current_price * 1.1
-                        print(f"📊 Adjusting buy box for {product_name}: {float(buy_box_price)} → {new_buy_box:.2f} (current: {current_price})")
-                    
-                    # If MRP is available, make sure buy box doesn't exceed it
-                    if needs_update and mrp is not None and new_buy_box is not None:
-                        try:
-                            mrp_float = float(mrp)
-                            if new_buy_box > mrp_float:
-                                new_buy_box = mrp_float * 0.98  # Set just below MRP
-                                # But still ensure it's higher than current price
-                                if new_buy_box <= current_price:
-                                    new_buy_box = current_price * 1.05  # Minimum 5% markup
-                        except (ValueError, TypeError):
-                            # Invalid MRP, ignore this constraint
-                            pass
-                    
-                    # Update database if needed
-                    if needs_update:
-                        db.update_product(product_id, {
-                            "Product_Buy_box_price": new_buy_box
-                        })
-                        updated_count += 1
-                    
-                except Exception as e:
-                    print(f"❌ Error processing {product_name}: {str(e)}")
-                    error_count += 1
-            
-            print(f"✅ Buy box price check complete:")
-            print(f"   - {updated_count} products updated")
-            print(f"   - {skipped_count} products skipped")
-            print(f"   - {error_count} errors encountered")
-            
-            return updated_count > 0  # Return True if any products were updated
-            
-        except Exception as e:
-            print(f"❌ Critical error in ensure_valid_buybox_prices: {str(e)}")
-            return False
+        return self.auto_publish_engine.repair_buybox_prices() > 0
 
     def auto_publish_job(self, filters, channels):
-        """Automatic publishing job that checks for eligible products and publishes them"""
+        """
+        Automatic publishing job that checks for eligible products and publishes them.
+        The work is done by AutoPublishEngine, which also runs outside Streamlit (run_auto_publish.py).
+        :return: AutoPublishResult, or None if a job is already running in this session
+        """
         # Check if another job is already running
-        if st.session_state.auto_publish_running:
+        if st.session_state.get("auto_publish_running", False):
             print("[AutoPublish] Previous job still running, skipping this execution")
-            return
-        
-        try:
-            # Set running flag
-            st.session_state.auto_publish_running = True
-            job_start_time = datetime.now()
-            
-            # Create log filename with timestamp for persistence
-            log_filename = f"logs/auto_publish_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            os.makedirs("logs", exist_ok=True)
-            
-            run_log = {
-                "time": job_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "products_checked": 0,
-                "published": 0,
-                "skipped": 0,
-                "failed": 0,
-                "skipped_reasons": {},
-                "published_products": [],
-                "detailed_logs": [],
-                "log_file": log_filename
-            }
-            
-            # Log function to add to detailed logs and also write to file
-            def add_log(message):
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                log_entry = f"[{timestamp}] {message}"
-                print(log_entry)
-                run_log["detailed_logs"].append(log_entry)
-                # Also write to log file for persistence
-                try:
-                    with open(log_filename, 'a', encoding='utf-8') as f:
-                        f.write(log_entry + "\n")
-                except Exception as e:
-                    print(f"Error writing to log: {e}")
-                    # Try writing without emojis if encoding fails
-                    try:
-                        # Replace emojis with text representations
-                        safe_entry = log_entry.encode('ascii', 'ignore').decode('ascii')
-                        with open(log_filename, 'a') as f:
-                            f.write(safe_entry + "\n")
-                    except Exception as e2:
-                        print(f"Error writing safe log entry: {e2}")
-
-            add_log(f"Starting automatic publishing job...")
-            
-            try:
-                # Fix buy box prices at the beginning of each run
-                add_log("Checking and fixing buy box prices before monitoring...")
-                updated = self.ensure_valid_buybox_prices()
-                if updated:
-                    add_log("✅ Buy box prices were adjusted for some products to ensure proper filtering")
-                
-                db = DataManager()
-                
-                # First apply base filter: current price < buy box price
-                add_log("Applying base filter: Current price < Buy box price")
-                base_query = {"$expr": {"$lt": ["$Product_current_price", "$Product_Buy_box_price"]}}
-                candidate_products = list(db.get_products(base_query))
-                
-                if not candidate_products:
-                    add_log("⚠️ No products found where current price < buy box price. Checking will stop here.")
-                    run_log["products_checked"] = 0
-                    run_log["skipped"] = 0
-                    return
-                
-                # Extract product IDs of candidates
-                candidate_ids = [p.get("Product_unique_ID") for p in candidate_products if p.get("Product_unique_ID")]
-                add_log(f"Found {len(candidate_ids)} products with current price < buy box price")
-                
-                # Track how many products we've checked
-                run_log["products_checked"] = len(candidate_products)
-                
-                # Define batch size for processing
-                batch_size = 10  # Process 10 products at a time to avoid overloading APIs
-                
-                # Initialize products_with_price_changes list
-                products_with_price_changes = []
-                
-                # Only update prices if we need to check for price changes
-                if filters.get("price_change", True):
-                    add_log("'Price change should be there' filter is enabled - checking for real-time price changes...")
-                    
-                    # Dictionary to store the current prices before update
-                    pre_update_prices = {}
-                    
-                    # First, collect current prices for all candidate products
-                    for product in candidate_products:
-                        product_id = product.get("Product_unique_ID")
-                        current_price = product.get("Product_current_price")
-                        if product_id and current_price is not None:
-                            try:
-                                pre_update_prices[product_id] = float(current_price)
-                            except (ValueError, TypeError):
-                                add_log(f"⚠️ Warning: Could not convert price for product {product_id}: {current_price}")
-                    
-                    # Keep the UI elements for time window and strict mode, but we don't use them in the logic
-                    price_change_hours = filters.get("price_change_hours", 24)
-                    add_log(f"Price change time window: {price_change_hours} hours (informational only)")
-                    
-                    # Update product prices from Amazon
-                    add_log("Fetching latest prices from Amazon...")
-                    try:
-                        # Get all ASINs
-                        asins = [p.get("Product_unique_ID") for p in candidate_products if p.get("Product_unique_ID")]
-                        
-                        # Initialize the Amazon monitor
-                        amazon_monitor = AmazonIndiaMonitor()
-                        
-                        # Process in smaller batches to avoid overloading the API
-                        batch_size = 10
-                        for i in range(0, len(asins), batch_size):
-                            batch = asins[i:i+batch_size]
-                            add_log(f"Processing batch {i//batch_size + 1}/{(len(asins) + batch_size - 1)//batch_size}: {batch}")
-                            
-                            # Fetch latest data
-                            product_data = amazon_monitor.fetch_product_data(batch)
-                            
-                            # Update products with new data
-                            for asin, data in product_data.items():
-                                new_price = data.get("price")
-                                if new_price is not None:
-                                    # Update in database
-                                    db.update_product(asin, {
-                                        "Product_current_price": new_price,
-                                        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                    })
-                                    add_log(f"Updated price for {asin}: {new_price}")
-                        
-                        # Small delay between batches
-                        time_module.sleep(2)
-                    except Exception as e:
-                        add_log(f"❌ Error updating prices: {str(e)}")
-                    
-                    # Refresh the candidate products with updated prices
-                    add_log("Refreshing products with updated prices...")
-                    candidate_products = list(db.get_products(base_query))
-                    
-                    # Now compare the updated prices with pre-update prices
-                    products_with_price_changes = []
-                    for product in candidate_products:
-                        product_id = product.get("Product_unique_ID")
-                        if not product_id or product_id not in pre_update_prices:
-                            continue
-                        
-                        product_name = product.get("product_name", "Unknown")
-                        current_price = product.get("Product_current_price")
-                        
-                        try:
-                            old_price = pre_update_prices[product_id]
-                            new_price = float(current_price) if current_price else None
-                            
-                            # Skip if either old_price or new_price is None or NaN
-                            if old_price is None or new_price is None or str(old_price).lower() == 'nan' or str(new_price).lower() == 'nan':
-                                add_log(f"⚠️ Skipping {product_name}: Invalid price comparison - Old price: {old_price}, New price: {new_price}")
-                                continue
-                                
-                            if new_price != old_price:
-                                add_log(f"✅ Price change detected for {product_name}: Previous price: ₹{old_price}, Current price: ₹{new_price}")
-                                # Add to price changes list regardless of other filters
-                                products_with_price_changes.append(product)
-                                # Log price change details for future reference
-                                product["_price_change_detected"] = True
-                                product["_old_price"] = old_price
-                                product["_new_price"] = new_price
-                        except (ValueError, TypeError) as e:
-                            add_log(f"⚠️ Error comparing prices for {product_name}: {str(e)}")
-                    
-                    # Log how many products have price changes
-                    add_log(f"Found {len(products_with_price_changes)} products with real-time price changes")
-                    
-                    # Use only products with price changes
-                    all_products = products_with_price_changes if products_with_price_changes else []
-                else:
-                    add_log("'Price change should be there' filter is disabled - using existing prices")
-                    all_products = candidate_products
-                
-                # Continue with the existing filtering logic
-                if len(all_products) == 0:
-                    add_log("⚠️ No products found matching all filters.")
-                    run_log["skipped"] = run_log["products_checked"]
-                    return
-                
-                # Get all published products for reference
-                published_records = list(db.db.published_products.find(
-                    {}, {"product_id": 1, "product_price": 1, "published_date": 1}
-                ))
-                add_log(f"Found {len(published_records)} publishing history records")
-                
-                # Create lookup dictionaries for efficient filtering
-                never_published_ids = set()
-                published_product_prices = {}  # {product_id: [(price, date), ...]}
-                
-                # Process all products to find those never published
-                for product in all_products:
-                    product_id = product.get("Product_unique_ID")
-                    
-                    # Skip products without ID
-                    if not product_id:
-                        continue
-                        
-                    # Find publication history for this product
-                    product_history = []
-                    for record in published_records:
-                        if record.get("product_id") == product_id:
-                            pub_date = record.get("published_date")
-                            price = record.get("product_price")
-                            if pub_date and price:
-                                product_history.append((price, pub_date))
-                    
-                    # Sort by date, newest first - ensure consistent types
-                    try:
-                        # Convert any string dates to datetime objects
-                        for i, (price, date) in enumerate(product_history):
-                            if isinstance(date, str):
-                                try:
-                                    product_history[i] = (price, datetime.strptime(date, "%Y-%m-%d %H:%M:%S"))
-                                except ValueError:
-                                    try:
-                                        # Try alternative format
-                                        product_history[i] = (price, datetime.strptime(date, "%Y-%m-%d"))
-                                    except ValueError:
-                                        # If conversion fails, skip this record
-                                        continue
-                        # Now sort when all dates are datetime objects
-                        product_history.sort(key=lambda x: x[1], reverse=True)
-                    except Exception as e:
-                        add_log(f"⚠️ Warning: Could not sort publication history for {product_id}: {str(e)}")
-                    
-                    # Store in lookup dict
-                    if product_history:
-                        published_product_prices[product_id] = product_history
-                    else:
-                        never_published_ids.add(product_id)
-                
-                add_log(f"Products never published before: {len(never_published_ids)}")
-                add_log(f"Products with publication history: {len(published_product_prices)}")
-                
-                # Check which filters are active and apply accordingly
-                eligible_products = []
-                
-                # If no filters are active, use all products
-                if not filters.get("never_published", True) and not filters.get("price_dropped", True) and not filters.get("not_recent", True):
-                    add_log("⚠️ No product filters are active - using all products that match base criteria")
-                    eligible_products = all_products
-                else:
-                    # Apply filters to each product
-                    for product in all_products:
-                        product_id = product.get("Product_unique_ID")
-                        product_name = product.get("product_name", "Unknown")
-                        current_price = product.get("Product_current_price")
-                        buy_box_price = product.get("Product_Buy_box_price")
-                        mrp = product.get("Product_MRP")
-                        
-                        # Skip invalid products
-                        if not product_id or not current_price:
-                            add_log(f"Skipping product {product_id}: Missing ID or price data")
-                            continue
-                            
-                        # Enhanced price information in logs
-                        add_log(f"Checking product {product_id} ({product_name}): Current: ₹{current_price}, Buy Box: ₹{buy_box_price}, MRP: ₹{mrp}")
-                        
-                        # FILTER 1: Never published before
-                        if product_id in never_published_ids and filters.get("never_published", True):
-                            add_log(f"✅ Product {product_name} eligible - never published before")
-                            price_diff = float(buy_box_price) - float(current_price)
-                            pct_diff = (price_diff / float(buy_box_price)) * 100 if float(buy_box_price) > 0 else 0
-                            add_log(f"   📊 Price stats: Current < Buy Box by ₹{price_diff:.2f} ({pct_diff:.1f}%)")
-                            eligible_products.append(product)
-                            continue
-                        
-                        # For previously published products
-                        if product_id in published_product_prices:
-                            history = published_product_prices[product_id]
-                            last_price, last_date = history[0]  # Most recent publication
-                            
-                            # Calculate days since last publication
-                            days_ago = (datetime.now() - last_date).days
-                            threshold_days = filters.get("days_threshold", 4)
-                            
-                            add_log(f"Last published: {last_date.strftime('%Y-%m-%d')} ({days_ago} days ago), Last price: ₹{last_price}")
-                            
-                            try:
-                                current_price_float = float(current_price)
-                                last_price_float = float(last_price)
-                                
-                                price_dropped = current_price_float < last_price_float
-                                not_recent = days_ago >= threshold_days
-                                
-                                add_log(f"Checking conditions: Price dropped: {price_dropped}, Not published recently: {not_recent}")
-                                
-                                # Check which filters are active and apply proper logic
-                                price_dropped_filter = filters.get("price_dropped", True)
-                                not_recent_filter = filters.get("not_recent", True)
-                                
-                                # Create detailed logging for each check
-                                check_logs = []
-                                
-                                # Check if this product had a price change detected
-                                if "_price_change_detected" in product:
-                                    price_change_info = f"✅ Price change detected: ₹{product.get('_old_price')} → ₹{product.get('_new_price')}"
-                                    check_logs.append(price_change_info)
-                                
-                                # Check price drop since last publish
-                                if price_dropped_filter:
-                                    if price_dropped:
-                                        price_drop = last_price_float - current_price_float
-                                        price_drop_pct = (price_drop / last_price_float) * 100
-                                        check_logs.append(f"✅ Price dropped: ₹{last_price_float} → ₹{current_price_float} (₹{price_drop:.2f}, {price_drop_pct:.1f}%)")
-                                    else:
-                                        check_logs.append(f"❌ Price not dropped: Current ₹{current_price_float} not lower than last published ₹{last_price_float}")
-                                
-                                # Check publication recency
-                                if not_recent_filter:
-                                    if not_recent:
-                                        check_logs.append(f"✅ Not published recently: {days_ago} days ago (threshold: {threshold_days})")
-                                    else:
-                                        check_logs.append(f"❌ Published too recently: {days_ago} days ago (threshold: {threshold_days})")
-                                
-                                # Log all checks for this product
-                                for log_entry in check_logs:
-                                    add_log(f"   {log_entry}")
-                                
-                                # Check if product passes the enabled filters
-                                if (price_dropped_filter and price_dropped) or (not_recent_filter and not_recent):
-                                    # Product eligible - add brief summary
-                                    price_diff = float(buy_box_price) - float(current_price)
-                                    bb_pct_diff = (price_diff / float(buy_box_price)) * 100 if float(buy_box_price) > 0 else 0
-                                    add_log(f"✅ Product {product_name} ELIGIBLE - passed filter checks")
-                                    add_log(f"   📊 Price stats: Current < Buy Box by ₹{price_diff:.2f} ({bb_pct_diff:.1f}%)")
-                                    eligible_products.append(product)
-                                else:
-                                    # Product not eligible - add summary
-                                    add_log(f"❌ Product {product_name} NOT ELIGIBLE - failed filter checks")
-                                    
-                                    # Record specific reasons for skipping
-                                    if price_dropped_filter and not price_dropped:
-                                        reason = f"current price (₹{current_price_float}) not lower than last published price (₹{last_price_float})"
-                                        run_log["skipped_reasons"][reason] = run_log["skipped_reasons"].get(reason, 0) + 1
-                                    
-                                    if not_recent_filter and not not_recent:
-                                        reason = f"published too recently ({days_ago} days ago, threshold: {threshold_days} days)"
-                                        run_log["skipped_reasons"][reason] = run_log["skipped_reasons"].get(reason, 0) + 1
-                            except (ValueError, TypeError) as e:
-                                add_log(f"❌ Error comparing prices for {product_name}: {str(e)}")
+            return None
 
-                add_log(f"Filter results: {len(eligible_products)} products eligible for publishing")
-                
-                # Update next run time in config
-                now = datetime.now()
-
-                # Get frequency from auto_config
-                auto_config = db.get_auto_publish_config()
-                frequency_minutes = auto_config.get("frequency", 30)
-
-                # Calculate next run time using frequency
-                next_run = now + timedelta(minutes=frequency_minutes)
-                add_log(f"Next run scheduled for: {next_run.strftime('%Y-%m-%d %I:%M:%S %p')} (in {frequency_minutes} minutes)")
-
-                # Update config with next run time
-                auto_config["next_run"] = next_run.strftime("%Y-%m-%d %H:%M:%S")
-                db.save_auto_publish_config(auto_config)
-                
-                # Now publish eligible products
-                successful_count = 0
-                failed_count = 0
-                published_details = []
-                
-                add_log(f"Starting publication of {len(eligible_products)} eligible products")
-                run_log["eligible"] = len(eligible_products)
-                
-                # Get the selected channels
-                selected_channels = auto_config.get("channels", ["Telegram"])
-                add_log(f"Publishing to channels: {', '.join(selected_channels)}")
-                
-                for product in eligible_products:
-                    try:
-                        product_name = product.get("product_name", "Unknown")
-                        product_id = product.get("Product_unique_ID", "Unknown")
-                        add_log(f"Attempting to publish: {product_name} (ID: {product_id})")
-                        
-                        # Instead of modifying session_state, pass channels directly
-                        # Call a modified version of publish_product that takes channels as a parameter
-                        # Around line 1170 in auto_publish_job method
-                        success, message = self.publish_product(product, override_channels=selected_channels)
-                        product_info = {
-                            "name": product.get("product_name"),
-                            "id": product.get("Product_unique_ID"),
-                            "price": product.get("Product_current_price"),
-                            "buybox": product.get("Product_Buy_box_price"),
-                            "mrp": product.get("Product_MRP"),
-                            "channels": selected_channels
-                        }
-                        
-                        if success:
-                            add_log(f"✅ Published: {product.get('product_name', 'Unknown')} - {message}")
-                            successful_count += 1
-                            published_details.append(product_info)
-                        else:
-                            add_log(f"❌ Failed to publish {product.get('product_name', 'Unknown')}: {message}")
-                            failed_count += 1
-                        
-                        # Delay between publishes to avoid rate limiting
-                        time_module.sleep(5)
-                        
-                    except Exception as publish_error:
-                        add_log(f"❌ Error publishing {product.get('product_name', 'Unknown')}: {str(publish_error)}")
-                        failed_count += 1
-                
-                # These should be outside the product loop
-                job_end_time = datetime.now()
-                duration_seconds = (job_end_time - job_start_time).total_seconds()
-                
-                run_log["published"] = successful_count
-                run_log["skipped"] = run_log["products_checked"] - len(eligible_products) 
-                run_log["failed"] = failed_count
-                run_log["duration_seconds"] = duration_seconds
-                run_log["published_products"] = published_details
-                
-                # Final summary log
-                add_log(f"Automatic publishing completed in {duration_seconds:.2f} seconds.")
-                add_log(f"Products checked: {run_log['products_checked']}, Eligible: {len(eligible_products)}, Published: {successful_count}, Failed: {failed_count}")
-                
-                # Save run log and create summary file
-                auto_config = db.get_auto_publish_config()
-                auto_config["last_run_log"] = run_log
-                db.save_auto_publish_config(auto_config)
-                
-                # Create a separate summary log file
-                summary_filename = f"logs/summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-                try:
-                    with open(summary_filename, "w", encoding="utf-8") as f:
-                        f.write(f"===== AUTO PUBLISH SUMMARY - {job_start_time.strftime('%Y-%m-%d %I:%M:%S %p')} =====\n\n")
-                        f.write(f"Duration: {duration_seconds:.2f} seconds\n")
-                        f.write(f"Products checked: {run_log['products_checked']}\n")
-                        f.write(f"Products eligible: {len(eligible_products)}\n")
-                        f.write(f"Products published: {successful_count}\n")
-                        f.write(f"Products failed: {failed_count}\n\n")
-                        
-                        f.write("===== PUBLISHED PRODUCTS =====\n\n")
-                        if published_details:
-                            for i, product in enumerate(published_details):
-                                f.write(f"{i+1}. {product['name']} (ID: {product['id']})\n")
-                                f.write(f"   Price: ₹{product['price']} | Buy Box: ₹{product['buybox']} | MRP: ₹{product['mrp']}\n")
-                                f.write(f"   Published to: {', '.join(product['channels'])}\n\n")
-                        else:
-                            f.write("No products were published in this run.\n\n")
-                            
-                        f.write("===== SKIPPED PRODUCTS REASONS =====\n\n")
-                        if run_log["skipped_reasons"]:
-                            for reason, count in run_log["skipped_reasons"].items():
-                                f.write(f"- {reason}: {count} products\n")
-                        else:
-                            f.write("No products were skipped in this run.\n")
-                            
-                        f.write(f"\n===== NEXT RUN SCHEDULED FOR: {next_run.strftime('%Y-%m-%d %I:%M:%S %p')} =====\n")
-                    
-                    # Save the summary file path in run_log as well
-                    run_log["summary_file"] = summary_filename
-                    auto_config["last_run_log"] = run_log
-                    db.save_auto_publish_config(auto_config)
-                    
-                    add_log(f"✅ Summary log saved to {summary_filename}")
-                except Exception as log_error:
-                    add_log(f"⚠️ Error creating summary log: {str(log_error)}")
-                    
-            except Exception as process_error:
-                print(f"❌ Error during auto publish job processing: {str(process_error)}")
-                traceback.print_exc()
-                
-        except Exception as outer_e:
-            print(f"❌ Critical error in auto_publish_job: {str(outer_e)}")
-            traceback.print_exc()
+        st.session_state.auto_publish_running = True
+        try:
+            return self.auto_publish_engine.run(filters, channels)
         finally:
             # Always clear the running flag
             st.session_state.auto_publish_running = False
+            self._cleanup_whatsapp_drivers()
 
     def publish_product_with_channels(self, product, channels):
         """
@@ -1348,96 +830,9 @@ class PublishPage:
         :param channels: List of channels to publish to
         :return: (success, message) tuple
         """
-        try:
-            # Initialize publisher if needed
-            if not hasattr(self, 'notification_publisher'):
-                self.notification_publisher = NotificationPublisher(self.config_manager)
-            
-            # Generate formatted message using the centralized format function
-            message = self.notification_publisher.format_product_message(product)
-            
-            # Track successful channels and errors
-            successful_channels = []
-            errors = []
-            
-            # Send to Telegram ONLY IF selected
-            if "Telegram" in channels:
-                telegram_success, telegram_error = self.notification_publisher.telegram_push(
-                    message, 
-                    product.get("Product_image_path")
-                )
-                if telegram_success:
-                    successful_channels.append("Telegram")
-                else:
-                    errors.append(f"Telegram: {telegram_error}")
-                    print(f"❌ Telegram push failed: {telegram_error}")
-            
-            # Send to WhatsApp ONLY IF selected
-            if "WhatsApp" in channels:
-                whatsapp_config = self.config_manager.get_whatsapp_config()
-                if not whatsapp_config:
-                    errors.append("WhatsApp: Configuration not found")
-                else:
-                    # Get channel and group configurations
-                    whatsapp_channels = whatsapp_config.get("channel_names", "").split(",") if whatsapp_config.get("channel_names") else []
-                    whatsapp_groups = whatsapp_config.get("group_names", "").split(",") if whatsapp_config.get("group_names") else []
-                    
-                    # Process each channel and group
-                    for channel_type, items in [("channel", whatsapp_channels), ("group", whatsapp_groups)]:
-                        for item in items:
-                            item = item.strip()
-                            if not item:
-                                continue
-
-                            try:
-                                # Initialize fresh WhatsApp sender for each send to avoid session issues
-                                is_channel = (channel_type == "channel")
-                                if self.notification_publisher.whatsapp_push(product, item, message, is_channel=is_channel):
-                                    successful_channels.append(f"WhatsApp {channel_type}: {item}")
-                                else:
-                                    errors.append(f"WhatsApp: Failed to send to {channel_type} {item}")
-                            except Exception as e:
-                                errors.append(f"WhatsApp {channel_type} error: {str(e)}")
-                                print(f"❌ WhatsApp {channel_type} error: {str(e)}")
-            
-            # Clean up WhatsApp driver after each operation
-            self._cleanup_whatsapp_drivers()
-
-            # Update product status in database
-            product_id = product.get("Product_unique_ID")
-            if product_id:
-                # Update the product record
-                self.db.update_product(product_id, {
-                    "published_status": True,
-                    "Publish": False,
-                    "Publish_time": None,
-                    "Last_published_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "last_published_price": product.get("Product_current_price"),
-                    "published_channels": successful_channels
-                })
-                
-                # Record in the publications collection
-                self.db.db.published_products.insert_one({
-                    "product_id": product_id,
-                    "product_name": product.get("product_name"),
-                    "product_price": product.get("Product_current_price"),
-                    "published_date": datetime.now(),
-                    "channels": successful_channels,
-                    "message": message,
-                    "errors": errors if errors else None
-                })
-                
-                if successful_channels:
-                    return True, f"Published to {', '.join(successful_channels)}"
-                else:
-                    return False, f"Failed to publish to any channels: {'; '.join(errors)}"
-            else:
-                return False, "Product ID is missing"
-            
-        except Exception as e:
-            print(f"❌ Error in publish_product_with_channels: {str(e)}")
-            traceback.print_exc()
-            return False, f"Error: {str(e)}"
+        if not channels:
+            return False, "No channels selected"
+        return self.publish_product(product, override_channels=channels)
     
     # Add this method to PublishPage class
     def initialize_auto_publish_scheduler(self):
@@ -1450,10 +845,17 @@ class PublishPage:
             return
         
         st.session_state.auto_publish_scheduler_running = True
+
+        # Every session starts a loop, and so may run_auto_publish.py; only the lease holder checks the schedule
+        leader_lock = LeaderLock(self.db.db[LOCK_COLLECTION], "auto_publish", ttl_seconds=180)
         
         def scheduler_loop():
             while st.session_state.auto_publish_scheduler_running:
                 try:
+                    if not leader_lock.ensure():
+                        time.sleep(60)
+                        continue
+
                     # Check if auto-publish is active
                     config = self.db.get_auto_publish_config()
                     if config.get("active", False):
@@ -1472,11 +874,9 @@ class PublishPage:
                                     filters = config.get("filters", {})
                                     channels = config.get("channels", ["Telegram"])
                                     
-                                    # Fix buy box prices before running
-                                    self.ensure_valid_buybox_prices()
-                                    
-                                    # Run the job
-                                    self.auto_publish_job(filters, channels)
+                                    # Run the job (it repairs buy box prices first)
+                                    with leader_lock.keep_alive():
+                                        self.auto_publish_job(filters, channels)
                                     
                                     # The job will update the next_run time in the configuration
                                     print(f"[Auto-Publish Scheduler] Job completed, next run time updated")
@@ -1488,6 +888,8 @@ class PublishPage:
                 
                 # Check every minute
                 time.sleep(60)
+
+            leader_lock.release()
         
         # Start the scheduler in a background thread
         scheduler_thread = threading.Thread(target=scheduler_loop, daemon=True)
@@ -0,0 +1,286 @@
+"""
+Replay auto-publish rules over recorded price history.
+
+A backtest answers "how many messages per day would these filters and channel
+budgets have sent?" without sending or writing anything. It rebuilds each
+product's prices from price_history, starts from the publications made before
+the range, then steps through the range one scheduled run at a time:
+
+    apply the price changes since the last run -> repair Buy Box prices ->
+    evaluate_eligibility -> score -> top-K per channel -> mark as published
+
+All state is kept in NumPy arrays aligned to the product list, so a run only
+touches the products it evaluates and months of history replay in seconds.
+Publications inside the range are only read to report what was actually sent.
+"""
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.deal_scoring import score_arrays
+from utils.eligibility import evaluate_eligibility, latest_publications
+
+PRODUCT_FIELDS = ("Product_unique_ID", "Product_current_price", "Product_Buy_box_price", "Product_MRP",
+                  "product_major_category")
+EVENT_FIELDS = ("product_id", "price", "buy_box_price", "mrp", "timestamp")
+PUBLICATION_FIELDS = ("product_id", "product_price", "published_date", "channels")
+
+
+def load_backtest_data(db, start, end):
+    """
+    Read what a backtest needs, with projections and index-served queries only.
+
+    Args:
+        db (DataManager): Source database
+        start, end (datetime): Range to replay
+
+    Returns:
+        tuple: (products, initial, events, publications) lists of dicts
+            initial: last price_history point of each product before start
+            events: price_history points in [start, end]
+            publications: published_products records up to end
+    """
+    products = list(db.products.find(
+        {"Product_unique_ID": {"$nin": [None, ""]}},
+        {"_id": 0, **{field: 1 for field in PRODUCT_FIELDS}}
+    ))
+    initial = [
+        {"product_id": row["_id"], **{field: row.get(field) for field in ("price", "buy_box_price", "mrp")}}
+        for row in db.price_history.aggregate([
+            {"$match": {"timestamp": {"$lt": start}}},
+            {"$sort": {"product_id": 1, "timestamp": 1}},
+            {"$group": {
+                "_id": "$product_id",
+                "price": {"$last": "$price"},
+                "buy_box_price": {"$last": "$buy_box_price"},
+                "mrp": {"$last": "$mrp"},
+            }},
+        ], allowDiskUse=True)
+    ]
+    events = list(db.price_history.find(
+        {"timestamp": {"$gte": start, "$lte": end}},
+        {"_id": 0, **{field: 1 for field in EVENT_FIELDS}}
+    ))
+    publications = list(db.published_products.find(
+        {"published_date": {"$lte": end}},
+        {"_id": 0, **{field: 1 for field in PUBLICATION_FIELDS}}
+    ))
+    return products, initial, events, publications
+
+
+def _numbers(values):
+    return pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").to_numpy(dtype="float64")
+
+
+def repair_buy_box(current, buy_box, mrp):
+    """
+    DataManager.repair_buybox_prices on arrays: the Buy Box each product would have after the repair.
+    """
+    with np.errstate(invalid="ignore"):
+        needs_repair = ~np.isnan(current) & ~(buy_box > current)
+        raised = current * 1.1
+        capped = np.where(mrp * 0.98 > current, mrp * 0.98, current * 1.05)
+        repaired = np.where(~np.isnan(mrp) & (raised > mrp), capped, raised)
+    return np.where(needs_repair, repaired, buy_box)
+
+
+def channel_kind(label):
+    """Outbox target label ("Telegram", "WhatsApp channel: X") -> UI channel name."""
+    return "WhatsApp" if str(label).startswith("WhatsApp") else "Telegram"
+
+
+def actual_daily_counts(publications, start, end, channels):
+    """
+    Publications made in [start, end], counted per day and channel.
+
+    Returns:
+        DataFrame: Index of dates, one column per channel
+    """
+    days = pd.date_range(start.date(), end.date(), freq="D")
+    counts = pd.DataFrame(0, index=days, columns=list(channels))
+    for record in publications:
+        published = pd.to_datetime(record.get("published_date"), errors="coerce")
+        if pd.isna(published) or not (start <= published <= end):
+            continue
+        day = published.normalize()
+        for channel in {channel_kind(label) for label in record.get("channels") or ["Telegram"]}:
+            if channel in counts.columns:
+                counts.loc[day, channel] += 1
+    return counts
+
+
+def run_backtest(products, initial, events, publications, start, end, filters=None, channels=("Telegram",),
+                 budgets=None, frequency_minutes=30, category_weights=None, weights=None, repair=True):
+    """
+    Simulate the auto-publish engine on recorded prices, as if it ran every frequency_minutes.
+
+    Products without price history before start begin at their stored prices, unless they
+    have changes inside the range; those are unknown (and ineligible) until the first change.
+    Every selected product counts as sent, and sending sets its last published price and date.
+
+    Args:
+        products, initial, events, publications (list): As returned by load_backtest_data
+        start, end (datetime): Range to replay
+        filters (dict): Auto-publish filters, including price_change
+        channels (list): Channels to publish to
+        budgets (dict): Channel -> max messages per run (0 or missing: unlimited)
+        frequency_minutes (int): Time between runs
+        category_weights (dict): See utils.deal_scoring.score_deal
+        weights (dict): See utils.deal_scoring.DEFAULT_WEIGHTS
+        repair (bool): Apply the Buy Box repair before every run, like the engine
+
+    Returns:
+        dict: runs, messages, deferred, simulated and actual (DataFrames of messages
+              per day per channel), totals per channel and elapsed_seconds
+    """
+    started = time.perf_counter()
+    filters = filters or {}
+    channels = list(channels)
+    budgets = budgets or {}
+
+    products = pd.DataFrame.from_records(products, columns=list(PRODUCT_FIELDS))
+    products = products.drop_duplicates("Product_unique_ID").reset_index(drop=True)
+    ids = pd.Index(products["Product_unique_ID"])
+    current = _numbers(products["Product_current_price"])
+    buy_box = _numbers(products["Product_Buy_box_price"])
+    mrp = _numbers(products["Product_MRP"])
+    category_weight = products["product_major_category"].map(category_weights or {})
+    category_weight = pd.to_numeric(category_weight, errors="coerce").fillna(1.0).to_numpy(dtype="float64")
+
+    events = pd.DataFrame.from_records(events, columns=list(EVENT_FIELDS))
+    event_times = pd.to_datetime(events["timestamp"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+    event_positions = ids.get_indexer(events["product_id"])
+    keep = (event_positions >= 0) & ~np.isnat(event_times)
+    order = np.argsort(event_times[keep], kind="stable")
+    event_times = event_times[keep][order]
+    event_positions = event_positions[keep][order]
+    event_price = _numbers(events["price"])[keep][order]
+    event_buy_box = _numbers(events["buy_box_price"])[keep][order]
+    event_mrp = _numbers(events["mrp"])[keep][order]
+
+    # Starting prices: the last point before the range, else unknown if the range changes it
+    current[np.unique(event_positions)] = np.nan
+    initial = pd.DataFrame.from_records(initial, columns=["product_id", "price", "buy_box_price", "mrp"])
+    initial_positions = ids.get_indexer(initial["product_id"])
+    known = initial_positions >= 0
+    current[initial_positions[known]] = _numbers(initial["price"])[known]
+    buy_box[initial_positions[known]] = _numbers(initial["buy_box_price"])[known]
+    mrp[initial_positions[known]] = _numbers(initial["mrp"])[known]
+
+    history = [p for p in publications if pd.to_datetime(p.get("published_date"), errors="coerce") < start]
+    last_price, last_published = latest_publications(ids, history)
+
+    ticks = np.arange(np.datetime64(start, "ns"), np.datetime64(end, "ns") + 1,
+                      np.timedelta64(int(frequency_minutes * 60), "s"))
+    # Run i sees the changes recorded after run i-1, up to and including its own time
+    bounds = np.searchsorted(event_times, ticks, side="right")
+    days = pd.DatetimeIndex(ticks).normalize()
+    day_index = pd.date_range(start.date(), end.date(), freq="D")
+    day_positions = day_index.get_indexer(days)
+    simulated = np.zeros((len(day_index), len(channels)), dtype=np.int64)
+
+    price_change = filters.get("price_change", True)
+    deferred = np.zeros(len(ids), dtype=bool)
+    messages = deferred_total = 0
+    lower = 0
+    for run, tick in enumerate(ticks):
+        upper = bounds[run]
+        changed = np.zeros(len(ids), dtype=bool)
+        if upper > lower:
+            # Last change of each product since the previous run
+            positions = event_positions[lower:upper][::-1]
+            positions, first = np.unique(positions, return_index=True)
+            rows = np.arange(upper - 1, lower - 1, -1)[first]
+            with np.errstate(invalid="ignore"):
+                changed[positions] = event_price[rows] != current[positions]
+            current[positions] = event_price[rows]
+            buy_box[positions] = np.where(np.isnan(event_buy_box[rows]), buy_box[positions], event_buy_box[rows])
+            mrp[positions] = np.where(np.isnan(event_mrp[rows]), mrp[positions], event_mrp[rows])
+            lower = upper
+
+        if repair:
+            buy_box = repair_buy_box(current, buy_box, mrp)
+
+        candidates = np.flatnonzero(changed | deferred) if price_change else np.arange(len(ids))
+        deferred[:] = False
+        if not len(candidates):
+            continue
+        eligible, _ = evaluate_eligibility(current[candidates], buy_box[candidates], last_price[candidates],
+                                           last_published[candidates], filters, now=tick)
+        eligible = candidates[eligible]
+        if not len(eligible):
+            continue
+
+        scores = score_arrays(current[eligible], buy_box[eligible], mrp[eligible], last_price[eligible],
+                              category_weight[eligible], weights)
+        ranked = eligible[np.argsort(-scores, kind="stable")]
+        selected = np.zeros(len(ids), dtype=bool)
+        for column, channel in enumerate(channels):
+            budget = budgets.get(channel)
+            chosen = ranked[:budget] if budget and budget > 0 else ranked
+            selected[chosen] = True
+            simulated[day_positions[run], column] += len(chosen)
+
+        sent = np.flatnonzero(selected)
+        last_price[sent] = current[sent]
+        last_published[sent] = tick
+        deferred[eligible] = ~selected[eligible]
+        messages += len(sent)
+        deferred_total += int(deferred.sum())
+
+    simulated = pd.DataFrame(simulated, index=day_index, columns=channels)
+    actual = actual_daily_counts(publications, start, end, channels)
+    return {
+        "runs": len(ticks),
+        "products": len(ids),
+        "price_changes": int(len(event_times)),
+        "products_published": messages,
+        "deferred": deferred_total,
+        "simulated": simulated,
+        "actual": actual,
+        "totals": {
+            channel: {"simulated": int(simulated[channel].sum()), "actual": int(actual[channel].sum())}
+            for channel in channels
+        },
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def backtest(db, start, end=None, filters=None, channels=None, budgets=None, frequency_minutes=None, **kwargs):
+    """
+    Load and replay a date range, with the saved auto-publish config filling in anything not given.
+
+    Args:
+        db (DataManager): Source database; nothing is written to it
+        start (datetime): First run
+        end (datetime): Last run (default: now)
+
+    Returns:
+        dict: See run_backtest, plus load_seconds
+    """
+    end = end or datetime.now()
+    if end <= start:
+        raise ValueError("Backtest end must be after its start")
+    auto_config = db.get_auto_publish_config()
+    loaded = time.perf_counter()
+    data = load_backtest_data(db, start, end)
+    load_seconds = round(time.perf_counter() - loaded, 3)
+    result = run_backtest(
+        *data, start, end,
+        filters=filters if filters is not None else auto_config.get("filters", {}),
+        channels=channels or auto_config.get("channels", ["Telegram"]),
+        budgets=budgets if budgets is not None else auto_config.get("channel_budgets"),
+        frequency_minutes=frequency_minutes or auto_config.get("frequency", 30),
+        category_weights=kwargs.pop("category_weights", auto_config.get("category_weights")),
+        **kwargs
+    )
+    result["load_seconds"] = load_seconds
+    return result
+
+
+def default_range(days=30):
+    """(start, end) covering the last `days` days up to now."""
+    end = datetime.now()
+    return end - timedelta(days=days), end
@@ -0,0 +1,142 @@
+import heapq
+import math
+
+import numpy as np
+
+# Points per percent of discount / drop; see score_deal
+DEFAULT_WEIGHTS = {"buy_box_discount": 1.0, "mrp_discount": 0.5, "drop_since_publish": 1.5}
+
+
+def _price(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 and not math.isnan(value) else None
+
+
+def _percent_below(price, reference):
+    """How far price is below reference, in percent (0 if not below or unknown)."""
+    if price is None or reference is None or price >= reference:
+        return 0.0
+    return (reference - price) / reference * 100
+
+
+def score_deal(product, category_weights=None, weights=None):
+    """
+    Score a deal: discount versus Buy Box and MRP, plus the drop since the
+    product was last published, scaled by its category's weight.
+
+    Args:
+        product (dict): Product document; _last_published_price is used when
+                        present (set by the eligibility filters)
+        category_weights (dict): product_major_category -> weight (default 1.0)
+        weights (dict): Overrides for DEFAULT_WEIGHTS
+
+    Returns:
+        float: Higher is a better deal; 0 when the current price is unknown
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    current = _price(product.get("Product_current_price"))
+    if current is None:
+        return 0.0
+
+    score = (
+        weights["buy_box_discount"] * _percent_below(current, _price(product.get("Product_Buy_box_price")))
+        + weights["mrp_discount"] * _percent_below(current, _price(product.get("Product_MRP")))
+        + weights["drop_since_publish"] * _percent_below(current, _price(product.get("_last_published_price")))
+    )
+    category_weight = (category_weights or {}).get(product.get("product_major_category"), 1.0)
+    try:
+        category_weight = float(category_weight)
+    except (TypeError, ValueError):
+        category_weight = 1.0
+    return score * category_weight
+
+
+def score_arrays(current, buy_box, mrp, last_price, category_weight=1.0, weights=None):
+    """
+    score_deal over whole columns, for replays that score every product at once.
+
+    Args:
+        current, buy_box, mrp, last_price (array-like): Prices per product, NaN when missing
+        category_weight (float or array-like): Category weight per product
+        weights (dict): Overrides for DEFAULT_WEIGHTS
+
+    Returns:
+        ndarray: Scores; 0 where the current price is missing
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    current = np.asarray(current, dtype="float64")
+
+    def percent_below(reference):
+        reference = np.asarray(reference, dtype="float64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            below = (reference > 0) & (current < reference)
+            return np.where(below, (reference - current) / reference * 100, 0.0)
+
+    score = (
+        weights["buy_box_discount"] * percent_below(buy_box)
+        + weights["mrp_discount"] * percent_below(mrp)
+        + weights["drop_since_publish"] * percent_below(last_price)
+    )
+    with np.errstate(invalid="ignore"):
+        return np.where(current > 0, score * np.asarray(category_weight, dtype="float64"), 0.0)
+
+
+def select_top_deals(scored, budget):
+    """
+    Pick the best `budget` deals with a heap, in O(n log budget).
+
+    Args:
+        scored (list): (score, product) tuples
+        budget (int): How many to keep; None or <= 0 keeps all
+
+    Returns:
+        tuple: (selected, deferred) lists of (score, product), selected best first;
+               ties keep their input order
+    """
+    if not budget or budget <= 0 or budget >= len(scored):
+        order = sorted(range(len(scored)), key=lambda i: -scored[i][0])
+        return [scored[i] for i in order], []
+    best = heapq.nlargest(budget, range(len(scored)), key=lambda i: (scored[i][0], -i))
+    chosen = set(best)
+    return [scored[i] for i in best], [item for i, item in enumerate(scored) if i not in chosen]
+
+
+def plan_channel_budgets(products, channels, budgets=None, category_weights=None, weights=None):
+    """
+    Choose which eligible products go to which channel this run.
+
+    Each channel gets its own top-K by score under its budget, so a product
+    can make the Telegram cut but not the (smaller) WhatsApp one.
+
+    Args:
+        products (list): Eligible products
+        channels (list): Channels selected for the run
+        budgets (dict): Channel -> max messages per run; missing, None or 0 means unlimited
+
+    Returns:
+        tuple: (plan, deferred)
+            plan: list of (channels tuple, products best first), one entry per channel combination
+            deferred: products not selected for any channel, best first
+    """
+    scored = []
+    for product in products:
+        product["_deal_score"] = round(score_deal(product, category_weights, weights), 2)
+        scored.append((product["_deal_score"], product))
+
+    chosen = {}  # id(product) -> channels it was selected for
+    for channel in channels:
+        selected, _ = select_top_deals(scored, (budgets or {}).get(channel))
+        for _, product in selected:
+            chosen.setdefault(id(product), []).append(channel)
+
+    plan, deferred = {}, []
+    for _, product in sorted(scored, key=lambda item: -item[0]):
+        product_channels = tuple(chosen.get(id(product), ()))
+        if product_channels:
+            plan.setdefault(product_channels, []).append(product)
+        else:
+            deferred.append(product)
+    return list(plan.items()), deferred
@@ -0,0 +1,313 @@
+"""
+Auto-publish eligibility rules.
+
+A candidate is a product whose current price is below its Buy Box price. It is
+eligible when it was never published (never_published filter), or when it was
+published before and its price dropped since then (price_dropped filter) or
+the last publication is at least days_threshold days old (not_recent filter).
+With all three filters off every candidate is eligible.
+
+Ineligible products get one or more reason codes, so every evaluator reports
+skips the same way. There are two evaluators: build_eligibility_pipeline runs
+the rules inside MongoDB, evaluate_eligibility runs them in-process as NumPy
+masks over price and history columns.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Skip reason codes
+MISSING_PRICE = "missing_price"
+NOT_BELOW_BUY_BOX = "not_below_buy_box"
+NEVER_PUBLISHED_FILTER_OFF = "never_published_filter_off"
+REPUBLISH_FILTERS_OFF = "republish_filters_off"
+PRICE_NOT_DROPPED = "price_not_dropped"
+PUBLISHED_RECENTLY = "published_recently"
+
+REASON_CODES = (
+    MISSING_PRICE,
+    NOT_BELOW_BUY_BOX,
+    NEVER_PUBLISHED_FILTER_OFF,
+    REPUBLISH_FILTERS_OFF,
+    PRICE_NOT_DROPPED,
+    PUBLISHED_RECENTLY,
+)
+
+
+def filter_flags(filters):
+    """
+    Returns:
+        tuple: (never_published, price_dropped, not_recent, days_threshold) with the UI defaults
+    """
+    filters = filters or {}
+    return (
+        bool(filters.get("never_published", True)),
+        bool(filters.get("price_dropped", True)),
+        bool(filters.get("not_recent", True)),
+        filters.get("days_threshold", 4),
+    )
+
+
+def republish_window(filters):
+    """
+    How long after a send these filters let the same deal (product, price) go out
+    again: days_threshold with the not_recent filter, otherwise never - a new
+    price is a new deal anyway. For PublishOutbox.enqueue(republish_after=).
+
+    Returns:
+        timedelta or None
+    """
+    _, _, recent_filter, threshold_days = filter_flags(filters)
+    if not recent_filter:
+        return None
+    # A job completes just after its published_products record is dated
+    return max(timedelta(days=threshold_days) - timedelta(minutes=5), timedelta(0))
+
+
+def describe_reason(code, current_price=None, last_price=None, days_ago=None, threshold_days=None):
+    """Human-readable skip reason, as shown in the run summary."""
+    if code == PRICE_NOT_DROPPED:
+        return f"current price (₹{current_price}) not lower than last published price (₹{last_price})"
+    if code == PUBLISHED_RECENTLY:
+        return f"published too recently ({days_ago} days ago, threshold: {threshold_days} days)"
+    if code == NEVER_PUBLISHED_FILTER_OFF:
+        return "never published, but the 'Never published before' filter is off"
+    if code == REPUBLISH_FILTERS_OFF:
+        return "published before, and the price drop / not recent filters are off"
+    if code == NOT_BELOW_BUY_BOX:
+        return "current price not lower than buy box price"
+    return "missing or invalid price data"
+
+
+def _to_double(expression):
+    return {"$convert": {"input": expression, "to": "double", "onError": None, "onNull": None}}
+
+
+def build_eligibility_pipeline(filters, now=None, product_ids=None, published_collection="published_products"):
+    """
+    Compile the auto-publish filters into one aggregation on the products collection.
+
+    The latest usable publication of each product is joined with a $lookup
+    sub-pipeline that is served by the (product_id, published_date) index on
+    published_products, so history is never scanned in Python.
+
+    Args:
+        filters (dict): Auto-publish filters from the config
+        now (datetime): Reference time for the not_recent rule
+        product_ids (list): Restrict to these Product_unique_IDs (e.g. products whose price changed)
+        published_collection (str): Name of the publication history collection
+
+    Returns:
+        list: Pipeline stages. Each output document is a product with _eligible,
+              _skip_reasons, _last_published_price, _last_published_date and _days_since_publish
+    """
+    never_filter, dropped_filter, recent_filter, threshold_days = filter_flags(filters)
+    now = now or datetime.now()
+
+    match = {"$expr": {"$lt": [_to_double("$Product_current_price"), _to_double("$Product_Buy_box_price")]}}
+    if product_ids is not None:
+        match["Product_unique_ID"] = {"$in": list(product_ids)}
+
+    last_price = _to_double("$_last.product_price")
+    last_date = {"$convert": {"input": "$_last.published_date", "to": "date", "onError": None, "onNull": None}}
+    current = _to_double("$Product_current_price")
+
+    never = {"$eq": [{"$ifNull": ["$_last", None]}, None]}
+    dropped = {"$lt": ["$_current", "$_last_published_price"]}
+    not_recent = {"$gte": ["$_days_since_publish", threshold_days]}
+    all_off = not (never_filter or dropped_filter or recent_filter)
+
+    def reason_if(condition, code):
+        return {"$cond": [condition, [code], []]}
+
+    return [
+        {"$match": match},
+        {"$lookup": {
+            "from": published_collection,
+            "let": {"pid": "$Product_unique_ID"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$product_id", "$$pid"]}}},
+                # Records without a price or date are ignored, like the old history loop did
+                {"$match": {"product_price": {"$nin": [None, 0, ""]}, "published_date": {"$ne": None}}},
+                {"$sort": {"published_date": -1}},
+                {"$limit": 1},
+                {"$project": {"_id": 0, "product_price": 1, "published_date": 1}},
+            ],
+            "as": "_history",
+        }},
+        {"$addFields": {"_last": {"$arrayElemAt": ["$_history", 0]}, "_current": current}},
+        {"$addFields": {
+            "_last_published_price": last_price,
+            "_last_published_date": last_date,
+            "_days_since_publish": {"$cond": [
+                {"$eq": [last_date, None]}, None,
+                {"$floor": {"$divide": [{"$subtract": [now, last_date]}, 86400000]}},
+            ]},
+        }},
+        {"$addFields": {"_skip_reasons": {"$cond": [
+            {"$or": [{"$eq": ["$_current", None]}, {"$lte": ["$_current", 0]}]},
+            [MISSING_PRICE],
+            {"$cond": [
+                never,
+                [] if (all_off or never_filter) else [NEVER_PUBLISHED_FILTER_OFF],
+                [] if all_off else {"$cond": [
+                    {"$eq": ["$_last_published_price", None]},
+                    [MISSING_PRICE],
+                    {"$cond": [
+                        {"$or": [
+                            {"$and": [dropped_filter, dropped]},
+                            {"$and": [recent_filter, not_recent]},
+                        ]},
+                        [],
+                        {"$concatArrays": [
+                            reason_if(dropped_filter and {"$not": [dropped]}, PRICE_NOT_DROPPED),
+                            reason_if(recent_filter and {"$not": [not_recent]}, PUBLISHED_RECENTLY),
+                            reason_if(not (dropped_filter or recent_filter), REPUBLISH_FILTERS_OFF),
+                        ]},
+                    ]},
+                ]},
+            ]},
+        ]}}},
+        {"$addFields": {"_eligible": {"$eq": [{"$size": "$_skip_reasons"}, 0]}}},
+        {"$project": {"_history": 0, "_last": 0, "_current": 0}},
+    ]
+
+
+def reason_bit(code):
+    return 1 << REASON_CODES.index(code)
+
+
+def decode_reasons(bits):
+    """Turn a reason bitmask from evaluate_eligibility into a list of reason codes."""
+    return [code for code in REASON_CODES if int(bits) & reason_bit(code)]
+
+
+def evaluate_eligibility(current_price, buy_box_price, last_price, last_published, filters, now=None):
+    """
+    Apply the eligibility rules to whole columns at once.
+
+    Args:
+        current_price, buy_box_price (array-like): Prices per product, NaN when missing
+        last_price (array-like): Price of the latest publication, NaN when never published
+        last_published (array-like): Date of the latest publication, NaT when never published
+        filters (dict): Auto-publish filters
+        now (datetime): Reference time for the not_recent rule
+
+    Returns:
+        tuple: (eligible bool array, reason bitmask uint8 array); see decode_reasons
+    """
+    never_filter, dropped_filter, recent_filter, threshold_days = filter_flags(filters)
+    all_off = not (never_filter or dropped_filter or recent_filter)
+    now = np.datetime64(now or datetime.now(), "ns")
+
+    current = np.asarray(current_price, dtype="float64")
+    buy_box = np.asarray(buy_box_price, dtype="float64")
+    last = np.asarray(last_price, dtype="float64")
+    last_date = np.asarray(last_published, dtype="datetime64[ns]")
+
+    with np.errstate(invalid="ignore"):
+        missing = ~(current > 0)
+        base_ok = ~missing & (current < buy_box)
+        never = np.isnat(last_date)
+        days_ago = np.floor((now - last_date) / np.timedelta64(1, "D"))
+        dropped = current < last
+        not_recent = days_ago >= threshold_days
+    history_ok = ~never & ~np.isnan(last)
+    passes = (dropped_filter & dropped) | (recent_filter & not_recent)
+
+    if all_off:
+        eligible = base_ok
+    else:
+        eligible = base_ok & np.where(never, never_filter, history_ok & passes)
+
+    reasons = np.zeros(current.shape, dtype=np.uint8)
+    reasons[missing] |= reason_bit(MISSING_PRICE)
+    reasons[~missing & ~base_ok] |= reason_bit(NOT_BELOW_BUY_BOX)
+    if not all_off:
+        republish = base_ok & history_ok & ~passes
+        reasons[base_ok & ~never & np.isnan(last)] |= reason_bit(MISSING_PRICE)
+        if not never_filter:
+            reasons[base_ok & never] |= reason_bit(NEVER_PUBLISHED_FILTER_OFF)
+        if dropped_filter:
+            reasons[republish & ~dropped] |= reason_bit(PRICE_NOT_DROPPED)
+        if recent_filter:
+            reasons[republish & ~not_recent] |= reason_bit(PUBLISHED_RECENTLY)
+        if not (dropped_filter or recent_filter):
+            reasons[republish] |= reason_bit(REPUBLISH_FILTERS_OFF)
+    return eligible, reasons
+
+
+def _frame(records, fields):
+    if isinstance(records, pd.DataFrame):
+        return records.reindex(columns=list(fields))
+    return pd.DataFrame.from_records(records, columns=list(fields))
+
+
+def latest_publications(product_ids, history, id_field="product_id", price_field="product_price",
+                        date_field="published_date"):
+    """
+    Latest usable publication (non-zero price and a date) of each product.
+
+    Args:
+        product_ids (array-like): Product ids to align the result to
+        history (DataFrame or list): Publication records
+
+    Returns:
+        tuple: (last_price float array, last_published datetime64 array), aligned to product_ids
+    """
+    history = _frame(history, (id_field, price_field, date_field))
+    prices = pd.to_numeric(history[price_field], errors="coerce").to_numpy(dtype="float64")
+    dates = pd.to_datetime(history[date_field], errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+    ids = pd.Index(product_ids)
+    unique_ids = ids if ids.is_unique else ids.drop_duplicates()
+    positions = unique_ids.get_indexer(history[id_field])
+
+    keep = (positions >= 0) & ~np.isnan(prices) & (prices != 0) & ~np.isnat(dates)
+    positions, prices, dates = positions[keep], prices[keep], dates[keep]
+    # Sort by product, then date: the last row of each product is its latest publication
+    order = np.lexsort((dates, positions))
+    positions, prices, dates = positions[order], prices[order], dates[order]
+    last_rows = np.append(positions[1:] != positions[:-1], True) if len(positions) else np.zeros(0, dtype=bool)
+
+    last_price = np.full(len(unique_ids), np.nan)
+    last_published = np.full(len(unique_ids), np.datetime64("NaT"), dtype="datetime64[ns]")
+    last_price[positions[last_rows]] = prices[last_rows]
+    last_published[positions[last_rows]] = dates[last_rows]
+
+    if unique_ids is not ids:
+        aligned = unique_ids.get_indexer(ids)
+        return last_price[aligned], last_published[aligned]
+    return last_price, last_published
+
+
+def evaluate_products(products, history, filters, now=None, id_field="Product_unique_ID",
+                      history_fields=("product_id", "product_price", "published_date")):
+    """
+    Evaluate product records against their publication history with evaluate_eligibility.
+
+    Args:
+        products (DataFrame or list): Product records
+        history (DataFrame or list): Publication records, with the fields named in history_fields
+
+    Returns:
+        DataFrame: One row per product, in input order, with id, current_price, buy_box_price,
+                   eligible, reasons, last_price, last_published and days_since_publish columns
+    """
+    products = _frame(products, (id_field, "Product_current_price", "Product_Buy_box_price"))
+    last_price, last_published = latest_publications(products[id_field], history, *history_fields)
+
+    now = np.datetime64(now or datetime.now(), "ns")
+    frame = pd.DataFrame({
+        "id": products[id_field].to_numpy(),
+        "current_price": pd.to_numeric(products["Product_current_price"], errors="coerce").to_numpy(dtype="float64"),
+        "buy_box_price": pd.to_numeric(products["Product_Buy_box_price"], errors="coerce").to_numpy(dtype="float64"),
+        "last_price": last_price,
+        "last_published": last_published,
+    })
+    frame["eligible"], frame["reasons"] = evaluate_eligibility(
+        frame["current_price"].to_numpy(), frame["buy_box_price"].to_numpy(), last_price, last_published, filters, now
+    )
+    frame["days_since_publish"] = np.floor((now - last_published) / np.timedelta64(1, "D"))
+    return frame
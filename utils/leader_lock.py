@@ -0,0 +1,153 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+LOCK_COLLECTION = "scheduler_locks"
+
+
+class LeaderLock:
+    """
+    Lease-based leader lock stored in MongoDB, one document per lock name.
+
+    The holder keeps its lease by renewing it (a heartbeat) well before it
+    expires; any other contender takes over once the lease has lapsed, e.g.
+    because the leading process died. Every LeaderLock instance is its own
+    contender, so two scheduler threads in the same process are kept apart
+    just like two processes on different machines.
+    """
+
+    def __init__(self, collection, name, ttl_seconds=120, owner_id=None):
+        """
+        Args:
+            collection: pymongo collection holding the lock documents
+            name (str): Lock name, e.g. "auto_publish"
+            ttl_seconds (int): Lease length; renewed every ttl_seconds / 3
+        """
+        self.collection = collection
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner_id = owner_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._expires_at = 0.0
+        self._renewed_at = 0.0
+        self._heartbeat_thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_leader(self):
+        """True while this instance holds an unexpired lease (no database round trip)."""
+        return time.time() < self._expires_at
+
+    def acquire(self):
+        """
+        Take the lock if it is free or expired, or renew it if already held.
+
+        Returns:
+            bool: True if this instance is the leader
+        """
+        now = datetime.now()
+        started = time.time()
+        try:
+            self.collection.find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.owner_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner_id, "expires_at": now + timedelta(seconds=self.ttl_seconds),
+                          "heartbeat_at": now},
+                 "$setOnInsert": {"created_at": now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The lock document exists and is held by someone else
+            self._expires_at = 0.0
+            return False
+        except Exception as e:
+            print(f"[LeaderLock {self.name}] Error renewing lease: {e}")
+            return self.is_leader
+
+        if not self.is_leader:
+            print(f"[LeaderLock {self.name}] {self.owner_id} is now the leader")
+        # Count the lease from before the round trip so it never outlives the stored one
+        self._expires_at = started + self.ttl_seconds
+        self._renewed_at = started
+        return True
+
+    def ensure(self):
+        """
+        Cheap leadership check for polling loops: only talks to MongoDB when
+        the lease is due for renewal or this instance is not the leader.
+
+        Returns:
+            bool: True if this instance is the leader
+        """
+        if self.is_leader and time.time() - self._renewed_at < self.ttl_seconds / 3:
+            return True
+        return self.acquire()
+
+    def release(self):
+        """Give up the lease so another contender can take over right away."""
+        self.stop_heartbeat()
+        was_leader = self.is_leader
+        self._expires_at = 0.0
+        try:
+            self.collection.update_one(
+                {"_id": self.name, "owner": self.owner_id},
+                {"$set": {"expires_at": datetime(1970, 1, 1)}}
+            )
+        except Exception as e:
+            print(f"[LeaderLock {self.name}] Error releasing lease: {e}")
+        if was_leader:
+            print(f"[LeaderLock {self.name}] {self.owner_id} released leadership")
+
+    def start_heartbeat(self):
+        """
+        Contend for and renew the lease in a background thread, for
+        long-running processes that check is_leader before each job.
+        """
+        if self._heartbeat_thread and self._heartbeat_thread.is_alive():
+            return self._heartbeat_thread
+        self._stop_event.clear()
+        self.acquire()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name=f"leader-lock-{self.name}",
+                                                  daemon=True)
+        self._heartbeat_thread.start()
+        return self._heartbeat_thread
+
+    def stop_heartbeat(self):
+        self._stop_event.set()
+        if self._heartbeat_thread and self._heartbeat_thread is not threading.current_thread():
+            self._heartbeat_thread.join(timeout=5)
+        self._heartbeat_thread = None
+
+    @contextmanager
+    def keep_alive(self):
+        """Keep renewing the lease while a job runs longer than the heartbeat interval of its loop."""
+        running = self._heartbeat_thread is not None and self._heartbeat_thread.is_alive()
+        if not running:
+            self.start_heartbeat()
+        try:
+            yield self
+        finally:
+            if not running:
+                self.stop_heartbeat()
+
+    def _heartbeat_loop(self):
+        while not self._stop_event.wait(self.ttl_seconds / 3):
+            self.acquire()
+
+
+def run_as_leader(lock, name, func, *args, **kwargs):
+    """
+    Run func only if lock is held, renewing the lease while it runs.
+
+    Returns:
+        The result of func, or None if another process is the leader
+    """
+    if not lock.ensure():
+        print(f"[{name}] Skipped: another process holds the '{lock.name}' lock")
+        return None
+    with lock.keep_alive():
+        return func(*args, **kwargs)
@@ -0,0 +1,145 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class RunLogger:
+    """
+    Buffered JSON-lines logger for automatic publishing runs.
+
+    Callers only enqueue records; a background thread keeps the file open,
+    writes whatever is queued in one go and rotates the file when it grows
+    past max_bytes or is older than rotate_seconds. Rotated files are kept as
+    <path>.1 ... <path>.<backup_count>, newest first.
+
+    Each line is a JSON object with ts, level, message, and any extra fields
+    passed to log() (run_id, product_id, ...).
+    """
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, rotate_seconds=24 * 3600, backup_count=10,
+                 max_pending=100000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._file = None
+        self._opened_at = None
+        self.dropped = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def log(self, message, level="info", **fields):
+        """Queue one record. Never blocks; records are dropped (and counted) if the writer falls far behind."""
+        self._ensure_writer()
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "level": level, "message": message}
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=10):
+        """Wait until queued records have been written."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.02)
+
+    def read(self, run_id=None, limit=None):
+        """
+        Read records back from the current file, optionally for one run.
+
+        Returns:
+            list: Records, oldest first (the last `limit` if given)
+        """
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if run_id is None or record.get("run_id") == run_id:
+                        records.append(record)
+        except FileNotFoundError:
+            return []
+        return records[-limit:] if limit else records
+
+    def _ensure_writer(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._writer_loop, name="run-log-writer", daemon=True)
+                self._thread.start()
+
+    def _writer_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is already queued so it goes out in one write
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"Error writing run log: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        if self._should_rotate():
+            self._rotate()
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._opened_at = time.time()
+        self._file.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch))
+        self._file.flush()
+        if self._should_rotate():
+            self._rotate()
+
+    def _should_rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        if self.rotate_seconds and size:
+            opened_at = self._opened_at or os.path.getmtime(self.path)
+            return time.time() - opened_at >= self.rotate_seconds
+        return False
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+_loggers = {}
+_loggers_lock = threading.Lock()
+
+
+def get_run_logger(path, **kwargs):
+    """One RunLogger (and writer thread) per file per process."""
+    path = os.path.abspath(path)
+    with _loggers_lock:
+        if path not in _loggers:
+            _loggers[path] = RunLogger(path, **kwargs)
+        return _loggers[path]
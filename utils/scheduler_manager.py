@@ -4,6 +4,8 @@ import schedule
 import threading
 import time
 from streamlit.runtime.scriptrunner import get_script_run_ctx
+from db.db_manager import DataManager
+from utils.leader_lock import LOCK_COLLECTION, LeaderLock
 
 def start_scheduler(hours, minutes, daily_times, run_monitor_callback):
     """Set up a scheduler to run the monitoring at specified intervals and times."""
@@ -21,10 +23,17 @@ def start_scheduler(hours, minutes, daily_times, run_monitor_callback):
 
     schedule.clear()
     ctx = get_script_run_ctx()
+    # Each session schedules its own monitor; the lease makes sure only one of them runs at a time
+    if "monitor_leader_lock" not in st.session_state:
+        st.session_state["monitor_leader_lock"] = LeaderLock(DataManager().db[LOCK_COLLECTION], "product_monitor")
+    leader_lock = st.session_state["monitor_leader_lock"]
     
     def safe_run_monitor():
+        if not leader_lock.ensure():
+            print("[Scheduler] Monitor run skipped: another session or process holds the lock")
+            return
         try:
-            with ctx:
+            with ctx, leader_lock.keep_alive():
                 run_monitor_callback(st.session_state.sites)
                 st.session_state.scheduler_config["last_run"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         except Exception as e:
@@ -48,6 +57,8 @@ def stop_scheduler():
     """Stop the scheduler thread"""
     schedule.clear()
     st.session_state["monitoring_active"] = False
+    if "monitor_leader_lock" in st.session_state:
+        st.session_state["monitor_leader_lock"].release()
 
 def _scheduler_loop():
     """Dedicated scheduler loop that maintains state"""
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger("WhatsAppSender")
+
+
+class RecipientResolutionCache:
+    """
+    Remembers how each WhatsApp recipient was last opened successfully so the
+    sender can try that strategy first instead of walking the whole lookup chain.
+
+    Strategies:
+        direct       - the chat title was visible in the chat list
+        search       - the chat was found through the search box
+        channels_tab - the channel was found in the channels tab (with its list position)
+        deep_link    - the chat has its own URL that can be opened directly
+    """
+
+    STRATEGIES = ("direct", "search", "channels_tab", "deep_link")
+    # Hit counters alone are written at most this often; a changed strategy is written at once
+    SAVE_INTERVAL_SECONDS = 60
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._last_save = time.monotonic()
+
+    @staticmethod
+    def make_key(recipient_name, is_channel=False):
+        return f"{'channel' if is_channel else 'group'}:{recipient_name}"
+
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            logger.warning(f"Could not read chat resolution cache: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write chat resolution cache: {e}")
+        self._last_save = time.monotonic()
+
+    def get(self, recipient_name, is_channel=False):
+        """Return the cached resolution for a recipient, or None."""
+        with self._lock:
+            entry = self._entries.get(self.make_key(recipient_name, is_channel))
+            return dict(entry) if entry else None
+
+    def record_success(self, recipient_name, is_channel, strategy, position=None, url=None):
+        """Store the strategy that just opened the recipient's chat."""
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown resolution strategy: {strategy}")
+
+        with self._lock:
+            key = self.make_key(recipient_name, is_channel)
+            entry = self._entries.get(key, {"hits": 0, "misses": 0})
+            resolution = {"strategy": strategy, "position": position, "url": url or entry.get("url")}
+            changed = any(entry.get(field) != value for field, value in resolution.items())
+            if entry.get("strategy") == strategy:
+                entry["hits"] = entry.get("hits", 0) + 1
+            entry.update(resolution)
+            entry["last_success"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._entries[key] = entry
+            if changed or time.monotonic() - self._last_save >= self.SAVE_INTERVAL_SECONDS:
+                self._save()
+
+    def record_miss(self, recipient_name, is_channel=False):
+        """Count a cached strategy that no longer works."""
+        with self._lock:
+            key = self.make_key(recipient_name, is_channel)
+            if key in self._entries:
+                self._entries[key]["misses"] = self._entries[key].get("misses", 0) + 1
+                self._save()
+
+    def set_deep_link(self, recipient_name, url, is_channel=False):
+        """Register a known deep link (e.g. a channel URL) for a recipient."""
+        self.record_success(recipient_name, is_channel, "deep_link", url=url)
+
+    def invalidate(self, recipient_name, is_channel=False):
+        with self._lock:
+            if self._entries.pop(self.make_key(recipient_name, is_channel), None) is not None:
+                self._save()
+
+    def flush(self):
+        """Write hit counters that are otherwise only saved every SAVE_INTERVAL_SECONDS."""
+        with self._lock:
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    def stats(self):
+        """Return a copy of all entries keyed by recipient."""
+        with self._lock:
+            return {key: dict(value) for key, value in self._entries.items()}
+
+
+class SelectorVariantCache:
+    """
+    Remembers which XPath variant last worked for each UI step (attach button,
+    file input, send button, ...) so the sender tries it first with a short
+    wait instead of paying the fallback timeouts again on every message.
+    Per-step hit/miss counts are stored alongside.
+    """
+
+    # Hit counters alone are written at most this often; a changed variant is written at once
+    SAVE_INTERVAL_SECONDS = 60
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._last_save = time.monotonic()
+
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            logger.warning(f"Could not read selector cache: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write selector cache: {e}")
+        self._last_save = time.monotonic()
+
+    def preferred(self, step):
+        with self._lock:
+            return self._entries.get(step, {}).get("xpath")
+
+    def record(self, step, xpath, hit):
+        """
+        Store the variant that just worked for a step.
+
+        Args:
+            step (str): UI step name
+            xpath (str): Variant that matched
+            hit (bool): Whether it was the cached (first-tried) variant
+        """
+        with self._lock:
+            entry = self._entries.get(step, {"hits": 0, "misses": 0})
+            changed = entry.get("xpath") != xpath
+            if hit:
+                entry["hits"] = entry.get("hits", 0) + 1
+            else:
+                entry["misses"] = entry.get("misses", 0) + 1
+            entry["xpath"] = xpath
+            entry["last_success"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._entries[step] = entry
+            if changed or time.monotonic() - self._last_save >= self.SAVE_INTERVAL_SECONDS:
+                self._save()
+
+    def record_failure(self, step):
+        """Count a step where no variant matched at all."""
+        with self._lock:
+            entry = self._entries.get(step, {"hits": 0, "misses": 0})
+            entry["failures"] = entry.get("failures", 0) + 1
+            self._entries[step] = entry
+            self._save()
+
+    def flush(self):
+        """Write hit counters that are otherwise only saved every SAVE_INTERVAL_SECONDS."""
+        with self._lock:
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    def stats(self):
+        """Return a copy of all entries keyed by step."""
+        with self._lock:
+            return {key: dict(value) for key, value in self._entries.items()}
@@ -0,0 +1,86 @@
+import os
+import queue
+import threading
+import logging
+import time
+
+logger = logging.getLogger("WhatsAppSender")
+
+
+class DebugArtifactStore:
+    """
+    Size-capped ring store for WhatsApp debug captures (screenshots and page
+    sources). Files are written by a background thread so the sender does not
+    wait on disk I/O, and the oldest captures are evicted once the directory
+    grows past max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, max_pending=20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def submit(self, prefix, screenshot_png=None, page_source=None):
+        """
+        Queue a capture for writing. Returns False if the writer is backed up,
+        in which case the capture is dropped rather than blocking the caller.
+        """
+        self._ensure_writer()
+        try:
+            timestamp = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}"
+            self._queue.put_nowait((prefix, timestamp, screenshot_png, page_source))
+            return True
+        except queue.Full:
+            logger.warning(f"Debug capture '{prefix}' dropped, writer queue is full")
+            return False
+
+    def flush(self, timeout=10):
+        """Wait until queued captures have been written (used on shutdown)."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+
+    def _ensure_writer(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._writer_loop, name="whatsapp-debug-writer", daemon=True)
+                self._thread.start()
+
+    def _writer_loop(self):
+        while True:
+            prefix, timestamp, screenshot_png, page_source = self._queue.get()
+            try:
+                if screenshot_png:
+                    with open(os.path.join(self.directory, f"{prefix}_screenshot_{timestamp}.png"), "wb") as f:
+                        f.write(screenshot_png)
+                if page_source:
+                    with open(os.path.join(self.directory, f"{prefix}_source_{timestamp}.html"), "w", encoding="utf-8") as f:
+                        f.write(page_source)
+                self._evict()
+                logger.info(f"Debug info '{prefix}' captured to {self.directory}")
+            except Exception as e:
+                logger.error(f"Failed to write debug capture: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _evict(self):
+        """Delete the oldest files until the store fits in max_bytes."""
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,123 @@
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.whatsapp_sender import WhatsappSender
+
+logger = logging.getLogger("WhatsAppSender")
+
+
+class WhatsappSenderPool:
+    """
+    A fixed set of WhatsappSender instances, each with its own isolated Edge
+    profile (and therefore its own logged-in WhatsApp Web session), used to
+    send to several recipients in parallel.
+
+    Every profile must be linked to WhatsApp once (see link_profiles); after
+    that the pool can run headless. A recipient is always sent from the same
+    profile, for single sends and batches alike, so its chat resolution
+    cache stays warm.
+    """
+
+    def __init__(self, size=2, headless=True, profile_names=None):
+        if profile_names is None:
+            # Keep the already-linked default profile as the first pool member
+            profile_names = [WhatsappSender.DEFAULT_PROFILE] + [f"pool_{i}" for i in range(1, size)]
+        if not profile_names:
+            raise ValueError("WhatsappSenderPool needs at least one profile")
+
+        self.profile_names = list(profile_names)
+        self.headless = headless
+        self.senders = [WhatsappSender(name, headless=headless) for name in self.profile_names]
+
+    def __len__(self):
+        return len(self.senders)
+
+    def sender_for(self, recipient_name):
+        """Return the profile that owns a recipient (stable across runs and recipient lists)."""
+        index = zlib.crc32(recipient_name.encode("utf-8")) % len(self.senders)
+        return self.senders[index]
+
+    def plan(self, recipients):
+        """
+        Group recipient names by the profile that owns them (see sender_for).
+
+        Returns:
+            dict: sender -> list of recipient names
+        """
+        assignments = {}
+        for recipient_name in sorted(set(recipients)):
+            assignments.setdefault(self.sender_for(recipient_name), []).append(recipient_name)
+        return assignments
+
+    def send_batches(self, jobs):
+        """
+        Send message batches to several recipients, one worker thread per profile.
+
+        Args:
+            jobs (list): (recipient_name, messages, is_channel) tuples, where messages
+                         is a list accepted by WhatsappSender.send_batch
+
+        Returns:
+            dict: (recipient_name, is_channel) -> list of (success, status) tuples
+        """
+        owner = {}
+        for sender, names in self.plan([job[0] for job in jobs]).items():
+            for recipient_name in names:
+                owner[recipient_name] = sender
+
+        per_sender = {}
+        for recipient_name, messages, is_channel in jobs:
+            per_sender.setdefault(owner[recipient_name], []).append((recipient_name, messages, is_channel))
+
+        def run_jobs(sender, sender_jobs):
+            sender_results = {}
+            for recipient_name, messages, is_channel in sender_jobs:
+                try:
+                    sender_results[(recipient_name, is_channel)] = sender.send_batch(recipient_name, messages, is_channel)
+                except Exception as e:
+                    logger.error(f"[{sender.profile_name}] Batch to {recipient_name} failed: {e}")
+                    sender_results[(recipient_name, is_channel)] = [(False, str(e))] * len(messages)
+            return sender_results
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(per_sender) or 1, thread_name_prefix="whatsapp") as executor:
+            futures = {executor.submit(run_jobs, sender, sender_jobs): sender_jobs
+                       for sender, sender_jobs in per_sender.items()}
+            for future in as_completed(futures):
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    for recipient_name, messages, is_channel in futures[future]:
+                        results[(recipient_name, is_channel)] = [(False, str(e))] * len(messages)
+        return results
+
+    def link_profiles(self):
+        """
+        Open each profile with a visible browser and wait for the QR code to be
+        scanned, so the profiles can be used headless afterwards.
+
+        Returns:
+            dict: profile name -> True if logged in
+        """
+        linked = {}
+        for name in self.profile_names:
+            sender = WhatsappSender(name)
+            sender.headless = False
+            try:
+                # close() below saves cookies and local storage for the profile
+                linked[name] = sender._prepare_session()
+            except Exception as e:
+                logger.error(f"Could not link profile {name}: {e}")
+                linked[name] = False
+            finally:
+                sender.close()
+                sender.headless = self.headless
+        return linked
+
+    def close(self):
+        for sender in self.senders:
+            try:
+                sender.close()
+            except Exception as e:
+                logger.warning(f"Error closing sender {sender.profile_name}: {e}")
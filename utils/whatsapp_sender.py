@@ -15,14 +15,22 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains 
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
 import requests
 import streamlit as st
 from pathlib import Path
+from urllib.parse import urlparse
+import threading
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.whatsapp_cache import RecipientResolutionCache, SelectorVariantCache
+from utils.whatsapp_timing import SendTimer
+from utils.whatsapp_debug import DebugArtifactStore
+import random
+from collections import deque
+import functools
 import uuid
 import shutil
 import atexit
-import pywinauto
-from pywinauto.application import Application
 import time
 # Configure logging
 logging.basicConfig(
@@ -35,28 +43,121 @@ logging.basicConfig(
 )
 logger = logging.getLogger("WhatsAppSender")
 
+def _timed_phase(phase):
+    """Add the wrapped method's duration to the active send timer under a phase name."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._add_span(phase, started)
+        return wrapper
+    return decorator
+
+
 class WhatsappSender:
 
-    # Class-level singleton instance
-    _instance = None
-    _initialized = False
+    # XPaths shared by the send flow
+    SIDE_PANEL_XPATH = '//div[@id="side"]'
+    QR_CODE_XPATH = '//div[@data-ref] | //canvas[@aria-label="Scan me!"]'
+    COMPOSER_XPATH = '//div[@contenteditable="true" and @data-tab="10"]'
+    SEARCH_BOX_XPATH = '//div[@contenteditable="true"][@data-tab="3"]'
+
+    # Selector variants per UI step, in priority order. The variant that last
+    # worked for a step is remembered and tried first (see _find_variant).
+    SELECTOR_VARIANTS = {
+        "channels_tab": (
+            '//span[@data-icon="newsletter-tab"]',
+            '//span[@data-testid="newsletter-tab"]',
+            '//span[@data-icon="newsletter-outline"]',
+            '//span[@data-testid="newsletter"]',
+        ),
+        "attach": (
+            '//div[@title="Attach"]',
+            '//button[@title="Attach"]',
+            '//span[@data-icon="attach"]/..',
+            '//span[@data-testid="clip"]/..',
+        ),
+        "file_input": (
+            '//span[text()="Photos & videos" or (contains(text(), "Photos") and contains(text(), "videos"))]/..//input[@type="file"]',
+            '//span[@data-icon="media-filled-refreshed"]/../..//input[@type="file"]',
+            '//input[@accept="image/*,video/mp4,video/3gpp,video/quicktime"]',
+            '//input[@type="file"]',
+        ),
+        "caption": (
+            '//div[@contenteditable="true" and @data-tab="10"]',
+            '//div[@contenteditable="true" and @role="textbox"]',
+            '//div[@contenteditable="true"][@data-testid="media-caption"]',
+        ),
+        "send": (
+            '//div[@role="button"][@aria-label="Send"]',
+            '//span[@data-icon="send"]',
+            '//span[@data-testid="send"]/..',
+            '//button[contains(@aria-label, "Send")]',
+        ),
+    }
+    CHANNELS_TAB_XPATH = ' | '.join(SELECTOR_VARIANTS["channels_tab"])
+    ATTACH_XPATH = ' | '.join(SELECTOR_VARIANTS["attach"])
+    CAPTION_XPATH = ' | '.join(SELECTOR_VARIANTS["caption"])
+    SEND_XPATH = ' | '.join(SELECTOR_VARIANTS["send"])
+    MEDIA_PREVIEW_XPATH = '//div[@data-testid="media-editor"] | //div[contains(@class, "media-editor")] | //img[starts-with(@src, "blob:")]'
+    OUTGOING_MESSAGE_XPATH = '//div[@id="main"]//div[contains(@class, "message-out")]'
+    SEND_ACK_XPATH = './/span[@data-icon="msg-check" or @data-icon="msg-dblcheck" or @data-icon="msg-dblcheck-ack"]'
+    POPUP_XPATH = (
+        '//div[@role="button" and (contains(., "Continue") or contains(., "Accept") or contains(., "OK"))]'
+        ' | //div[contains(@class, "popup") or contains(@class, "modal")]//div[@role="button"]'
+    )
+
+    DEFAULT_PROFILE = "default"
+    WHATSAPP_URL = "https://web.whatsapp.com/"
+
+    # Lock files Edge leaves in the root of the user data dir after a crash
+    PROFILE_LOCK_FILES = ("SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile")
+
+    # A released browser is quit after this long without a send (see release_driver)
+    IDLE_QUIT_SECONDS = 600
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(WhatsappSender, cls).__new__(cls)
-        return cls._instance
+    # One instance per browser profile; the default profile keeps the original singleton behaviour
+    _instances = {}
+    _instances_lock = threading.Lock()
 
-    def __init__(self):
-        # Only initialize once
-        if WhatsappSender._initialized:
+    def __new__(cls, profile_name=DEFAULT_PROFILE, headless=False, base_url=None):
+        with cls._instances_lock:
+            instance = cls._instances.get(profile_name)
+            if instance is None:
+                instance = super(WhatsappSender, cls).__new__(cls)
+                instance._initialized = False
+                cls._instances[profile_name] = instance
+            return instance
+
+    def __init__(self, profile_name=DEFAULT_PROFILE, headless=False, base_url=None):
+        # Only initialize once per profile
+        if self._initialized:
             return
             
-        WhatsappSender._initialized = True
+        self._initialized = True
+        # base_url can point at a local stand-in page (see benchmarks/fake_whatsapp_web.py)
+        self.base_url = base_url or self.WHATSAPP_URL
+        self._base_host = urlparse(self.base_url).netloc
         self.driver = None
+        self.profile_name = profile_name
+        self.headless = headless
+
+        # Serializes use of this profile's driver across threads
+        self._lock = threading.RLock()
+
+        # When the driver last finished a send, and the pending idle quit if released
+        self._last_used = time.monotonic()
+        self._idle_timer = None
         
-        # Setup paths with fixed, reliable persistent storage location
+        # Setup paths with fixed, reliable persistent storage location.
+        # Extra pool profiles live under profiles/<name> with their own session files.
         user_home = os.path.expanduser("~")
         self._data_dir = os.path.join(user_home, '.whatsapp_automation')
+        if profile_name != self.DEFAULT_PROFILE:
+            self._data_dir = os.path.join(self._data_dir, 'profiles', profile_name)
         os.makedirs(self._data_dir, exist_ok=True)
         
         # Use a consistent profile directory
@@ -68,6 +169,27 @@ class WhatsappSender:
         self.cookies_file = os.path.join(self._data_dir, "whatsapp_cookies.pkl")
         self.pid_file = os.path.join(self._data_dir, "edge_driver.pid")
         self.storage_path = os.path.join(self._data_dir, "whatsapp_storage.json")
+
+        # How each recipient's chat was last opened successfully
+        self.resolution_cache = RecipientResolutionCache(os.path.join(self._data_dir, "chat_resolution.json"))
+        self._last_resolution = None
+
+        # Which XPath variant last worked for each UI step
+        self.selector_cache = SelectorVariantCache(os.path.join(self._data_dir, "selector_variants.json"))
+
+        # Debug captures: always on failures, otherwise only for a sampled share of sends
+        self.debug_sample_rate = 0.0
+        self.debug_store = DebugArtifactStore(os.path.join(self._data_dir, "debug"))
+
+        # Per-phase timings of the message being sent and finished records waiting to be persisted
+        self._timer = None
+        self.timing_records = deque(maxlen=1000)
+
+        # Saved cookies/localStorage are restored at most once per browser lifetime
+        self._session_restored = False
+
+        # How the last message text was entered ("paste", "insert_text" or "keys") and how long it took
+        self.last_text_entry = None
         
         # Register cleanup on exit
         atexit.register(self._cleanup_all)
@@ -75,8 +197,9 @@ class WhatsappSender:
         # Clean up existing processes before initializing
         self._cleanup_processes()
         
-        logger.info("WhatsApp Sender initialized")
+        logger.info(f"WhatsApp Sender initialized (profile: {profile_name}, headless: {headless})")
 
+    @_timed_phase("driver_start")
     def initialize_driver(self):
         """Initialize the Selenium WebDriver with Edge options."""
         if self.driver:
@@ -106,15 +229,21 @@ class WhatsappSender:
             edge_options.add_argument("--disable-popup-blocking")
             edge_options.add_experimental_option("excludeSwitches", ["enable-automation"])
             edge_options.add_experimental_option("useAutomationExtension", False)
+            if self.headless:
+                edge_options.add_argument("--headless=new")
+                edge_options.add_argument("--window-size=1400,1000")
             
             # Create a new WebDriver instance
             self.driver = webdriver.Edge(options=edge_options)
-            self.driver.maximize_window()
+            self._session_restored = False
+            if not self.headless:
+                self.driver.maximize_window()
             
-            # Store in session state for easy access
-            if 'whatsapp_drivers' not in st.session_state:
-                st.session_state.whatsapp_drivers = []
-            st.session_state.whatsapp_drivers.append(self.driver)
+            # Store in session state for easy access (only when running inside a Streamlit script)
+            if get_script_run_ctx() is not None:
+                if 'whatsapp_drivers' not in st.session_state:
+                    st.session_state.whatsapp_drivers = []
+                st.session_state.whatsapp_drivers.append(self.driver)
             
             # Save the process ID
             self._save_pid()
@@ -139,338 +268,63 @@ class WhatsappSender:
     def send_message(self, recipient_name, message, image_path=None, is_channel=False):
         """
         Send a message to a WhatsApp group/contact/channel with optional image.
-        
+
         Args:
             recipient_name (str): Name of the group, contact or channel
             message (str): Message text to send
             image_path (str, optional): Path to image file to send
             is_channel (bool): Whether recipient is a channel (True) or group/contact (False)
-            
+
         Returns:
             bool: Success status
             str: Status message
         """
+        with self._lock:
+            try:
+                return self._send_message_with_retries(recipient_name, message, image_path, is_channel)
+            finally:
+                self._last_used = time.monotonic()
+
+    def _send_message_with_retries(self, recipient_name, message, image_path, is_channel):
+        self._timer = SendTimer()
+        success, status = self._send_with_retries(recipient_name, message, image_path, is_channel)
+        self._finish_timer(recipient_name, is_channel, success, status, bool(image_path))
+        return success, status
+
+    def _send_with_retries(self, recipient_name, message, image_path, is_channel):
         max_retries = 2
         retry_count = 0
-        
+
         while retry_count < max_retries:
             try:
-                # Initialize driver if needed
-                if not self.driver:
-                    self.initialize_driver()
-                
-                # Load WhatsApp Web
-                if self.driver and "web.whatsapp.com" not in self.driver.current_url:
-                    self.driver.get("https://web.whatsapp.com/")
-                    
-                # First try to load cookies to restore session
-                self._load_cookies()
-                
-                # Wait for login to complete (handles QR code if needed)
-                if not self.wait_for_login():
+                # Start the browser and make sure WhatsApp Web is logged in
+                if not self._prepare_session():
                     return False, "Login failed"
-                
-                # Find and select the recipient based on type
-                if is_channel:
-                    success = self.find_and_click_channel(recipient_name)
-                else:
-                    success = self.find_and_click_group(recipient_name)
-                    
+
+                # Find and select the recipient, trying its cached strategy first
+                success = self.open_chat(recipient_name, is_channel)
+
                 if not success:
                     recipient_type = "channel" if is_channel else "group/contact"
                     return False, f"Could not find {recipient_type}: {recipient_name}"
-                
-                time.sleep(2)  # Wait for chat to load
-                
-                # For channels, always enter text first and then attach image
-                if is_channel:
-                    # First locate and click the message input
-                    input_box_xpath = '//div[@contenteditable="true" and @data-tab="10"]'
-                    try:
-                        if self.driver is None:
-                            raise RuntimeError("WebDriver is not initialized")
-                        input_box = WebDriverWait(self._ensure_driver(), 10).until(
-                            EC.presence_of_element_located((By.XPATH, input_box_xpath))
-                        )
-                        input_box.click()
-                        time.sleep(1)
-                        logger.info("Found and clicked message input field")
-                        
-                        # Enter the message text if provided
-                        if message and message.strip():
-                            # Process message line by line with Shift+Enter for newlines
-                            lines = message.split('\n')
-                            action_chains = ActionChains(self._ensure_driver())                            
-                            for i, line in enumerate(lines):
-                                # Send the line text
-                                action_chains.send_keys(line)
-                                
-                                # Add newline with Shift+Enter if not the last line
-                                if i < len(lines) - 1:
-                                    action_chains.key_down(Keys.SHIFT).send_keys(Keys.ENTER).key_up(Keys.SHIFT)
-                            
-                            # Execute all accumulated actions
-                            action_chains.perform()
-                            time.sleep(1)
-                            logger.info("Entered message text")
-                        
-                        # If there's an image, attach it
-                        if image_path:
-                            if not os.path.exists(image_path):
-                                return False, f"Image file not found: {image_path}"
-                            
-                            try:
-                                # Click attachment button
-                                attachment_xpath = '//div[@title="Attach"] | //button[@title="Attach"] | //span[@data-icon="attach"]/.. | //span[@data-testid="clip"]/..'
-                                if self.driver is None:
-                                    raise RuntimeError("WebDriver is not initialized")
-                                clip_button = WebDriverWait(self._ensure_driver(), 10).until(
-                                    EC.element_to_be_clickable((By.XPATH, attachment_xpath))
-                                )
-                                clip_button.click()
-                                time.sleep(1)
-                                
-                                # Click image button
-                                image_button_xpath = '//input[@accept="image/*,video/mp4,video/3gpp,video/quicktime"] | //input[@type="file"]'
-                                image_input = WebDriverWait(self._ensure_driver(), 10).until(
-                                    EC.presence_of_element_located((By.XPATH, image_button_xpath))
-                                )
-                                
-                                # Send the image file path
-                                abs_image_path = os.path.abspath(image_path)
-                                image_input.send_keys(abs_image_path)
-                                time.sleep(5)
-                                logger.info("Attached image")
-                                
-                                # No need to enter caption as we already entered the text
-                            except Exception as e:
-                                return False, f"Error attaching image: {str(e)}"
-                        
-                        # Click send button
-                        send_xpath = '//div[@role="button"][@aria-label="Send"] | //span[@data-icon="send"] | //span[@data-testid="send"]/.. | //button[contains(@aria-label, "Send")]'
-                        send_button = WebDriverWait(self._ensure_driver(), 10).until(
-                            EC.element_to_be_clickable((By.XPATH, send_xpath))
-                        )
-                        send_button.click()
-                        time.sleep(3)
-                        logger.info(f"Message sent to channel: {recipient_name}")
-                        
-                    except Exception as e:
-                        return False, f"Error sending to channel: {str(e)}"
-                    
-                # For groups/contacts, follow the original approach
-                else:
-                    # If we have an image, send it with caption
-                    if image_path:
-                        if not os.path.exists(image_path):
-                            return False, f"Image file not found: {image_path}"
-                        
-                        try:
-                            logger.info(f"Preparing to send image to group: {recipient_name}")
-                            
-                            # First make sure we have a message input (confirms we're in chat)
-                            input_box_xpath = '//div[@contenteditable="true" and @data-tab="10"]'
-                            input_box = WebDriverWait(self._ensure_driver(), 10).until(
-                                EC.presence_of_element_located((By.XPATH, input_box_xpath))
-                            )
-                            logger.info("Message input box found, chat is active")
-                            
-                            # Click to make sure chat is fully loaded
-                            input_box.click()
-                            time.sleep(1)
-                            
-                            # Click attachment button - using a more reliable method
-                            logger.info("Trying to click attachment button...")
-                            attachment_xpath = '//div[@title="Attach"] | //button[@title="Attach"] | //span[@data-icon="attach"]/.. | //span[@data-testid="clip"]/..'
-                            
-                            # Scroll to make sure it's visible
-                            attachment_button = WebDriverWait(self._ensure_driver(), 10).until(
-                                EC.presence_of_element_located((By.XPATH, attachment_xpath))
-                            )
-                            
-                            # Scroll into view and ensure it's clickable
-                            self._ensure_element_clickable(attachment_button)
-                            time.sleep(1)
-                            
-                            # Now try to click it
-                            attachment_button = WebDriverWait(self._ensure_driver(), 10).until(
-                                EC.element_to_be_clickable((By.XPATH, attachment_xpath))
-                            )
-                            attachment_button.click()
-                            logger.info("Attachment button clicked")
-                            time.sleep(2)
-                            
-                            # Debug to see what options are available
-                            self._debug_capture_ui_state("after_attachment_click")
-                            
-                            # IMPORTANT CHANGE: Use the same approach as channels - direct file input
-                            # Look for the file input element directly
-                            logger.info("Looking for file input field...")
-
-                            try:
-                                # First try to click on the Photos & videos option explicitly
-                                photos_xpath = '//span[text()="Photos & videos" or (contains(text(), "Photos") and contains(text(), "videos"))]'
-                                photos_option = WebDriverWait(self._ensure_driver(), 5).until(
-                                    EC.element_to_be_clickable((By.XPATH, photos_xpath))
-                                )
-                                logger.info("Found Photos & videos option")
-                                
-                                # Scroll it into view and click
-                                self._ensure_driver().execute_script("arguments[0].scrollIntoView({block: 'center'});", photos_option)
-                                time.sleep(1)
-                                # photos_option.click()
-                                # logger.info("Clicked on Photos & videos option")
-                                time.sleep(2)
-                                
-                                # Now look for the file input element directly related to the Photos & videos option
-                                image_button_xpath = '//span[text()="Photos & videos" or (contains(text(), "Photos") and contains(text(), "videos"))]/..//input[@type="file"]'
-                                image_input = WebDriverWait(self._ensure_driver(), 10).until(
-                                    EC.presence_of_element_located((By.XPATH, image_button_xpath))
-                                )
-                                
-                            except Exception as e:
-                                logger.warning(f"Could not select Photos & videos menu: {e}")
-                                self._debug_capture_ui_state("photos_menu_failed")
-                                
-                                # Try a different approach - using direct input with the parent div to ensure we get the right input
-                                try:
-                                    logger.info("Trying alternative XPath for file input")
-                                    # Try to find input through parent div with media icon
-                                    alt_image_xpath = '//span[@data-icon="media-filled-refreshed"]/../..//input[@type="file"]'
-                                    image_input = WebDriverWait(self._ensure_driver(), 5).until(
-                                        EC.presence_of_element_located((By.XPATH, alt_image_xpath))
-                                    )
-                                    logger.info("Found file input using alternative XPath")
-                                except Exception as e2:
-                                    logger.error(f"Could not find file input with alternative XPath: {e2}")
-                                    
-                                    # Last resort - try the generic file input
-                                    try:
-                                        logger.info("Using generic file input as last resort")
-                                        image_button_xpath = '//input[@type="file"]'
-                                        image_input = WebDriverWait(self._ensure_driver(), 5).until(
-                                            EC.presence_of_element_located((By.XPATH, image_button_xpath))
-                                        )
-                                    except Exception as e3:
-                                        logger.error(f"All file input methods failed: {e3}")
-                                        raise Exception(f"Failed to select image input method: {e3}")
-                            
-                            # Send the image file path directly to this input
-                            abs_image_path = os.path.abspath(image_path)
-                            logger.info(f"Sending image path directly: {abs_image_path}")
-                            image_input.send_keys(abs_image_path)
-                            time.sleep(5)
-                            logger.info("Image file path sent")
-                            
-                            # Add caption if message exists
-                            if message and message.strip():
-                                caption_xpath = '//div[@contenteditable="true" and @data-tab="10"] | //div[@contenteditable="true" and @role="textbox"] | //div[@contenteditable="true"][@data-testid="media-caption"]'
-                                try:
-                                    logger.info("Looking for caption field...")
-                                    caption_input = WebDriverWait(self._ensure_driver(), 10).until(
-                                        EC.presence_of_element_located((By.XPATH, caption_xpath))
-                                    )
-                                    logger.info("Caption field found, clicking...")
-                                    
-                                    # Make sure it's visible and clickable
-                                    self._ensure_element_clickable(caption_input)
-                                    time.sleep(1)
-                                    
-                                    caption_input.click()
-                                    time.sleep(1)
-                                    logger.info("Caption field clicked")
-                                    
-                                    # Process caption line by line with Shift+Enter for newlines
-                                    lines = message.split('\n')
-                                    action_chains = ActionChains(self._ensure_driver())
-                                    
-                                    logger.info(f"Entering caption with {len(lines)} lines")
-                                    for i, line in enumerate(lines):
-                                        # Send the line text
-                                        action_chains.send_keys(line)
-                                        
-                                        # Add newline with Shift+Enter if not the last line
-                                        if i < len(lines) - 1:
-                                            action_chains.key_down(Keys.SHIFT).send_keys(Keys.ENTER).key_up(Keys.SHIFT)
-                                    
-                                    # Execute all accumulated actions
-                                    action_chains.perform()
-                                    time.sleep(1)
-                                    logger.info("Caption entered successfully")
-                                except Exception as e:
-                                    logger.warning(f"Could not add caption: {str(e)}")
-                            
-                            # Click send button
-                            logger.info("Looking for send button...")
-                            send_xpath = '//div[@role="button"][@aria-label="Send"] | //span[@data-icon="send"] | //span[@data-testid="send"]/.. | //button[contains(@aria-label, "Send")]'
-                            send_button = WebDriverWait(self._ensure_driver(), 10).until(
-                                EC.element_to_be_clickable((By.XPATH, send_xpath))
-                            )
-                            
-                            # Make sure it's visible
-                            self._ensure_element_clickable(send_button)
-                            time.sleep(1)
-                            
-                            logger.info("Clicking send button...")
-                            send_button.click()
-                            time.sleep(3)
-                            logger.info(f"Image sent to group: {recipient_name}")
-                        except Exception as e:
-                            logger.error(f"Error sending image to group: {str(e)}")
-                            return False, f"Error sending image: {str(e)}"
-                    
-                    # If no image, just send text message
-                    elif message and message.strip():
-                        try:
-                            # Look for the input box
-                            input_box_xpath = '//div[@contenteditable="true" and @data-tab="10"]'
-                            input_box = WebDriverWait(self._ensure_driver(), 10).until(
-                                EC.presence_of_element_located((By.XPATH, input_box_xpath))
-                            )
-                            input_box.click()
-                            
-                            # Process message line by line with Shift+Enter for newlines
-                            lines = message.split('\n')
-                            action_chains = ActionChains(self._ensure_driver())
-
-                            for i, line in enumerate(lines):
-                                # Send the line text
-                                action_chains.send_keys(line)
-                                
-                                # Add newline with Shift+Enter if not the last line
-                                if i < len(lines) - 1:
-                                    action_chains.key_down(Keys.SHIFT).send_keys(Keys.ENTER).key_up(Keys.SHIFT)
-                            
-                            # Execute all accumulated actions
-                            action_chains.perform()
-                            time.sleep(1)
-                            
-                            # Press Enter to send
-                            ActionChains(self._ensure_driver()).key_down(Keys.ENTER).key_up(Keys.ENTER).perform()
-                            time.sleep(3)
-                            logger.info(f"Text message sent to {recipient_name}")
-                        except Exception as e:
-                            return False, f"Failed to send message: {str(e)}"
-                
+
+                sent, status = self._send_in_open_chat(recipient_name, message, image_path, is_channel)
+                if not sent:
+                    self._debug_capture_ui_state("send_failed", failure=True)
+
                 # Save session information for future use
-                self._save_cookies()
-                self._improve_session_persistence()
-                
-                # Optional: Return to WhatsApp home
-                try:
-                    if self.driver is not None:
-                        self.driver.get("https://web.whatsapp.com/")
-                        time.sleep(2)
-                except:
-                    pass
-                    
-                return True, "Message sent successfully"
-                
+                if sent:
+                    self._save_cookies()
+                    self._improve_session_persistence()
+
+                return sent, status
+
             except Exception as e:
                 retry_count += 1
                 error_msg = f"Attempt {retry_count}/{max_retries} failed: {str(e)}"
                 logger.warning(error_msg)
-                
+                self._debug_capture_ui_state("send_error", failure=True)
+
                 if retry_count < max_retries:
                     # Clean up for retry
                     if self.driver:
@@ -479,88 +333,441 @@ class WhatsappSender:
                         except:
                             pass
                         self.driver = None
-                    
+
                     # Clean up resources before retrying
                     self._cleanup_processes()
                     time.sleep(2)
                 else:
                     return False, f"Failed after {max_retries} attempts: {str(e)}"
 
+    def send_batch(self, recipient_name, messages, is_channel=False):
+        """
+        Open a recipient's chat once and send several messages to it in sequence.
+
+        Args:
+            recipient_name (str): Name of the group, contact or channel
+            messages (list): Items of {"message": str, "image_path": str or None};
+                (message, image_path) tuples are accepted too
+            is_channel (bool): Whether recipient is a channel (True) or group/contact (False)
+
+        Returns:
+            list: One (success, status) tuple per message, in input order
+        """
+        with self._lock:
+            try:
+                return self._send_batch(recipient_name, messages, is_channel)
+            finally:
+                self._last_used = time.monotonic()
+
+    def _send_batch(self, recipient_name, messages, is_channel):
+        items = []
+        for item in messages:
+            if isinstance(item, dict):
+                items.append((item.get("message"), item.get("image_path")))
+            else:
+                message, image_path = (tuple(item) + (None,))[:2]
+                items.append((message, image_path))
+
+        if not items:
+            return []
+
+        # Session start-up and chat resolution are attributed to the first message
+        self._timer = SendTimer()
+        try:
+            if not self._prepare_session():
+                self._finish_timer(recipient_name, is_channel, False, "Login failed", False)
+                return [(False, "Login failed")] * len(items)
+        except Exception as e:
+            logger.error(f"Could not start WhatsApp session for batch: {e}")
+            self._finish_timer(recipient_name, is_channel, False, f"Session error: {str(e)}", False)
+            return [(False, f"Session error: {str(e)}")] * len(items)
+
+        recipient_type = "channel" if is_channel else "group/contact"
+        if not self.open_chat(recipient_name, is_channel):
+            self._finish_timer(recipient_name, is_channel, False, f"Could not find {recipient_type}: {recipient_name}", False)
+            return [(False, f"Could not find {recipient_type}: {recipient_name}")] * len(items)
+
+        results = []
+        for index, (message, image_path) in enumerate(items):
+            if self._timer is None:
+                self._timer = SendTimer()
+            try:
+                result = self._send_in_open_chat(recipient_name, message, image_path, is_channel)
+            except Exception as e:
+                result = (False, f"Error: {str(e)}")
+
+            if not result[0]:
+                # The chat may have been closed by a popup or re-render; reopen once and retry
+                logger.warning(f"Batch message {index + 1}/{len(items)} to {recipient_name} failed: {result[1]}")
+                self._debug_capture_ui_state("batch_send_failed", failure=True)
+                try:
+                    if self.open_chat(recipient_name, is_channel):
+                        result = self._send_in_open_chat(recipient_name, message, image_path, is_channel)
+                except Exception as e:
+                    result = (False, f"Error after reopening chat: {str(e)}")
+
+            results.append(result)
+            self._finish_timer(recipient_name, is_channel, result[0], result[1], bool(image_path))
+            logger.info(f"Batch message {index + 1}/{len(items)} to {recipient_name}: {result[1]}")
+
+        self._save_cookies()
+        self._improve_session_persistence()
+        return results
+
+    def _prepare_session(self):
+        """Start the driver if needed, restore the saved session once and wait for login."""
+        # Initialize driver if needed
+        if not self.driver:
+            self.initialize_driver()
+
+        # Warm path: this browser is already on WhatsApp Web and logged in
+        if self._session_restored and self._is_logged_in():
+            return True
+
+        # Load WhatsApp Web
+        if self.driver and not self._on_whatsapp_page():
+            started = time.perf_counter()
+            self.driver.get(self.base_url)
+            self._add_span("page_load", started)
+
+        # The Edge profile normally keeps the session itself; saved cookies and
+        # localStorage are only injected when WhatsApp asks for a QR scan
+        if not self._session_restored:
+            self._session_restored = True
+            if self._wait_for_side_or_qr() == "qr":
+                self._load_cookies()
+
+        # Wait for login to complete (handles QR code if needed)
+        return self.wait_for_login()
+
+    def _on_whatsapp_page(self):
+        """Whether the browser is currently on WhatsApp Web (or the configured stand-in)."""
+        return self._base_host in self._ensure_driver().current_url
+
+    def _is_logged_in(self):
+        """Cheap check (no waits) that the current page is a logged-in WhatsApp Web."""
+        try:
+            driver = self._ensure_driver()
+            return (self._base_host in driver.current_url
+                    and bool(driver.find_elements(By.XPATH, self.SIDE_PANEL_XPATH)))
+        except Exception:
+            return False
+
+    def _wait_for_side_or_qr(self, timeout=20):
+        """Wait for the chat list or the QR code; return "side", "qr" or None."""
+        try:
+            self._wait(timeout).until(
+                EC.presence_of_element_located((By.XPATH, f"{self.SIDE_PANEL_XPATH} | {self.QR_CODE_XPATH}"))
+            )
+        except TimeoutException:
+            return None
+        if self._ensure_driver().find_elements(By.XPATH, self.SIDE_PANEL_XPATH):
+            return "side"
+        return "qr"
+
+    def _send_in_open_chat(self, recipient_name, message, image_path=None, is_channel=False):
+        """
+        Send one message into the chat that is currently open.
+
+        Returns:
+            bool: Success status
+            str: Status message
+        """
+        # For channels, always enter text first and then attach image
+        if is_channel:
+            try:
+                input_box = self._wait_for_composer()
+                input_box.click()
+                logger.info("Found and clicked message input field")
+
+                # Enter the message text if provided
+                if message and message.strip():
+                    self._type_message(message)
+                    logger.info("Entered message text")
+
+                # If there's an image, attach it
+                if image_path:
+                    if not os.path.exists(image_path):
+                        return False, f"Image file not found: {image_path}"
+
+                    try:
+                        attach_started = time.perf_counter()
+                        clip_button = self._find_variant("attach", timeout=10, clickable=True)
+                        clip_button.click()
+
+                        image_input = self._find_variant("file_input", timeout=10)
+                        image_input.send_keys(os.path.abspath(image_path))
+                        self._wait_for_upload_complete()
+                        self._add_span("attachment_upload", attach_started)
+                        logger.info("Attached image")
+
+                        # No need to enter caption as we already entered the text
+                    except Exception as e:
+                        return False, f"Error attaching image: {str(e)}"
+
+                snapshot = self._outgoing_snapshot()
+                send_button = self._find_variant("send", timeout=10, clickable=True)
+                send_button.click()
+                acknowledged = self._wait_for_send_ack(snapshot)
+                logger.info(f"Message sent to channel: {recipient_name}")
+
+            except Exception as e:
+                return False, f"Error sending to channel: {str(e)}"
+
+        # For groups/contacts, follow the original approach
+        else:
+            # If we have an image, send it with caption
+            if image_path:
+                if not os.path.exists(image_path):
+                    return False, f"Image file not found: {image_path}"
+
+                try:
+                    logger.info(f"Preparing to send image to group: {recipient_name}")
+
+                    # First make sure we have a message input (confirms we're in chat)
+                    input_box = self._wait_for_composer()
+                    logger.info("Message input box found, chat is active")
+                    input_box.click()
+
+                    logger.info("Trying to click attachment button...")
+                    attach_started = time.perf_counter()
+                    attachment_button = self._find_variant("attach", timeout=10, clickable=True)
+                    self._ensure_element_clickable(attachment_button)
+                    attachment_button.click()
+                    logger.info("Attachment button clicked")
+
+                    # Debug to see what options are available
+                    self._debug_capture_ui_state("after_attachment_click")
+
+                    # IMPORTANT CHANGE: Use the same approach as channels - direct file input
+                    # Look for the file input element directly
+                    logger.info("Looking for file input field...")
+
+                    try:
+                        # Photos & videos input first, then the media icon input, then any file input
+                        image_input = self._find_variant("file_input", timeout=5)
+                    except TimeoutException as e:
+                        self._debug_capture_ui_state("photos_menu_failed", failure=True)
+                        logger.error(f"All file input methods failed: {e}")
+                        raise Exception(f"Failed to select image input method: {e}")
+
+                    # Send the image file path directly to this input
+                    abs_image_path = os.path.abspath(image_path)
+                    logger.info(f"Sending image path directly: {abs_image_path}")
+                    image_input.send_keys(abs_image_path)
+                    self._wait_for_upload_complete()
+                    self._add_span("attachment_upload", attach_started)
+                    logger.info("Image upload preview is ready")
+
+                    # Add caption if message exists
+                    if message and message.strip():
+                        try:
+                            logger.info("Looking for caption field...")
+                            caption_input = self._find_variant("caption", timeout=10, clickable=True)
+                            self._ensure_element_clickable(caption_input)
+                            caption_input.click()
+                            logger.info("Caption field clicked")
+
+                            self._type_message(message)
+                            logger.info("Caption entered successfully")
+                        except Exception as e:
+                            logger.warning(f"Could not add caption: {str(e)}")
+
+                    logger.info("Looking for send button...")
+                    snapshot = self._outgoing_snapshot()
+                    send_button = self._find_variant("send", timeout=10, clickable=True)
+                    self._ensure_element_clickable(send_button)
+
+                    logger.info("Clicking send button...")
+                    send_button.click()
+                    acknowledged = self._wait_for_send_ack(snapshot)
+                    logger.info(f"Image sent to group: {recipient_name}")
+                except Exception as e:
+                    logger.error(f"Error sending image to group: {str(e)}")
+                    return False, f"Error sending image: {str(e)}"
+
+            # If no image, just send text message
+            elif message and message.strip():
+                try:
+                    input_box = self._wait_for_composer()
+                    input_box.click()
+                    self._type_message(message)
+
+                    # Press Enter to send
+                    snapshot = self._outgoing_snapshot()
+                    ActionChains(self._ensure_driver()).key_down(Keys.ENTER).key_up(Keys.ENTER).perform()
+                    acknowledged = self._wait_for_send_ack(snapshot)
+                    logger.info(f"Text message sent to {recipient_name}")
+                except Exception as e:
+                    return False, f"Failed to send message: {str(e)}"
+            else:
+                acknowledged = True
+
+        if not acknowledged:
+            logger.warning(f"No sent tick observed for message to {recipient_name}")
+            return True, "Message sent (delivery not confirmed)"
+        return True, "Message sent successfully"
+
+    @_timed_phase("chat_resolution")
+    def open_chat(self, recipient_name, is_channel=False):
+        """
+        Open a recipient's chat, trying the strategy that worked last time before
+        falling back to the full lookup chain.
+
+        Returns:
+            bool: True if the chat is open
+        """
+        cached = self.resolution_cache.get(recipient_name, is_channel)
+        if cached:
+            if self._open_with_cached_strategy(recipient_name, is_channel, cached):
+                logger.info(f"Opened {recipient_name} with cached strategy: {cached['strategy']}")
+                self.resolution_cache.record_success(
+                    recipient_name, is_channel, cached["strategy"],
+                    position=cached.get("position"), url=cached.get("url")
+                )
+                return True
+            logger.info(f"Cached strategy '{cached['strategy']}' missed for {recipient_name}, falling back")
+            self.resolution_cache.record_miss(recipient_name, is_channel)
+
+        self._last_resolution = None
+        if is_channel:
+            success = self.find_and_click_channel(recipient_name)
+        else:
+            success = self.find_and_click_group(recipient_name)
+
+        if success and self._last_resolution:
+            self.resolution_cache.record_success(
+                recipient_name, is_channel, self._last_resolution["strategy"],
+                position=self._last_resolution.get("position"), url=self._current_chat_url()
+            )
+        return success
+
+    def _open_with_cached_strategy(self, recipient_name, is_channel, cached):
+        """Replay a cached resolution with short waits. Returns True if the chat opened."""
+        strategy = cached.get("strategy")
+        title_xpath = f'//span[@title="{recipient_name}"]'
+        try:
+            if strategy == "deep_link" and cached.get("url"):
+                self._ensure_driver().get(cached["url"])
+                return self._wait_for_chat_open(recipient_name, timeout=15)
+
+            self._wait(10).until(
+                EC.presence_of_element_located((By.XPATH, self.SIDE_PANEL_XPATH))
+            )
+
+            if strategy == "direct":
+                self._wait(2).until(EC.element_to_be_clickable((By.XPATH, title_xpath))).click()
+                return self._wait_for_chat_open(recipient_name, timeout=5)
+
+            if is_channel and strategy in ("channels_tab", "search"):
+                self._find_variant("channels_tab", timeout=5, clickable=True).click()
+
+            if strategy == "channels_tab":
+                position = cached.get("position")
+                titles = self._ensure_driver().find_elements(By.XPATH, '//div[@id="pane-side"]//span[@title]')
+                if position is not None and position < len(titles) and titles[position].get_attribute("title") == recipient_name:
+                    titles[position].click()
+                else:
+                    self._wait(2).until(EC.element_to_be_clickable((By.XPATH, title_xpath))).click()
+                return self._wait_for_chat_open(recipient_name, timeout=5)
+
+            if strategy == "search":
+                search_box = self._wait(5).until(
+                    EC.presence_of_element_located((By.XPATH, f'{self.SEARCH_BOX_XPATH} | //div[@contenteditable="true"][@role="textbox"]'))
+                )
+                search_box.clear()
+                search_box.click()
+                ActionChains(self._ensure_driver()).send_keys(recipient_name).perform()
+                self._wait(5).until(EC.element_to_be_clickable((By.XPATH, title_xpath))).click()
+                return self._wait_for_chat_open(recipient_name, timeout=5)
+        except Exception as e:
+            logger.debug(f"Cached strategy failed for {recipient_name}: {e}")
+        return False
+
+    def _chat_list_position(self, chat_name):
+        """Index of chat_name among the titles in the side pane, or None."""
+        try:
+            titles = self._ensure_driver().find_elements(By.XPATH, '//div[@id="pane-side"]//span[@title]')
+            for index, element in enumerate(titles):
+                if element.get_attribute("title") == chat_name:
+                    return index
+        except Exception:
+            pass
+        return None
+
+    def _current_chat_url(self):
+        """Return the current URL if it points at a specific chat rather than the home page."""
+        try:
+            url = self._ensure_driver().current_url
+        except Exception:
+            return None
+        if url and url.rstrip("/") != self.base_url.rstrip("/"):
+            return url
+        return None
+
     def find_and_click_group(self, group_name):
         """Search for and click on a group/contact."""
         try:
             logger.info(f"Looking for group/contact: {group_name}")
-            
+
             # Wait for side panel to be loaded
-            WebDriverWait(self._ensure_driver(), 15).until(
-                EC.presence_of_element_located((By.XPATH, '//div[@id="side"]'))
+            self._wait(15).until(
+                EC.presence_of_element_located((By.XPATH, self.SIDE_PANEL_XPATH))
             )
             logger.info("Side panel loaded")
-            
+
             # First try direct match if it's pinned or recent
             try:
                 logger.info("Trying direct match first...")
                 group_xpath = f'//span[@title="{group_name}"]'
-                group = WebDriverWait(self._ensure_driver(), 5).until(
+                group = self._wait(5).until(
                     EC.element_to_be_clickable((By.XPATH, group_xpath))
                 )
                 group.click()
-                time.sleep(2)
                 logger.info(f"Found and clicked group directly: {group_name}")
-                
+
                 # Verify we're in the chat
-                try:
-                    WebDriverWait(self._ensure_driver(), 5).until(
-                        EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true" and @data-tab="10"]'))
-                    )
+                if self._wait_for_chat_open(group_name, timeout=5):
                     logger.info("Chat input box found, chat loaded successfully")
+                    self._last_resolution = {"strategy": "direct"}
                     return True
-                except:
-                    logger.info("Chat input not found after clicking group, will try search")
-                    pass
-            except:
+                logger.info("Chat input not found after clicking group, will try search")
+            except TimeoutException:
                 logger.info("Group not found directly, will try search")
-                pass
-            
+
             # If direct match fails, use search
             logger.info("Using search to find group...")
-            
-            # Find the search box
-            search_box_xpath = '//div[@contenteditable="true"][@data-tab="3"]'
-            search_box = WebDriverWait(self._ensure_driver(), 10).until(
-                EC.presence_of_element_located((By.XPATH, search_box_xpath))
+
+            search_box = self._wait(10).until(
+                EC.presence_of_element_located((By.XPATH, self.SEARCH_BOX_XPATH))
             )
-            
+
             # Clear any existing text
             search_box.clear()
             search_box.click()
-            time.sleep(1)
             logger.info("Search box cleared and clicked")
-            
-            # Enter the group name
+
+            # Enter the group name; the result wait below replaces a fixed pause
             ActionChains(self._ensure_driver()).send_keys(group_name).perform()
-            time.sleep(3)
             logger.info(f"Entered group name in search: {group_name}")
-            
+
             # Look for matching contacts/groups
-            group_xpath = f'//span[@title="{group_name}"]'
+            group_xpath = f'//div[@id="pane-side"]//span[@title="{group_name}"] | //span[@title="{group_name}"]'
             try:
-                group = WebDriverWait(self._ensure_driver(), 10).until(
+                group = self._wait(10).until(
                     EC.element_to_be_clickable((By.XPATH, group_xpath))
                 )
                 group.click()
-                time.sleep(2)
-                
-                # Verify we're in the chat
-                WebDriverWait(self._ensure_driver(), 5).until(
-                    EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true" and @data-tab="10"]'))
-                )
+
+                if not self._wait_for_chat_open(group_name, timeout=5):
+                    raise TimeoutException(f"Chat did not open: {group_name}")
                 logger.info(f"Group found through search and clicked: {group_name}")
+                self._last_resolution = {"strategy": "search"}
                 return True
-            except:
+            except Exception:
                 logger.warning(f"Group/contact not found after search: {group_name}")
                 return False
-                
+
         except Exception as e:
             logger.error(f"Error finding group/contact: {e}")
             return False
@@ -570,175 +777,401 @@ class WhatsappSender:
         if self.driver is None:
             logger.error("Cannot find channel: WebDriver is not initialized")
             return False
-            
+
         try:
             # Wait for side panel to be loaded
-            WebDriverWait(self._ensure_driver(), 15).until(
-                EC.presence_of_element_located((By.XPATH, '//div[@id="side"]'))
+            self._wait(15).until(
+                EC.presence_of_element_located((By.XPATH, self.SIDE_PANEL_XPATH))
             )
-            
+
             # First try to click directly if channel is pinned
             try:
                 channel_xpath = f'//span[@title="{channel_name}"]'
-                channel = WebDriverWait(self._ensure_driver(), 5).until(
+                channel = self._wait(5).until(
                     EC.presence_of_element_located((By.XPATH, channel_xpath))
                 )
                 channel.click()
-                time.sleep(2)
                 # Verify we're in channel chat and not search results
-                try:
-                    WebDriverWait(self._ensure_driver(), 3).until(
-                        EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true" and @data-tab="10"]'))
-                    )
+                if self._wait_for_chat_open(channel_name, timeout=3):
                     logger.info(f"Found pinned channel: {channel_name}")
+                    self._last_resolution = {"strategy": "direct"}
                     return True
-                except:
-                    logger.warning("Found element but might be in search results, trying channels tab")
-                    pass
-            except:
+                logger.warning("Found element but might be in search results, trying channels tab")
+            except TimeoutException:
                 # Channel not visible directly, try through the channels tab
                 pass
-                
+
             # Try to find and click the channels tab first
             try:
                 logger.info("Looking for channels tab")
-                channels_tab_xpath = '//span[@data-icon="newsletter-tab"] | //span[@data-testid="newsletter-tab"] | //span[@data-icon="newsletter-outline"] | //span[@data-testid="newsletter"]'
-                channels_tab = WebDriverWait(self._ensure_driver(), 10).until(
-                    EC.element_to_be_clickable((By.XPATH, channels_tab_xpath))
-                )
+                channels_tab = self._find_variant("channels_tab", timeout=10, clickable=True)
                 channels_tab.click()
-                time.sleep(3)
                 logger.info("Clicked on channels tab")
-                
+
                 # Now look for the channel in the channels list
                 try:
                     # First try direct match
                     channel_in_tab_xpath = f'//span[@title="{channel_name}"]'
-                    channel = WebDriverWait(self._ensure_driver(), 5).until(
+                    channel = self._wait(5).until(
                         EC.element_to_be_clickable((By.XPATH, channel_in_tab_xpath))
                     )
+                    position = self._chat_list_position(channel_name)
                     channel.click()
-                    time.sleep(2)
+                    if not self._wait_for_chat_open(channel_name, timeout=5):
+                        raise TimeoutException(f"Channel did not open: {channel_name}")
                     logger.info(f"Found channel in tab list: {channel_name}")
+                    self._last_resolution = {"strategy": "channels_tab", "position": position}
                     return True
-                except:
+                except TimeoutException:
                     # Use search if direct match fails
                     search_box_xpath = '//div[@contenteditable="true"][@data-tab="3"] | //div[@contenteditable="true"][@role="textbox"]'
-                    search_box = WebDriverWait(self._ensure_driver(), 10).until(
+                    search_box = self._wait(10).until(
                         EC.presence_of_element_located((By.XPATH, search_box_xpath))
                     )
                     search_box.clear()
                     search_box.click()
-                    time.sleep(1)
-                    
+
                     # Enter the channel name
                     ActionChains(self._ensure_driver()).send_keys(channel_name).perform()
-                    time.sleep(3)
-                    
+
                     # Look for matching channel
                     try:
                         channel_xpath = f'//span[@title="{channel_name}"]'
-                        channel = WebDriverWait(self._ensure_driver(), 10).until(
+                        channel = self._wait(10).until(
                             EC.element_to_be_clickable((By.XPATH, channel_xpath))
                         )
                         channel.click()
-                        time.sleep(2)
-                        
+
                         # Verify we entered the channel and not just selected in search
-                        WebDriverWait(self._ensure_driver(), 5).until(
-                            EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true" and @data-tab="10"]'))
-                        )
+                        if not self._wait_for_chat_open(channel_name, timeout=5):
+                            raise TimeoutException(f"Channel did not open: {channel_name}")
                         logger.info(f"Found channel after search: {channel_name}")
+                        self._last_resolution = {"strategy": "search"}
                         return True
-                    except:
+                    except Exception:
                         logger.warning(f"Channel not found: {channel_name}")
                         return False
-                        
+
             except Exception as e:
                 logger.error(f"Error accessing channels tab: {e}")
                 return False
-                    
+
         except Exception as e:
             logger.error(f"Error finding channel: {e}")
             return False
 
+    @_timed_phase("login_check")
     def wait_for_login(self):
         """Wait for WhatsApp Web login and handle popups."""
         if self.driver is None:
             logger.error("Cannot wait for login: WebDriver is not initialized")
             return False
-            
+
         try:
             # Check if already on WhatsApp Web
-            if "web.whatsapp.com" not in self.driver.current_url:
-                self.driver.get("https://web.whatsapp.com")
-                time.sleep(2)
-            
+            if not self._on_whatsapp_page():
+                self.driver.get(self.base_url)
+
+            # Wait for whichever appears first: the chat list or the QR code
+            self._wait_for_side_or_qr()
+
             # Handle popups
             self._handle_popups()
-            
+
             # Check if already logged in
+            if self._ensure_driver().find_elements(By.XPATH, self.SIDE_PANEL_XPATH):
+                logger.info("Already logged in!")
+                return True
+
+            # Need to scan QR code
+            logger.info("Waiting for QR code scan...")
+
+            # Wait longer for user to scan QR code
             try:
-                WebDriverWait(self._ensure_driver(), 10).until(
-                    EC.presence_of_element_located((By.XPATH, '//div[@id="side"]'))
+                self._wait(60).until(
+                    EC.presence_of_element_located((By.XPATH, self.SIDE_PANEL_XPATH))
                 )
-                logger.info("Already logged in!")
+                logger.info("Login successful!")
+
+                # Handle any post-login popups
+                self._handle_popups()
+
+                # Save session data
+                self._save_cookies()
+                self._improve_session_persistence()
                 return True
-            except:
-                # Need to scan QR code
-                logger.info("Waiting for QR code scan...")
-                
-                # Wait longer for user to scan QR code
-                try:
-                    WebDriverWait(self._ensure_driver(), 60).until(
-                        EC.presence_of_element_located((By.XPATH, '//div[@id="side"]'))
-                    )
-                    logger.info("Login successful!")
-                    
-                    # Handle any post-login popups
-                    self._handle_popups()
-                    
-                    # Save session data
-                    self._save_cookies()
-                    self._improve_session_persistence()
-                    return True
-                except:
-                    logger.error("Login timeout")
-                    return False
-                
+            except TimeoutException:
+                logger.error("Login timeout")
+                return False
+
         except Exception as e:
             logger.error(f"Login error: {e}")
             return False
 
-    def _handle_popups(self):
-        """Handle various WhatsApp Web popups."""
+    def _handle_popups(self, timeout=1):
+        """Dismiss WhatsApp Web popups with a single combined probe."""
         if self.driver is None:
             logger.warning("Cannot handle popups: WebDriver is not initialized")
             return
-            
-        popup_xpaths = [
-            '//div[@role="button" and contains(., "Continue")]',
-            '//div[@role="button" and contains(., "Accept")]',
-            '//div[@role="button" and contains(., "OK")]',
-            '//div[contains(@class, "popup") or contains(@class, "modal")]//div[@role="button"]'
-        ]
-        
-        for xpath in popup_xpaths:
+
+        try:
+            self._wait(timeout).until(
+                EC.presence_of_element_located((By.XPATH, self.POPUP_XPATH))
+            )
+        except TimeoutException:
+            return
+
+        for popup in self.driver.find_elements(By.XPATH, self.POPUP_XPATH):
             try:
-                popup = WebDriverWait(self._ensure_driver(), 3).until(
-                    EC.element_to_be_clickable((By.XPATH, xpath))
-                )
-                if popup:
+                if popup.is_displayed() and popup.is_enabled():
                     popup.click()
-                    time.sleep(1)
-                    logger.info(f"Clicked popup")
-            except:
+                    logger.info("Clicked popup")
+            except Exception:
                 pass
 
+    def _wait(self, timeout):
+        """WebDriverWait with a short poll interval that tolerates re-rendered elements."""
+        return WebDriverWait(
+            self._ensure_driver(),
+            timeout,
+            poll_frequency=0.2,
+            ignored_exceptions=(NoSuchElementException, StaleElementReferenceException),
+        )
+
+    def _wait_for_composer(self, timeout=10):
+        """Wait for the chat message input box."""
+        return self._wait(timeout).until(
+            EC.presence_of_element_located((By.XPATH, self.COMPOSER_XPATH))
+        )
+
+    def _wait_for_chat_open(self, chat_name, timeout=5):
+        """
+        Wait until the conversation header shows chat_name and the composer is present.
+        Checking the header matters because the previous chat's composer stays in the DOM.
+        """
+        header_xpath = (
+            f'//div[@id="main"]//header//*[@title="{chat_name}" or normalize-space(text())="{chat_name}"]'
+        )
+        try:
+            self._wait(timeout).until(
+                lambda driver: driver.find_elements(By.XPATH, header_xpath)
+                and driver.find_elements(By.XPATH, self.COMPOSER_XPATH)
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    # Inserts text into the focused editor in one go. A synthetic paste event is
+    # tried first (handled by WhatsApp's editor like a real Ctrl+V), then
+    # execCommand('insertText'). Returns false if no editable element has focus.
+    INSERT_TEXT_SCRIPT = """
+        const text = arguments[0];
+        const method = arguments[1];
+        const el = document.activeElement;
+        if (!el || !el.isContentEditable) { return false; }
+        if (method === 'paste') {
+            const data = new DataTransfer();
+            data.setData('text/plain', text);
+            el.dispatchEvent(new ClipboardEvent('paste', {clipboardData: data, bubbles: true, cancelable: true}));
+        } else {
+            document.execCommand('insertText', false, text);
+        }
+        return true;
+    """
+
+    READ_INPUT_SCRIPT = "const el = document.activeElement; return el ? el.innerText : null;"
+
+    CLEAR_INPUT_SCRIPT = """
+        const el = document.activeElement;
+        if (!el || !el.isContentEditable) { return false; }
+        document.execCommand('selectAll', false, null);
+        document.execCommand('delete', false, null);
+        return true;
+    """
+
+    @staticmethod
+    def _normalize_text(text):
+        """Normalize editor text for comparison (nbsp, trailing spaces, blank edges)."""
+        lines = (text or '').replace('\u00a0', ' ').replace('\r', '').split('\n')
+        return '\n'.join(line.rstrip() for line in lines).strip('\n ')
+
+    @_timed_phase("text_entry")
+    def _type_message(self, message):
+        """
+        Enter a message into the focused input.
+
+        The whole message is inserted at once through execute_script and the
+        rendered text is checked; if it does not match, the input is cleared and
+        the message is typed with ActionChains (Shift+Enter for newlines).
+        The method used and the time taken are kept in self.last_text_entry.
+        """
+        driver = self._ensure_driver()
+        started = time.perf_counter()
+        expected = self._normalize_text(message)
+
+        for method in ("paste", "insert_text"):
+            try:
+                inserted = driver.execute_script(self.INSERT_TEXT_SCRIPT, message, method)
+            except Exception as e:
+                logger.debug(f"Text entry via {method} failed: {e}")
+                inserted = False
+            if not inserted:
+                continue
+            try:
+                # The editor may apply the insert on its next tick, so poll briefly
+                self._wait(1).until(
+                    lambda d: self._normalize_text(d.execute_script(self.READ_INPUT_SCRIPT)) == expected
+                )
+                self._record_text_entry(method, started, len(message))
+                return
+            except TimeoutException:
+                pass
+            logger.debug(f"Rendered text mismatch after {method}, clearing input")
+            try:
+                driver.execute_script(self.CLEAR_INPUT_SCRIPT)
+            except Exception:
+                pass
+
+        lines = message.split('\n')
+        action_chains = ActionChains(driver)
+        for i, line in enumerate(lines):
+            action_chains.send_keys(line)
+            if i < len(lines) - 1:
+                action_chains.key_down(Keys.SHIFT).send_keys(Keys.ENTER).key_up(Keys.SHIFT)
+        action_chains.perform()
+        self._record_text_entry("keys", started, len(message))
+
+    def _add_span(self, phase, started):
+        """Add the time since `started` to the active send timer, if any."""
+        if self._timer is not None:
+            self._timer.add(phase, time.perf_counter() - started)
+
+    def _finish_timer(self, recipient_name, is_channel, success, status, has_image):
+        """Close the active send timer and queue its record for persistence."""
+        if self._timer is None:
+            return
+        record = self._timer.to_record(recipient_name, is_channel, success, status,
+                                       profile=self.profile_name, has_image=has_image)
+        self._timer = None
+        self.timing_records.append(record)
+        logger.info(f"Send timings for {recipient_name}: {record['phases']} (total {record['total_s']:.2f}s)")
+
+    def pop_timing_records(self):
+        """Return and clear the timing records collected since the last call."""
+        records = []
+        while self.timing_records:
+            records.append(self.timing_records.popleft())
+        return records
+
+    def _record_text_entry(self, method, started, length):
+        elapsed = time.perf_counter() - started
+        self.last_text_entry = {"method": method, "seconds": elapsed, "chars": length}
+        logger.info(f"Entered {length} chars via {method} in {elapsed:.3f}s")
+
+    def _find_variant(self, step, timeout=10, clickable=False, fast_timeout=2):
+        """
+        Find the element for a UI step using its selector variants.
+
+        The variant that worked last time is tried alone with a short wait. If it
+        misses, all variants are waited on together (one timeout instead of one per
+        variant) and the highest-priority variant that matches is used and remembered.
+
+        Args:
+            step (str): Key in SELECTOR_VARIANTS
+            timeout (int): Maximum wait for the fallback
+            clickable (bool): Wait for a clickable element instead of a present one
+            fast_timeout (int): Wait for the cached variant
+
+        Returns:
+            WebElement: The matched element
+
+        Raises:
+            TimeoutException: If no variant matches within the timeout
+        """
+        variants = self.SELECTOR_VARIANTS[step]
+        condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+
+        preferred = self.selector_cache.preferred(step)
+        if preferred in variants:
+            try:
+                element = self._wait(fast_timeout).until(condition((By.XPATH, preferred)))
+                self.selector_cache.record(step, preferred, hit=True)
+                return element
+            except TimeoutException:
+                logger.info(f"Cached selector for '{step}' missed, trying all variants")
+
+        try:
+            self._wait(timeout).until(condition((By.XPATH, ' | '.join(variants))))
+        except TimeoutException:
+            self.selector_cache.record_failure(step)
+            raise
+
+        driver = self._ensure_driver()
+        for xpath in variants:
+            for element in driver.find_elements(By.XPATH, xpath):
+                try:
+                    if clickable and not (element.is_displayed() and element.is_enabled()):
+                        continue
+                except StaleElementReferenceException:
+                    continue
+                self.selector_cache.record(step, xpath, hit=False)
+                return element
+
+        # Matched the combined XPath but went stale before we could pick a variant
+        return self._wait(timeout).until(condition((By.XPATH, ' | '.join(variants))))
+
+    def _wait_for_upload_complete(self, timeout=30):
+        """
+        Wait until an attached file has been loaded into the media editor and the
+        send button is usable, instead of sleeping for a fixed upload time.
+        """
+        try:
+            self._wait(min(timeout, 10)).until(
+                EC.presence_of_element_located((By.XPATH, self.MEDIA_PREVIEW_XPATH))
+            )
+        except TimeoutException:
+            logger.warning("Media preview not detected, waiting for send button only")
+        return self._wait(timeout).until(
+            EC.element_to_be_clickable((By.XPATH, self.SEND_XPATH))
+        )
+
+    def _outgoing_snapshot(self):
+        """Record the outgoing message list before sending, for ack detection."""
+        try:
+            elements = self._ensure_driver().find_elements(By.XPATH, self.OUTGOING_MESSAGE_XPATH)
+        except Exception:
+            elements = []
+        return len(elements), (elements[-1] if elements else None)
+
+    @_timed_phase("send_confirmation")
+    def _wait_for_send_ack(self, snapshot, timeout=20):
+        """
+        Wait until a new outgoing message shows a sent/delivered tick.
+
+        Returns:
+            bool: True if the tick was observed within the timeout
+        """
+        count_before, last_before = snapshot
+
+        def acknowledged(driver):
+            elements = driver.find_elements(By.XPATH, self.OUTGOING_MESSAGE_XPATH)
+            if not elements:
+                return False
+            last = elements[-1]
+            if len(elements) <= count_before and last == last_before:
+                return False
+            return bool(last.find_elements(By.XPATH, self.SEND_ACK_XPATH))
+
+        try:
+            self._wait(timeout).until(acknowledged)
+            return True
+        except TimeoutException:
+            return False
+
     def _save_cookies(self):
         """Save session cookies to file."""
         try:
-            if self.driver and "web.whatsapp.com" in self.driver.current_url:
+            if self.driver and self._on_whatsapp_page():
                 cookies = self.driver.get_cookies()
                 with open(self.cookies_file, 'wb') as f:
                     pickle.dump(cookies, f)
@@ -751,7 +1184,7 @@ class WhatsappSender:
     def _improve_session_persistence(self):
         """Save additional session data like localStorage."""
         try:
-            if not self.driver or "web.whatsapp.com" not in self.driver.current_url:
+            if not self.driver or not self._on_whatsapp_page():
                 return False
                 
             # Save localStorage data
@@ -774,20 +1207,29 @@ class WhatsappSender:
             logger.error(f"Error saving session data: {e}")
             return False
 
+    @_timed_phase("session_restore")
     def _load_cookies(self):
-        """Load saved cookies and session data."""
+        """
+        Load saved cookies and localStorage into the current page.
+        The page is reloaded once afterwards, and only if something was restored,
+        because WhatsApp Web reads its session at start-up.
+        """
+        restored = False
         try:
-            # First check for localStorage data
+            # First check for localStorage data, injected with a single script call
             if os.path.exists(self.storage_path) and self.driver:
                 try:
                     with open(self.storage_path, 'r') as f:
                         local_storage = json.load(f)
                     
-                    for key, value in local_storage.items():
+                    if local_storage:
                         self.driver.execute_script(
-                            f"window.localStorage.setItem('{key}', '{value}');"
+                            "const data = arguments[0];"
+                            "for (const key in data) { window.localStorage.setItem(key, data[key]); }",
+                            local_storage
                         )
-                    logger.info("localStorage data loaded")
+                        restored = True
+                        logger.info("localStorage data loaded")
                 except Exception as e:
                     logger.warning(f"Error loading localStorage: {e}")
             
@@ -799,18 +1241,22 @@ class WhatsappSender:
                 for cookie in cookies:
                     try:
                         self.driver.add_cookie(cookie)
+                        restored = True
                     except Exception as e:
                         logger.debug(f"Could not add cookie: {e}")
                 
                 logger.info("Cookies loaded")
+
+            if restored:
                 self.driver.refresh()
-                time.sleep(2)
-                return True
+                self._wait(15).until(
+                    lambda driver: driver.execute_script("return document.readyState") == "complete"
+                )
                 
         except Exception as e:
             logger.error(f"Error loading session data: {e}")
         
-        return False
+        return restored
 
     def download_image(self, image_url, save_path):
         """Download image from URL to local file."""
@@ -884,27 +1330,65 @@ class WhatsappSender:
         except Exception as e:
             logger.error(f"Error killing Edge drivers: {e}")
 
+    def _profile_lock_paths(self, profile_dir):
+        """Return the browser lock files currently present in the profile root."""
+        # lexists: SingletonLock is a (possibly dangling) symlink on Linux
+        return [os.path.join(profile_dir, name) for name in self.PROFILE_LOCK_FILES
+                if os.path.lexists(os.path.join(profile_dir, name))]
+
     def _release_profile_locks(self, profile_dir):
-        """Release locks that might prevent profile use."""
-        if not os.path.exists(profile_dir):
+        """Release stale browser locks that might prevent profile use."""
+        if not os.path.isdir(profile_dir):
             return
-            
-        lock_patterns = ['SingletonLock', 'SingletonCookie', '.lock', 'lockfile']
-        for pattern in lock_patterns:
-            for root, _, files in os.walk(profile_dir):
-                for file in files:
-                    if pattern in file.lower():
-                        try:
-                            lock_path = os.path.join(root, file)
-                            os.remove(lock_path)
-                            logger.info(f"Removed lock file: {lock_path}")
-                        except:
-                            pass
+
+        for lock_path in self._profile_lock_paths(profile_dir):
+            try:
+                os.remove(lock_path)
+                logger.info(f"Removed lock file: {lock_path}")
+            except:
+                pass
+
+    def _kill_profile_processes(self):
+        """
+        Kill only the driver and browser processes that belong to this profile:
+        the driver recorded in our PID file (with its children) and any Edge
+        process still using our user data directory.
+        """
+        if os.path.exists(self.pid_file):
+            try:
+                with open(self.pid_file, 'r') as f:
+                    pid = int(f.read().strip())
+                if psutil.pid_exists(pid):
+                    for child in psutil.Process(pid).children(recursive=True):
+                        self._kill_driver_process(child.pid)
+                    self._kill_driver_process(pid)
+            except (ValueError, psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            except Exception as e:
+                logger.warning(f"Could not stop driver from PID file: {e}")
+
+        # Only scan the process table when a browser may still hold this profile
+        if not self._profile_lock_paths(self._user_data_dir):
+            return
+
+        profile_flag = f"--user-data-dir={self._user_data_dir}"
+        try:
+            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+                try:
+                    name = (proc.info['name'] or '').lower()
+                    if 'msedge' in name and profile_flag in (proc.info['cmdline'] or []):
+                        proc.kill()
+                        logger.info(f"Killed Edge process for profile {self.profile_name}: {proc.info['pid']}")
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+        except Exception as e:
+            logger.error(f"Error killing profile processes: {e}")
 
     def _cleanup_processes(self):
-        """Clean up all resources and processes."""
-        # Kill existing Edge driver processes
-        self._kill_all_edge_drivers()
+        """Clean up this profile's processes and lock files."""
+        # Kill the Edge driver/browser processes of this profile only,
+        # so other pool profiles keep running
+        self._kill_profile_processes()
         
         # Remove lock files
         for filename in [self.pid_file, self.lock_file]:
@@ -942,10 +1426,62 @@ class WhatsappSender:
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
 
+    def release_driver(self, idle_seconds=None):
+        """
+        Called when a caller is done sending for now: the browser stays open for the
+        next send and is quit once it has been idle for idle_seconds (IDLE_QUIT_SECONDS).
+        """
+        idle_seconds = self.IDLE_QUIT_SECONDS if idle_seconds is None else idle_seconds
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            self._idle_timer = threading.Timer(idle_seconds, self._quit_if_idle, args=(idle_seconds,))
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _quit_if_idle(self, idle_seconds):
+        with self._lock:
+            self._idle_timer = None
+            idle_for = time.monotonic() - self._last_used
+            if idle_for < idle_seconds:
+                # Used again since it was released; check again when it would have been idle long enough
+                self.release_driver(idle_seconds - idle_for)
+                return
+            if self.driver:
+                logger.info(f"Quitting WhatsApp browser after {idle_for:.0f}s idle (profile: {self.profile_name})")
+            self.quit_driver()
+
+    def quit_driver(self):
+        """
+        Save cookies and quit the browser, keeping the sender usable (the next send
+        starts a new one). Waits for a send in progress, since the sender is shared.
+        """
+        with self._lock:
+            if not self.driver:
+                return
+            try:
+                self._save_cookies()
+            except Exception as e:
+                logger.warning(f"Could not save cookies before quitting: {e}")
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.warning(f"Error quitting WhatsApp driver: {e}")
+            self.driver = None
+
     def close(self):
         """Properly close the WhatsApp sender instance."""
+        idle_timer = getattr(self, '_idle_timer', None)
+        if idle_timer is not None:
+            idle_timer.cancel()
+            self._idle_timer = None
         self._cleanup_all()
-        WhatsappSender._initialized = False
+        for cache in (getattr(self, 'resolution_cache', None), getattr(self, 'selector_cache', None)):
+            if cache is not None:
+                cache.flush()
+        if hasattr(self, 'debug_store'):
+            self.debug_store.flush(timeout=5)
+        self._initialized = False
 
     def __del__(self):
         """Ensure cleanup when object is garbage collected."""
@@ -964,6 +1500,10 @@ class WhatsappSender:
             except Exception as e:
                 logger.error(f"Failed to reset profile directory: {e}")
         
+        # Chat lookups and selectors may differ for a freshly linked device
+        self.resolution_cache.clear()
+        self.selector_cache.clear()
+
         # Remove cookie and storage files
         for file_path in [self.cookies_file, self.storage_path]:
             if os.path.exists(file_path):
@@ -990,36 +1530,34 @@ class WhatsappSender:
             # Make sure element is scrolled into view
             driver = self._ensure_driver()
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-            time.sleep(0.5)
-            
+
             # Now wait until it's clickable
-            return WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, element.get_attribute("xpath"))))
+            return self._wait(timeout).until(
+                lambda _: element if element.is_displayed() and element.is_enabled() else False
+            )
         except:
-            # If we can't get the xpath, just return the original element
+            # If the element never becomes interactable, let the caller's click surface the error
             return element
 
     # Add this helper method to your class
-    def _debug_capture_ui_state(self, prefix="debug"):
-        """Capture screenshots and page source for debugging"""
+    def _debug_capture_ui_state(self, prefix="debug", failure=False):
+        """
+        Capture a screenshot and page source for debugging.
+
+        Failures are always captured; other checkpoints only for a sampled share
+        of sends (debug_sample_rate). The page is grabbed here, while it still
+        shows the state of interest, and written to the size-capped debug store
+        by its background thread.
+        """
         if not self.driver:
             return
+        if not failure and random.random() >= self.debug_sample_rate:
+            return
         
         try:
-            # Create debug folder if needed
-            debug_dir = os.path.join(self._data_dir, "debug")
-            os.makedirs(debug_dir, exist_ok=True)
-            
-            # Take screenshot
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            screenshot_path = os.path.join(debug_dir, f"{prefix}_screenshot_{timestamp}.png")
-            self.driver.save_screenshot(screenshot_path)
-            
-            # Save page source
-            source_path = os.path.join(debug_dir, f"{prefix}_source_{timestamp}.html")
-            with open(source_path, 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source)
-                
-            logger.info(f"Debug info captured to {debug_dir}")
+            screenshot_png = self.driver.get_screenshot_as_png()
+            page_source = self.driver.page_source
+            self.debug_store.submit(prefix, screenshot_png, page_source)
         except Exception as e:
             logger.error(f"Failed to capture debug info: {e}")
 
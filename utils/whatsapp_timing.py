@@ -0,0 +1,70 @@
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Phases of a WhatsApp send, in pipeline order
+PHASES = (
+    "driver_start",
+    "page_load",
+    "session_restore",
+    "login_check",
+    "chat_resolution",
+    "text_entry",
+    "attachment_upload",
+    "send_confirmation",
+)
+
+
+class SendTimer:
+    """
+    Collects per-phase durations for one WhatsApp message. A phase entered
+    several times (e.g. text entry for message and caption, or a retry) is summed.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_record(self, recipient_name, is_channel, success, status, profile=None, has_image=False):
+        """Build the document stored in the whatsapp_send_timings collection."""
+        return {
+            "timestamp": datetime.now(),
+            "recipient": recipient_name,
+            "is_channel": is_channel,
+            "profile": profile,
+            "has_image": has_image,
+            "outcome": "sent" if success else "failed",
+            "status": status,
+            "phases": {phase: round(seconds, 4) for phase, seconds in self.phases.items()},
+            "total_s": round(time.perf_counter() - self.started, 4),
+        }
+
+
+def summarize_phase_timings(records):
+    """
+    Build a p50/p95 summary per phase from stored timing records.
+
+    Returns:
+        list: One dict per phase (plus "total") with count, p50_s, p95_s and mean_s
+    """
+    rows = []
+    for phase in PHASES + ("total",):
+        if phase == "total":
+            values = [r.get("total_s") for r in records]
+        else:
+            values = [r.get("phases", {}).get(phase) for r in records]
+        values = np.array([v for v in values if v is not None], dtype=float)
+        if values.size == 0:
+            continue
+        rows.append({
+            "phase": phase,
+            "count": int(values.size),
+            "p50_s": round(float(np.percentile(values, 50)), 3),
+            "p95_s": round(float(np.percentile(values, 95)), 3),
+            "mean_s": round(float(values.mean()), 3),
+        })
+    return rows